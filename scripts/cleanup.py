@@ -2,6 +2,14 @@ import shutil
 from pathlib import Path
 import os
 
+def _is_empty_dir(path):
+    """Return True if ``path`` is an existing, empty directory."""
+    try:
+        with os.scandir(path) as entries:
+            return next(entries, None) is None
+    except (FileNotFoundError, NotADirectoryError):
+        return False
+
 def cleanup_project():
     """Clean up project structure by removing empty directories and duplicates."""
     
@@ -31,7 +39,7 @@ def cleanup_project():
     # Remove empty directories
     for dir_path in src_dirs_to_check + test_dirs_to_check:
         path = project_root / dir_path
-        if path.exists() and not any(path.iterdir()):
+        if _is_empty_dir(path):
             print(f"Removing empty directory: {dir_path}")
             path.rmdir()
     
@@ -43,7 +51,7 @@ def cleanup_project():
     
     # Remove logs directory if empty
     logs_dir = project_root / 'logs'
-    if logs_dir.exists() and not any(logs_dir.iterdir()):
+    if _is_empty_dir(logs_dir):
         print("Removing empty logs directory")
         logs_dir.rmdir()
     
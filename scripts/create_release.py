@@ -1,9 +1,9 @@
 import os
-import shutil
 import subprocess
 import json
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from pathlib import Path
 import yaml
 
 def get_version():
@@ -19,23 +19,11 @@ def get_version():
         return 'v1.0.0'  # Default version
 
 def create_release_package():
-    """Create release package with all necessary files."""
-    # Setup paths
-    release_dir = Path('release')
-    if release_dir.exists():
-        shutil.rmtree(release_dir)
-    release_dir.mkdir()
+    """Create release package with all necessary files.
     
-    # Copy source files
-    shutil.copytree('src', release_dir / 'src')
-    shutil.copytree('scripts', release_dir / 'scripts')
-    shutil.copytree('docs', release_dir / 'docs')
-    
-    # Copy configuration
-    os.makedirs(release_dir / 'config')
-    shutil.copy('config/config.example.yaml', release_dir / 'config')
-    
-    # Create version file
+    Files are streamed straight into the zip archive rather than staged in
+    a release/ directory first.
+    """
     version = get_version()
     version_info = {
         'version': version,
@@ -48,37 +36,63 @@ def create_release_package():
         }
     }
     
-    with open(release_dir / 'version.json', 'w') as f:
-        json.dump(version_info, f, indent=2)
+    archive_path = f'market_maker_{version}.zip'
+    with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as zf:
+        # Add source files
+        for source_dir in ('src', 'scripts', 'docs'):
+            for root, _, files in os.walk(source_dir):
+                for name in files:
+                    path = os.path.join(root, name)
+                    zf.write(path, path)
+        
+        # Add configuration
+        zf.write('config/config.example.yaml', 'config/config.example.yaml')
+        
+        # Add version file
+        zf.writestr('version.json', json.dumps(version_info, indent=2))
     
-    # Create release archive
-    shutil.make_archive(
-        f'market_maker_{version}',
-        'zip',
-        release_dir
-    )
-    
-    print(f"Created release package: market_maker_{version}.zip")
+    print(f"Created release package: {archive_path}")
+
+def _report_check(command, result):
+    """Print output of a failed check and return whether it passed."""
+    if result.returncode != 0:
+        print(f"Check failed: {' '.join(command)}")
+        print(result.stdout)
+        print(result.stderr)
+        return False
+    return True
 
 def run_release_checks():
-    """Run pre-release checks."""
-    checks = [
+    """Run pre-release checks.
+    
+    The test suites share on-disk state and run one after another; the lint,
+    type and dependency checks are independent and run concurrently with them.
+    """
+    test_checks = [
         ('Running unit tests...', ['pytest', 'tests/unit']),
         ('Running system tests...', ['pytest', 'tests/system']),
+    ]
+    static_checks = [
         ('Checking code style...', ['flake8', 'src']),
         ('Checking type hints...', ['mypy', 'src']),
         ('Checking dependencies...', ['pip', 'check']),
     ]
     
-    for message, command in checks:
-        print(message)
-        result = subprocess.run(command, capture_output=True, text=True)
-        if result.returncode != 0:
-            print(f"Check failed: {' '.join(command)}")
-            print(result.stdout)
-            print(result.stderr)
-            return False
-    return True
+    with ThreadPoolExecutor(max_workers=len(static_checks)) as executor:
+        futures = []
+        for message, command in static_checks:
+            print(message)
+            futures.append((command, executor.submit(
+                subprocess.run, command, capture_output=True, text=True)))
+        
+        for message, command in test_checks:
+            print(message)
+            result = subprocess.run(command, capture_output=True, text=True)
+            if not _report_check(command, result):
+                return False
+        
+        return all([_report_check(command, future.result())
+                    for command, future in futures])
 
 def main():
     """Main release creation process."""
@@ -1,3 +1,4 @@
+import os
 import subprocess
 import sys
 import json
@@ -5,6 +6,7 @@ import time
 import requests
 import psutil
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
@@ -39,7 +41,7 @@ class FinalTestRunner:
                 test()
             except Exception as e:
                 self._record_test(test.__name__, 'failed', str(e))
-                logger.error(f"Test {test.__name__} failed: {e}")
+                logger.error("Test %s failed: %s", test.__name__, e)
         
         self._save_results()
         return self.results
@@ -142,10 +144,16 @@ class FinalTestRunner:
             ('Checking secrets...', ['detect-secrets', 'scan', './'])
         ]
         
-        for message, command in checks:
-            logger.info(message)
-            result = subprocess.run(command, capture_output=True, text=True)
-            
+        # Checks are independent, so run them concurrently
+        with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+            futures = []
+            for message, command in checks:
+                logger.info(message)
+                futures.append((command, executor.submit(
+                    subprocess.run, command, capture_output=True, text=True)))
+            results = [(command, future.result()) for command, future in futures]
+        
+        for command, result in results:
             if result.returncode != 0:
                 self._record_test('security_tests', 'failed', result.stderr)
                 raise Exception(f"Security check failed: {' '.join(command)}")
@@ -163,7 +171,20 @@ class FinalTestRunner:
             'docs/release_notes.md'
         ]
         
-        missing_docs = [doc for doc in required_docs if not Path(doc).exists()]
+        # One directory listing per docs folder instead of a stat per file
+        listings = {}
+        for doc in required_docs:
+            parent = os.path.dirname(doc) or '.'
+            if parent not in listings:
+                try:
+                    listings[parent] = set(os.listdir(parent))
+                except FileNotFoundError:
+                    listings[parent] = set()
+        
+        missing_docs = [
+            doc for doc in required_docs
+            if os.path.basename(doc) not in listings[os.path.dirname(doc) or '.']
+        ]
         
         if missing_docs:
             self._record_test('documentation_check', 'failed', 
@@ -195,7 +216,7 @@ class FinalTestRunner:
         with open(result_file, 'w') as f:
             json.dump(self.results, f, indent=2)
             
-        logger.info(f"Test results saved to {result_file}")
+        logger.info("Test results saved to %s", result_file)
     
     def _start_services(self):
         """Start required services for testing."""
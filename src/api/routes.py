@@ -1,8 +1,12 @@
 import logging
+import itertools
+import time
 from typing import Dict, Any, Optional, List
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Request
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, conlist
 from datetime import datetime
+import numpy as np
 
 from ..models.deployment.deployment_manager import DeploymentManager
 from ..models.serving.model_server import ModelServer
@@ -11,14 +15,18 @@ from ..data.storage.database_manager import DatabaseManager
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+# orjson encodes the float-heavy prediction payloads much faster than stdlib json
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Monotonic sequence for response identifiers (cheaper than strftime per call)
+_id_seq = itertools.count()
 
 # Request/Response Models
 class MarketState(BaseModel):
     """Market state for prediction requests."""
     instrument_id: str
-    bid_prices: List[float]
-    ask_prices: List[float]
+    bid_prices: conlist(float, min_length=1)
+    ask_prices: conlist(float, min_length=1)
     timestamp: Optional[datetime] = None
 
 class PredictionResponse(BaseModel):
@@ -68,25 +76,60 @@ async def predict(
     model_server: ModelServer = Depends(get_model_server)
 ) -> Dict[str, Any]:
     """Get price adjustments for market state."""
-    try:
-        # Convert to internal format
-        state_dict = {
-            market_state.instrument_id: {
-                'bid': market_state.bid_prices,
-                'ask': market_state.ask_prices
-            }
+    state_dict = {
+        market_state.instrument_id: {
+            'bid': market_state.bid_prices,
+            'ask': market_state.ask_prices
         }
+    }
+    return _predict_state(state_dict, background_tasks, model_server)
+
+@router.post("/predict_bin", response_model=PredictionResponse)
+async def predict_binary(
+    instrument_id: str,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    model_server: ModelServer = Depends(get_model_server)
+) -> Dict[str, Any]:
+    """Get price adjustments for a packed binary market state.
+    
+    The request body holds little-endian float64 bid prices followed by the
+    same number of ask prices, which are read without per-element parsing.
+    """
+    body = await request.body()
+    if not body or len(body) % 16:
+        raise HTTPException(
+            status_code=400,
+            detail="Body must hold an equal, non-zero number of float64 bid and ask prices"
+        )
         
+    prices = np.frombuffer(body, dtype='<f8')
+    levels = prices.size // 2
+    state_dict = {
+        instrument_id: {
+            'bid': prices[:levels],
+            'ask': prices[levels:]
+        }
+    }
+    return _predict_state(state_dict, background_tasks, model_server)
+
+def _predict_state(
+    state_dict: Dict[str, Any],
+    background_tasks: BackgroundTasks,
+    model_server: ModelServer
+) -> Dict[str, Any]:
+    """Run a prediction and schedule it for storage."""
+    try:
         # Get prediction
-        start_time = datetime.now()
+        start_ns = time.perf_counter_ns()
         adjustments = model_server.predict(state_dict)
-        latency = (datetime.now() - start_time).total_seconds() * 1000
+        latency = (time.perf_counter_ns() - start_ns) / 1e6
         
         # Generate response
         response = {
             'adjustments': adjustments,
             'model_version': model_server.current_model_version,
-            'prediction_id': f"pred_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            'prediction_id': f"pred_{time.time_ns()}_{next(_id_seq)}",
             'latency_ms': latency
         }
         
@@ -100,7 +143,7 @@ async def predict(
         return response
         
     except Exception as e:
-        logger.error(f"Prediction error: {e}")
+        logger.error("Prediction error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/deploy", response_model=DeploymentResponse)
@@ -120,7 +163,7 @@ async def deploy_model(
             return {
                 'success': True,
                 'message': 'Deployment successful',
-                'deployment_id': f"dep_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                'deployment_id': f"dep_{time.time_ns()}_{next(_id_seq)}"
             }
         else:
             return {
@@ -130,7 +173,7 @@ async def deploy_model(
             }
             
     except Exception as e:
-        logger.error(f"Deployment error: {e}")
+        logger.error("Deployment error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/rollback", response_model=DeploymentResponse)
@@ -149,7 +192,7 @@ async def rollback_deployment(
         }
         
     except Exception as e:
-        logger.error(f"Rollback error: {e}")
+        logger.error("Rollback error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/status", response_model=Dict[str, Any])
@@ -160,7 +203,7 @@ async def get_status(
     try:
         return deployment_manager.get_deployment_status()
     except Exception as e:
-        logger.error(f"Status error: {e}")
+        logger.error("Status error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/metrics", response_model=MetricsResponse)
@@ -180,7 +223,7 @@ async def get_metrics(
         }
         
     except Exception as e:
-        logger.error(f"Metrics error: {e}")
+        logger.error("Metrics error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/versions", response_model=List[Dict[str, Any]])
@@ -192,5 +235,5 @@ async def list_versions(
     try:
         return deployment_manager.version_manager.list_versions(tags=tags)
     except Exception as e:
-        logger.error(f"Version listing error: {e}")
+        logger.error("Version listing error: %s", e)
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
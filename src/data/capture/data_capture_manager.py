@@ -1,16 +1,59 @@
 import logging
-from typing import Dict, Any, Optional, Deque
-from collections import deque
+from typing import Dict, Any, Optional, List, Tuple
+import sqlite3
 import time
 import threading
 from datetime import datetime, time as dt_time
+import numpy as np
 
 from ..excel.excel_reader import ExcelReader
 from ..storage.database_manager import DatabaseManager
+from ...utils.jit import njit
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@njit(cache=True, fastmath=True)
+def _max_deviation_within(values: np.ndarray, tolerance: float) -> bool:
+    """Check that no value deviates from the mean by more than tolerance."""
+    flat = values.ravel()
+    mean = flat.mean()
+    max_dev = 0.0
+    for x in flat:
+        dev = abs(x - mean)
+        if dev > max_dev:
+            max_dev = dev
+    return max_dev <= tolerance
+
+class StabilityBuffer:
+    """Fixed-size ring buffer of price vectors for a single data stream."""
+    
+    def __init__(self, capacity: int, width: int):
+        """Initialize the buffer.
+        
+        Args:
+            capacity: Maximum number of samples retained
+            width: Number of price levels per sample
+        """
+        self.capacity = capacity
+        self.values = np.empty((capacity, width), dtype=np.float64)
+        self.count = 0
+        
+    @property
+    def width(self) -> int:
+        """Number of price levels per sample."""
+        return self.values.shape[1]
+        
+    def append(self, sample: np.ndarray) -> None:
+        """Write a sample into the next slot, overwriting the oldest."""
+        self.values[self.count % self.capacity] = sample
+        self.count += 1
+        
+    def last(self, n: int) -> np.ndarray:
+        """Return the most recent ``n`` samples, oldest first."""
+        idx = np.arange(self.count - n, self.count) % self.capacity
+        return self.values[idx]
+
 class DataCaptureManager:
     """Manages the data capture process and stability checks."""
     
@@ -25,9 +68,29 @@ class DataCaptureManager:
         self.reader = excel_reader
         self.config = config
         self.db_manager = db_manager
-        self.stability_buffer: Deque = deque(maxlen=20)  # Store recent captures
+        self.stability_tolerance = float(config.get('stability_tolerance', 0.25))
+        self.buffer_size = 20  # Samples retained per stream
+        self.stability_window = 3  # Samples compared in each check
+        self.stability_buffers: Dict[Tuple[str, str], StabilityBuffer] = {}
+        
+        # Compile the stability kernel up front rather than on first capture
+        _max_deviation_within(np.zeros((1, 1)), self.stability_tolerance)
         self.is_capturing: bool = False
         self.capture_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        
+        # Parse trading hours once rather than on every loop iteration
+        trading_hours = config['system']['trading_hours']
+        self.trading_start = dt_time.fromisoformat(trading_hours['start'])
+        self.trading_end = dt_time.fromisoformat(trading_hours['end'])
+        
+        # Stable captures are buffered and written to the database in batches
+        self.snapshot_batch_size = config['system'].get('snapshot_batch_size', 32)
+        self.snapshot_flush_interval = config['system'].get('snapshot_flush_interval', 5.0)
+        self.max_buffered_snapshots = config['system'].get('max_buffered_snapshots', 10000)
+        self._snapshot_buffer: List[Tuple[datetime, Dict[str, Any]]] = []
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
         
     def start_capture(self) -> None:
         """Begins the data capture process in a separate thread."""
@@ -36,6 +99,7 @@ class DataCaptureManager:
             return
             
         self.is_capturing = True
+        self._stop_event.clear()
         self.capture_thread = threading.Thread(target=self._capture_loop)
         self.capture_thread.daemon = True
         self.capture_thread.start()
@@ -44,16 +108,29 @@ class DataCaptureManager:
     def stop_capture(self) -> None:
         """Stops the data capture process."""
         self.is_capturing = False
+        self._stop_event.set()
         if self.capture_thread:
             self.capture_thread.join(timeout=10.0)
+            if self.capture_thread.is_alive():
+                # The loop flushes its own buffer once the current read ends
+                logger.warning("Capture thread still running; leaving final flush to it")
+                return
+        self._flush_snapshots()
         logger.info("Stopped data capture")
         
     def _capture_loop(self) -> None:
-        """Main capture loop."""
-        while self.is_capturing:
+        """Main capture loop.
+        
+        Waits on the stop event rather than sleeping so that stop_capture()
+        interrupts the loop immediately.
+        """
+        interval = self.config['system']['capture_interval']
+        idle_interval = 60.0  # Check every minute outside trading hours
+        
+        while not self._stop_event.is_set():
             try:
                 if not self._is_trading_hours():
-                    time.sleep(60)  # Check every minute outside trading hours
+                    self._stop_event.wait(idle_interval)
                     continue
                     
                 current_data = self.reader.read_market_data()
@@ -61,18 +138,24 @@ class DataCaptureManager:
                 if self._is_stable(current_data):
                     self._process_capture(current_data)
                     
-                time.sleep(self.config['system']['capture_interval'])
-                
             except Exception as e:
-                logger.error(f"Error in capture loop: {e}")
-                time.sleep(self.config['system']['capture_interval'])
+                logger.error("Error in capture loop: %s", e)
                 
+            if time.monotonic() - self._last_flush >= self.snapshot_flush_interval:
+                self._flush_snapshots()
+                
+            self._stop_event.wait(interval)
+            
+        self._flush_snapshots()
+                
+    def _now(self) -> datetime:
+        """Current wall-clock time; the single time source for capture."""
+        return datetime.now()
+        
     def _is_trading_hours(self) -> bool:
         """Check if current time is within trading hours."""
-        now = datetime.now().time()
-        start = dt_time.fromisoformat(self.config['system']['trading_hours']['start'])
-        end = dt_time.fromisoformat(self.config['system']['trading_hours']['end'])
-        return start <= now <= end
+        now = self._now().time()
+        return self.trading_start <= now <= self.trading_end
         
     def _is_stable(self, data: Dict[str, Any]) -> bool:
         """Checks if data meets stability criteria.
@@ -89,73 +172,122 @@ class DataCaptureManager:
             bool: True if data is stable
         """
         try:
-            self.stability_buffer.append(data)
+            streams = []
+            for section, section_data in data.items():
+                if isinstance(section_data, dict):  # bid/ask section
+                    streams.append(((section, 'bid'), section_data['bid']))
+                    streams.append(((section, 'ask'), section_data['ask']))
+                else:  # midpoint section
+                    streams.append(((section, 'mid'), section_data))
+                    
+            buffers = [self._record_sample(key, values) for key, values in streams]
             
-            if len(self.stability_buffer) < 3:  # Need minimum samples
+            # Need minimum samples in every stream
+            if any(buf.count < self.stability_window for buf in buffers):
                 return False
                 
             # Check stability across recent samples
-            window = list(self.stability_buffer)[-3:]  # Last 3 samples
-            
-            for section in data.keys():
-                if not self._check_section_stability(section, window):
-                    return False
-                    
-            return True
+            return all(
+                self._values_stable(buf.last(self.stability_window))
+                for buf in buffers
+            )
             
         except Exception as e:
-            logger.error(f"Error checking stability: {e}")
-            return False
-            
-    def _check_section_stability(self, section: str, window: list) -> bool:
-        """Check if a specific section's data is stable."""
-        if not window:
+            logger.error("Error checking stability: %s", e)
             return False
             
-        # Get values for this section across the window
-        try:
-            if isinstance(window[0][section], dict):  # bid/ask section
-                bids = [sample[section]['bid'] for sample in window]
-                asks = [sample[section]['ask'] for sample in window]
-                
-                # Check if values are stable within tolerance
-                return (self._values_stable(bids) and 
-                        self._values_stable(asks))
-            else:  # midpoint section
-                values = [sample[section] for sample in window]
-                return self._values_stable(values)
-                
-        except Exception as e:
-            logger.error(f"Error checking section stability: {e}")
-            return False
-            
-    def _values_stable(self, values: list) -> bool:
+    def _record_sample(self, key: Tuple[str, str], values: Any) -> StabilityBuffer:
+        """Append a sample to the ring buffer for a stream.
+        
+        The buffer is (re)allocated when a stream is first seen or its number
+        of price levels changes.
+        """
+        sample = np.asarray(values, dtype=np.float64).ravel()
+        buf = self.stability_buffers.get(key)
+        if buf is None or buf.width != sample.size:
+            buf = StabilityBuffer(self.buffer_size, sample.size)
+            self.stability_buffers[key] = buf
+        buf.append(sample)
+        return buf
+        
+    def _values_stable(self, values: np.ndarray) -> bool:
         """Check if a series of values is stable within tolerance."""
-        if not values:
+        arr = np.ascontiguousarray(values, dtype=np.float64)
+        if arr.size == 0:
             return False
             
-        # Convert to numpy arrays for easier comparison
-        import numpy as np
-        arr = np.array(values)
-        
         # Check max deviation
-        max_dev = np.max(np.abs(arr - arr.mean()))
-        return max_dev <= self.config.get('stability_tolerance', 0.25)
+        return bool(_max_deviation_within(arr, self.stability_tolerance))
         
     def _process_capture(self, data: Dict[str, Any]) -> None:
         """Process a stable data capture.
         
-        Stores the captured data in the database and triggers any necessary
-        analysis or visualization updates.
+        Buffers the captured data for storage and flushes the buffer to the
+        database once it reaches the configured batch size.
         
         Args:
             data: Market data dictionary
         """
-        try:
-            # Store the snapshot in the database
-            self.db_manager.store_snapshot(data)
-            logger.info("Processed and stored stable data capture")
+        with self._flush_lock:
+            self._snapshot_buffer.append((self._now(), data))
+            full = len(self._snapshot_buffer) >= self.snapshot_batch_size
+        if full:
+            self._flush_snapshots()
             
-        except Exception as e:
-            logger.error(f"Error processing capture: {e}")
-            # Continue capturing despite storage errors 
\ No newline at end of file
+    def _flush_snapshots(self) -> None:
+        """Write all buffered captures to the database in one batch.
+        
+        If the batch is rejected, the captures are retried one at a time so
+        a single bad capture (e.g. a duplicate row) does not lose the rest.
+        """
+        with self._flush_lock:
+            self._last_flush = time.monotonic()
+            if not self._snapshot_buffer:
+                return
+                
+            snapshots, self._snapshot_buffer = self._snapshot_buffer, []
+            try:
+                self.db_manager.store_snapshots(snapshots)
+                logger.info("Processed and stored %d stable data capture(s)", len(snapshots))
+                
+            except Exception as e:
+                logger.warning("Batch of %d capture(s) failed, storing individually: %s",
+                               len(snapshots), e)
+                self._store_individually(snapshots)
+                
+    def _store_individually(self, snapshots: List[Tuple[datetime, Dict[str, Any]]]) -> None:
+        """Store captures one transaction each after a failed batch.
+        
+        Captures violating a constraint are dropped. Any other error means
+        storage is unavailable, so that capture and the rest are requeued
+        for the next flush. Must be called with ``self._flush_lock`` held.
+        
+        Args:
+            snapshots: List of (capture timestamp, market data dictionary) pairs
+        """
+        for i, snapshot in enumerate(snapshots):
+            try:
+                self.db_manager.store_snapshots([snapshot])
+            except sqlite3.IntegrityError as e:
+                logger.error("Dropping capture at %s: %s", snapshot[0], e)
+            except Exception as e:
+                logger.error("Error processing capture: %s", e)
+                # Continue capturing despite storage errors
+                self._requeue_snapshots(snapshots[i:])
+                return
+                
+    def _requeue_snapshots(self, snapshots: List[Tuple[datetime, Dict[str, Any]]]) -> None:
+        """Put unstored captures back ahead of newer ones.
+        
+        Only the most recent max_buffered_snapshots captures are kept.
+        Must be called with ``self._flush_lock`` held.
+        
+        Args:
+            snapshots: List of (capture timestamp, market data dictionary) pairs
+        """
+        pending = snapshots + self._snapshot_buffer
+        dropped = len(pending) - self.max_buffered_snapshots
+        if dropped > 0:
+            logger.warning("Capture buffer full; dropped %d oldest capture(s)", dropped)
+            pending = pending[dropped:]
+        self._snapshot_buffer = pending
@@ -1,5 +1,5 @@
 import logging
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Iterator, List, NamedTuple, Optional, Tuple
 from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
@@ -8,6 +8,11 @@ from ..storage.database_manager import DatabaseManager
 
 logger = logging.getLogger(__name__)
 
+class RowCursor(NamedTuple):
+    """Highest snapshot and adjustment row ids a caller has already read."""
+    snapshot_id: int
+    adjustment_id: int
+
 class DataCollector:
     """Collects and prepares data for model training."""
     
@@ -20,6 +25,7 @@ class DataCollector:
         """
         self.db_manager = db_manager
         self.config = config
+        self.chunk_size = config.get('data_collection', {}).get('chunk_size', 50000)
         
     def get_training_data(
         self,
@@ -35,87 +41,171 @@ class DataCollector:
         Returns:
             Tuple of (market states list, user adjustments dictionary)
         """
+        records, adjustments = self.get_training_records(start_time, end_time)
+        return (
+            [state for _, state in records],
+            self.process_adjustments(adjustments)
+        )
+        
+    def get_training_records(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None
+    ) -> Tuple[List[Tuple[pd.Timestamp, Dict[str, Any]]], pd.DataFrame]:
+        """Get timestamped market states and raw user adjustments.
+        
+        Lets callers maintain a sliding window of training data, fetching
+        only what is new and evicting by timestamp.
+        
+        Args:
+            start_time: Optional start time for data collection
+            end_time: Optional end time for data collection
+            
+        Returns:
+            Tuple of ((timestamp, market state) list in time order, user
+            adjustments DataFrame)
+        """
         try:
-            # Get market snapshots
-            snapshots = self._get_market_snapshots(start_time, end_time)
+            # Stream market snapshots into training format
+            records = self._process_snapshot_chunks(
+                self._get_market_snapshots(start_time, end_time)
+            )
             
             # Get user adjustments
             adjustments = self._get_user_adjustments(start_time, end_time)
             
-            # Process into training format
-            market_states = self._process_snapshots(snapshots)
-            user_adj_dict = self._process_adjustments(adjustments)
+            return records, adjustments
+            
+        except Exception as e:
+            logger.error(f"Error collecting training data: {e}")
+            raise
+            
+    def get_new_training_records(
+        self,
+        start_time: Optional[datetime] = None,
+        after: Optional[RowCursor] = None
+    ) -> Tuple[List[Tuple[pd.Timestamp, Dict[str, Any]]], pd.DataFrame, RowCursor]:
+        """Get timestamped market states and user adjustments stored since a cursor.
+        
+        Rows are selected by insert order rather than by timestamp, so rows
+        written late with an older timestamp are still returned once.
+        
+        Args:
+            start_time: Optional start time; older rows are skipped
+            after: Cursor returned by the previous call, or None for all rows
+            
+        Returns:
+            Tuple of ((timestamp, market state) list in time order, user
+            adjustments DataFrame, cursor to pass to the next call)
+        """
+        try:
+            cursor = self._current_cursor()
+            after = after or RowCursor(0, 0)
             
-            return market_states, user_adj_dict
+            records = self._process_snapshot_chunks(
+                self._get_market_snapshots(
+                    start_time, None,
+                    id_range=(after.snapshot_id, cursor.snapshot_id))
+            )
+            adjustments = self._get_user_adjustments(
+                start_time, None,
+                id_range=(after.adjustment_id, cursor.adjustment_id))
+            
+            return records, adjustments, cursor
             
         except Exception as e:
             logger.error(f"Error collecting training data: {e}")
             raise
             
+    def _current_cursor(self) -> RowCursor:
+        """Get the highest snapshot and adjustment row ids stored so far."""
+        row = self.db_manager._get_connection().execute("""
+        SELECT
+            (SELECT COALESCE(MAX(id), 0) FROM market_snapshots),
+            (SELECT COALESCE(MAX(id), 0) FROM user_adjustments)
+        """).fetchone()
+        return RowCursor(*row)
+        
     def _get_market_snapshots(
         self,
         start_time: Optional[datetime],
-        end_time: Optional[datetime]
-    ) -> pd.DataFrame:
-        """Get market snapshots from database.
+        end_time: Optional[datetime],
+        id_range: Optional[Tuple[int, int]] = None
+    ) -> Iterator[pd.DataFrame]:
+        """Get market snapshots from database in timestamp order.
         
         Args:
             start_time: Optional start time
             end_time: Optional end time
+            id_range: Optional (exclusive, inclusive) row id bounds
             
         Returns:
-            DataFrame of market snapshots
+            Iterator of market snapshot DataFrames of at most chunk_size rows
         """
+        # Only the columns used for training, to limit per-cell conversion
         query = """
-        SELECT * FROM market_snapshots
+        SELECT s.timestamp, i.code AS instrument_id, s.bid_price, s.ask_price
+        FROM market_snapshots s
+        JOIN instruments i ON i.id = s.instrument_id
         WHERE 1=1
         """
         params = []
         
         if start_time:
-            query += " AND timestamp >= ?"
+            query += " AND s.timestamp >= ?"
             params.append(start_time)
         if end_time:
-            query += " AND timestamp <= ?"
+            query += " AND s.timestamp <= ?"
             params.append(end_time)
+        if id_range:
+            query += " AND s.id > ? AND s.id <= ?"
+            params.extend(id_range)
             
-        query += " ORDER BY timestamp ASC"
+        query += " ORDER BY s.timestamp ASC"
         
         return pd.read_sql_query(
             query,
             self.db_manager._get_connection(),
             params=params,
-            parse_dates=['timestamp']
+            parse_dates=['timestamp'],
+            chunksize=self.chunk_size
         )
         
     def _get_user_adjustments(
         self,
         start_time: Optional[datetime],
-        end_time: Optional[datetime]
+        end_time: Optional[datetime],
+        id_range: Optional[Tuple[int, int]] = None
     ) -> pd.DataFrame:
         """Get user adjustments from database.
         
         Args:
             start_time: Optional start time
             end_time: Optional end time
+            id_range: Optional (exclusive, inclusive) row id bounds
             
         Returns:
             DataFrame of user adjustments
         """
         query = """
-        SELECT * FROM user_adjustments
+        SELECT a.timestamp, i.code AS instrument_id, a.old_mid, a.new_mid
+        FROM user_adjustments a
+        JOIN instruments i ON i.id = a.instrument_id
         WHERE 1=1
         """
         params = []
         
         if start_time:
-            query += " AND timestamp >= ?"
+            query += " AND a.timestamp >= ?"
             params.append(start_time)
         if end_time:
-            query += " AND timestamp <= ?"
+            query += " AND a.timestamp <= ?"
             params.append(end_time)
+        if id_range:
+            query += " AND a.id > ? AND a.id <= ?"
+            params.extend(id_range)
             
-        query += " ORDER BY timestamp ASC"
+        query += " ORDER BY a.timestamp ASC"
         
         return pd.read_sql_query(
             query,
@@ -124,37 +214,92 @@ class DataCollector:
             parse_dates=['timestamp']
         )
         
+    def _process_snapshot_chunks(
+        self,
+        chunks: Iterator[pd.DataFrame]
+    ) -> List[Tuple[pd.Timestamp, Dict[str, Any]]]:
+        """Process timestamp-ordered snapshot chunks into training format.
+        
+        Rows sharing the last timestamp of a chunk may continue in the next
+        one, so they are carried over and only processed once complete.
+        
+        Args:
+            chunks: Iterator of snapshot DataFrames ordered by timestamp
+            
+        Returns:
+            List of (timestamp, market state dictionary) tuples
+        """
+        market_states = []
+        carry = None
+        
+        for chunk in chunks:
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+            if chunk.empty:
+                continue
+                
+            last = chunk['timestamp'].iloc[-1]
+            is_last = (chunk['timestamp'] == last).to_numpy()
+            carry = chunk[is_last]
+            market_states.extend(
+                self._process_snapshots(chunk[~is_last], with_timestamps=True))
+            
+        if carry is not None:
+            market_states.extend(self._process_snapshots(carry, with_timestamps=True))
+            
+        return market_states
+        
     def _process_snapshots(
         self,
-        snapshots: pd.DataFrame
-    ) -> List[Dict[str, Any]]:
+        snapshots: pd.DataFrame,
+        with_timestamps: bool = False
+    ) -> List[Any]:
         """Process snapshots into training format.
         
         Args:
             snapshots: DataFrame of market snapshots
+            with_timestamps: Pair each state with its snapshot timestamp
             
         Returns:
-            List of market state dictionaries
+            List of market state dictionaries, or of (timestamp, state)
+            tuples if with_timestamps is set
         """
-        # Group by timestamp
-        grouped = snapshots.groupby('timestamp')
+        if snapshots.empty:
+            return []
+            
+        # Sort once so each (timestamp, instrument) group is a contiguous run
+        ordered = snapshots.sort_values(
+            ['timestamp', 'instrument_id'], kind='stable'
+        )
+        timestamps = ordered['timestamp'].to_numpy()
+        instruments = ordered['instrument_id'].to_numpy()
+        bids = ordered['bid_price'].to_numpy()
+        asks = ordered['ask_price'].to_numpy()
+        
+        new_timestamp = np.empty(len(ordered), dtype=bool)
+        new_timestamp[0] = True
+        new_timestamp[1:] = timestamps[1:] != timestamps[:-1]
+        new_group = new_timestamp.copy()
+        new_group[1:] |= instruments[1:] != instruments[:-1]
+        
+        starts = np.flatnonzero(new_group)
+        ends = np.append(starts[1:], len(ordered))
         
         market_states = []
-        for timestamp, group in grouped:
-            state = {}
-            
-            # Group by instrument
-            for instrument, inst_data in group.groupby('instrument_id'):
-                state[instrument] = {
-                    'bid': pd.Series(inst_data['bid_price'].values),
-                    'ask': pd.Series(inst_data['ask_price'].values)
-                }
-                
-            market_states.append(state)
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            if new_timestamp[start]:
+                state = {}
+                market_states.append(
+                    (pd.Timestamp(timestamps[start]), state) if with_timestamps else state
+                )
+            state[instruments[start]] = {
+                'bid': bids[start:end],
+                'ask': asks[start:end]
+            }
             
         return market_states
         
-    def _process_adjustments(
+    def process_adjustments(
         self,
         adjustments: pd.DataFrame
     ) -> Dict[str, List[float]]:
@@ -166,15 +311,14 @@ class DataCollector:
         Returns:
             Dictionary of adjustment lists by instrument
         """
-        adj_dict = {}
-        
-        for _, row in adjustments.iterrows():
-            instrument = row['instrument_id']
-            if instrument not in adj_dict:
-                adj_dict[instrument] = []
-            
-            # Calculate adjustment amount
-            adjustment = row['new_mid'] - row['old_mid']
-            adj_dict[instrument].append(adjustment)
+        adjustment = (
+            adjustments['new_mid'].to_numpy() - adjustments['old_mid'].to_numpy()
+        )
+        grouped = pd.Series(adjustment).groupby(
+            adjustments['instrument_id'].to_numpy(), sort=False
+        )
+        adj_dict = {
+            instrument: values.tolist() for instrument, values in grouped
+        }
             
         return adj_dict 
\ No newline at end of file
@@ -5,10 +5,48 @@ import pandas as pd
 import numpy as np
 import time
 import os
+import threading
+import yaml
+
+from ...utils.jit import njit
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_AVAILABLE = True
+except ImportError:  # Fall back to mtime polling
+    FileSystemEventHandler = object
+    WATCHDOG_AVAILABLE = False
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@njit(cache=True)
+def _all_on_tick(values: np.ndarray, increment: float, tolerance: float) -> bool:
+    """Check that every value lies on a multiple of increment."""
+    for i in range(values.size):
+        remainder = values[i] % increment
+        if not (remainder <= tolerance or increment - remainder <= tolerance):
+            return False
+    return True
+
+
+class _FileChangeHandler(FileSystemEventHandler):
+    """Sets an event whenever the watched file is written or replaced."""
+    
+    def __init__(self, path: Path, changed: threading.Event):
+        super().__init__()
+        self.path = path.resolve()
+        self.changed = changed
+        
+    def on_any_event(self, event) -> None:
+        for event_path in (event.src_path, getattr(event, 'dest_path', None)):
+            if event_path and Path(os.fsdecode(event_path)).resolve() == self.path:
+                self.changed.set()
+                return
+
+
 class ExcelReader:
     def __init__(self, config_path: str):
         """Initialize Excel reader with configuration.
@@ -21,6 +59,28 @@ class ExcelReader:
         self.last_modified: Optional[float] = None
         self.watch_callback: Optional[Callable] = None
         self.watching: bool = False
+        self._file_changed = threading.Event()
+        
+    def _load_config(self, config_path: str) -> Dict[str, Any]:
+        """Load reader configuration from a YAML file.
+        
+        Args:
+            config_path: Path to the configuration YAML file
+            
+        Returns:
+            Configuration dictionary
+        """
+        with open(config_path, 'r') as f:
+            return yaml.safe_load(f) or {}
+            
+    def set_file_path(self, file_path: str) -> None:
+        """Set the Excel file to read and watch.
+        
+        Args:
+            file_path: Path to the Excel workbook
+        """
+        self.file_path = Path(file_path)
+        self.last_modified = None
         
     def set_watch_callback(self, callback: Callable[[Dict[str, Any]], None]) -> None:
         """Set callback function to be called when file changes are detected.
@@ -33,8 +93,13 @@ class ExcelReader:
     def start_watching(self, interval: float = 5.0) -> None:
         """Start watching file for changes.
         
+        Uses filesystem notifications when watchdog is installed, so changes
+        are picked up as soon as they happen; otherwise polls the file's
+        modification time.
+        
         Args:
-            interval: Time between checks in seconds
+            interval: Time between checks in seconds (fallback poll period
+                when notifications are available)
         """
         if not self.file_path:
             raise ValueError("File path not set. Call set_file_path() first.")
@@ -43,30 +108,62 @@ class ExcelReader:
             raise ValueError("Watch callback not set. Call set_watch_callback() first.")
             
         self.watching = True
+        self._file_changed.clear()
+        observer = self._start_observer()
         logger.info(f"Started watching {self.file_path}")
         
-        while self.watching:
-            try:
-                current_mtime = os.path.getmtime(self.file_path)
-                
-                if self.last_modified is None or current_mtime > self.last_modified:
-                    logger.debug(f"File change detected at {current_mtime}")
-                    data = self.read_market_data()
+        try:
+            while self.watching:
+                try:
+                    current_mtime = os.path.getmtime(self.file_path)
                     
-                    if self.validate_data(data):
-                        self.last_modified = current_mtime
-                        self.watch_callback(data)
+                    if self.last_modified is None or current_mtime > self.last_modified:
+                        logger.debug(f"File change detected at {current_mtime}")
+                        data = self.read_market_data()
                         
-                time.sleep(interval)
+                        if self.validate_data(data):
+                            self.last_modified = current_mtime
+                            self.watch_callback(data)
+                            
+                except Exception as e:
+                    logger.error(f"Error while watching file: {e}")
+                    # Continue watching despite errors
+                    
+                self._file_changed.wait(interval)
+                self._file_changed.clear()
                 
-            except Exception as e:
-                logger.error(f"Error while watching file: {e}")
-                # Continue watching despite errors
-                time.sleep(interval)
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+                
+    def _start_observer(self) -> Optional["Observer"]:
+        """Start a filesystem observer on the watched file's directory.
+        
+        Returns:
+            Running observer, or None if watchdog is not available
+        """
+        if not WATCHDOG_AVAILABLE:
+            return None
+            
+        try:
+            path = Path(self.file_path)
+            observer = Observer()
+            observer.schedule(
+                _FileChangeHandler(path, self._file_changed),
+                str(path.resolve().parent),
+                recursive=False
+            )
+            observer.start()
+            return observer
+        except Exception as e:
+            logger.warning(f"File notifications unavailable, polling instead: {e}")
+            return None
                 
     def stop_watching(self) -> None:
         """Stop watching file for changes."""
         self.watching = False
+        self._file_changed.set()
         logger.info("Stopped watching file")
 
     def validate_data(self, data: Dict[str, Any]) -> bool:
@@ -112,10 +209,11 @@ class ExcelReader:
         if not {'bid', 'ask'}.issubset(section_data.keys()):
             raise ValueError(f"Missing bid or ask data in {section_name}")
             
-        bid, ask = section_data['bid'], section_data['ask']
+        bid = np.asarray(section_data['bid'], dtype=np.float64)
+        ask = np.asarray(section_data['ask'], dtype=np.float64)
         
         # Check for missing values
-        if bid.isna().any() or ask.isna().any():
+        if np.isnan(bid).any() or np.isnan(ask).any():
             raise ValueError(f"Missing values in {section_name}")
             
         # Validate bid-ask relationship
@@ -130,17 +228,15 @@ class ExcelReader:
         if data.isna().any():
             raise ValueError(f"Missing values in {section_name} midpoints")
             
-    def _validate_price_increments(self, section_name: str, bid: pd.Series, ask: pd.Series):
+    def _validate_price_increments(self, section_name: str, bid: np.ndarray, ask: np.ndarray):
         """Validates price increments meet requirements."""
         # Price increments: 0.25 for AH,CA,PB,ZS; 0.5 for NI and TIN
         increment = 0.5 if section_name in ['NI', 'TIN'] else 0.25
         
         # Check bid increments
-        bid_mod = bid % increment
-        if not np.allclose(bid_mod, 0, atol=1e-10) and not np.allclose(bid_mod, increment, atol=1e-10):
+        if not _all_on_tick(np.asarray(bid, dtype=np.float64), increment, 1e-10):
             raise ValueError(f"Invalid bid price increments in {section_name}")
             
         # Check ask increments
-        ask_mod = ask % increment
-        if not np.allclose(ask_mod, 0, atol=1e-10) and not np.allclose(ask_mod, increment, atol=1e-10):
+        if not _all_on_tick(np.asarray(ask, dtype=np.float64), increment, 1e-10):
             raise ValueError(f"Invalid ask price increments in {section_name}") 
\ No newline at end of file
@@ -1,7 +1,11 @@
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 import sqlite3
+import threading
 from datetime import datetime, timedelta
+from itertools import repeat
+import numpy as np
+import orjson
 import pandas as pd
 from pathlib import Path
 
@@ -9,6 +13,50 @@ from .schema import initialize_database
 
 logger = logging.getLogger(__name__)
 
+
+def _adapt_datetime(value: datetime) -> str:
+    """Bind datetimes as fixed-width ISO-8601 text so they sort and compare."""
+    return value.isoformat(sep=' ', timespec='microseconds')
+
+
+sqlite3.register_adapter(datetime, _adapt_datetime)
+
+# Applied to every connection: WAL lets readers run alongside the capture
+# writer, and synchronous=NORMAL only fsyncs at checkpoints under WAL.
+_CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+)
+
+# Statement text is kept identical across calls so SQLite's statement
+# cache can reuse the prepared statements.
+_INSERT_BIDASK_SQL = """
+    INSERT INTO market_snapshots
+    (timestamp, instrument_id, level, bid_price, ask_price, mid_price, source)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+_INSERT_MID_SQL = """
+    INSERT INTO market_snapshots
+    (timestamp, instrument_id, level, mid_price, source)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+_INSERT_ADJ_AT_SQL = """
+    INSERT INTO user_adjustments
+    (timestamp, instrument_id, old_mid, new_mid, reason)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+_INSERT_PREDICTION_SQL = """
+    INSERT INTO model_predictions
+    (timestamp, model_version, prediction, latency_ms, queue_size, error)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
 class DatabaseManager:
     """Handles database operations and connection management."""
     
@@ -20,7 +68,13 @@ class DatabaseManager:
         """
         self.db_path = Path(db_path)
         self._ensure_db_directory()
-        self.connection: Optional[sqlite3.Connection] = None
+        # sqlite3 connections must not be shared across threads, so each
+        # thread lazily opens and then reuses its own
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        # Instrument code -> integer key, filled lazily as sections are stored
+        self._instrument_keys: Dict[str, int] = {}
         self._setup_database()
         
     def _ensure_db_directory(self) -> None:
@@ -29,20 +83,35 @@ class DatabaseManager:
         
     def _setup_database(self) -> None:
         """Initialize database and create tables if needed."""
-        initialize_database(str(self.db_path))
+        initialize_database(str(self.db_path), self._get_connection())
+        
+    @property
+    def connection(self) -> Optional[sqlite3.Connection]:
+        """Connection owned by the calling thread, if one is open."""
+        return getattr(self._local, 'connection', None)
         
     def _get_connection(self) -> sqlite3.Connection:
-        """Get database connection, creating if needed."""
-        if self.connection is None:
-            self.connection = sqlite3.connect(self.db_path)
-            self.connection.row_factory = sqlite3.Row
-        return self.connection
+        """Get the calling thread's database connection, creating if needed."""
+        conn = self.connection
+        if conn is None:
+            # check_same_thread=False only so close() can close every thread's
+            # connection; each connection is otherwise used by its own thread
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            for pragma in _CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            self._local.connection = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
         
     def close(self) -> None:
-        """Close database connection."""
-        if self.connection:
-            self.connection.close()
-            self.connection = None
+        """Close all database connections."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
             
     def store_snapshot(self, data: Dict[str, Any]) -> None:
         """Store market data snapshot.
@@ -50,61 +119,102 @@ class DatabaseManager:
         Args:
             data: Market data dictionary
         """
+        self.store_snapshots([(datetime.now(), data)])
+        
+    def store_snapshots(self, snapshots: List[Tuple[datetime, Dict[str, Any]]]) -> None:
+        """Store a batch of market data snapshots in a single transaction.
+        
+        Args:
+            snapshots: List of (capture timestamp, market data dictionary) pairs
+        """
+        if not snapshots:
+            return
+            
         try:
             conn = self._get_connection()
-            timestamp = datetime.now()
             
             with conn:  # Automatic transaction
-                for section_name, section_data in data.items():
-                    if isinstance(section_data, dict):  # bid/ask section
-                        self._store_bid_ask_data(
-                            conn, timestamp, section_name, section_data)
-                    else:  # midpoint section
-                        self._store_midpoint_data(
-                            conn, timestamp, section_name, section_data)
+                for timestamp, data in snapshots:
+                    # Convert once rather than once per inserted row
+                    timestamp = _adapt_datetime(timestamp)
+                    for section_name, section_data in data.items():
+                        instrument_key = self._instrument_key(conn, section_name)
+                        if isinstance(section_data, dict):  # bid/ask section
+                            self._store_bid_ask_data(
+                                conn, timestamp, instrument_key, section_data)
+                        else:  # midpoint section
+                            self._store_midpoint_data(
+                                conn, timestamp, instrument_key, section_data)
                             
-            logger.debug(f"Stored snapshot at {timestamp}")
+            logger.debug(f"Stored {len(snapshots)} snapshot(s)")
             
         except Exception as e:
-            logger.error(f"Failed to store snapshot: {e}")
+            # Keys registered in the rolled-back transaction no longer exist
+            self._instrument_keys.clear()
+            logger.error(f"Failed to store snapshots: {e}")
             raise
             
+    def _instrument_key(self, conn: sqlite3.Connection, code: str) -> int:
+        """Resolve an instrument code to its integer key, registering it if new.
+        
+        Args:
+            conn: Database connection
+            code: Instrument code (section name)
+            
+        Returns:
+            Integer key of the instrument
+        """
+        key = self._instrument_keys.get(code)
+        if key is None:
+            conn.execute(
+                "INSERT OR IGNORE INTO instruments (code, name) VALUES (?, ?)",
+                (code, code)
+            )
+            key = conn.execute(
+                "SELECT id FROM instruments WHERE code = ?", (code,)
+            ).fetchone()[0]
+            self._instrument_keys[code] = key
+        return key
+            
     def _store_bid_ask_data(
         self, 
         conn: sqlite3.Connection, 
-        timestamp: datetime,
-        instrument_id: str,
+        timestamp: str,
+        instrument_id: int,
         data: Dict[str, pd.Series]
     ) -> None:
         """Store bid/ask data for an instrument."""
-        for bid, ask in zip(data['bid'], data['ask']):
-            mid = (bid + ask) / 2
-            conn.execute(
-                """
-                INSERT INTO market_snapshots 
-                (timestamp, instrument_id, bid_price, ask_price, mid_price, source)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (timestamp, instrument_id, bid, ask, mid, 'excel')
-            )
+        bid = np.asarray(data['bid'], dtype=np.float64)
+        ask = np.asarray(data['ask'], dtype=np.float64)
+        mid = (bid + ask) * 0.5
+        rows = zip(
+            repeat(timestamp),
+            repeat(instrument_id),
+            range(len(bid)),
+            bid.tolist(),
+            ask.tolist(),
+            mid.tolist(),
+            repeat('excel')
+        )
+        conn.executemany(_INSERT_BIDASK_SQL, rows)
             
     def _store_midpoint_data(
         self,
         conn: sqlite3.Connection,
-        timestamp: datetime,
-        instrument_id: str,
+        timestamp: str,
+        instrument_id: int,
         data: pd.Series
     ) -> None:
         """Store midpoint data for an instrument."""
-        for mid in data:
-            conn.execute(
-                """
-                INSERT INTO market_snapshots 
-                (timestamp, instrument_id, mid_price, source)
-                VALUES (?, ?, ?, ?)
-                """,
-                (timestamp, instrument_id, mid, 'excel')
-            )
+        mid = np.asarray(data, dtype=np.float64)
+        rows = zip(
+            repeat(timestamp),
+            repeat(instrument_id),
+            range(len(mid)),
+            mid.tolist(),
+            repeat('excel')
+        )
+        conn.executemany(_INSERT_MID_SQL, rows)
             
     def get_recent_data(
         self,
@@ -125,9 +235,12 @@ class DatabaseManager:
             since = datetime.now() - timedelta(minutes=minutes)
             
             query = """
-            SELECT * FROM market_snapshots
-            WHERE instrument_id = ? AND timestamp >= ?
-            ORDER BY timestamp DESC
+            SELECT s.id, s.timestamp, i.code AS instrument_id,
+                   s.bid_price, s.ask_price, s.mid_price, s.source
+            FROM market_snapshots s
+            JOIN instruments i ON i.id = s.instrument_id
+            WHERE i.code = ? AND s.timestamp >= ?
+            ORDER BY s.timestamp DESC
             """
             
             df = pd.read_sql_query(
@@ -162,16 +275,89 @@ class DatabaseManager:
             conn = self._get_connection()
             with conn:
                 conn.execute(
-                    """
-                    INSERT INTO user_adjustments
-                    (timestamp, instrument_id, old_mid, new_mid, reason)
-                    VALUES (CURRENT_TIMESTAMP, ?, ?, ?, ?)
-                    """,
-                    (instrument_id, old_mid, new_mid, reason)
+                    _INSERT_ADJ_AT_SQL,
+                    (
+                        datetime.now(),
+                        self._instrument_key(conn, instrument_id),
+                        old_mid,
+                        new_mid,
+                        reason
+                    )
                 )
                 
             logger.info(f"Stored user adjustment for {instrument_id}")
             
         except Exception as e:
+            self._instrument_keys.clear()
             logger.error(f"Failed to store user adjustment: {e}")
-            raise 
\ No newline at end of file
+            raise
+            
+    def store_user_adjustments_batch(self, rows: List[Dict[str, Any]]) -> None:
+        """Store a batch of user price adjustments in a single transaction.
+        
+        Args:
+            rows: Adjustment dictionaries with 'instrument_id', 'old_mid' and
+                'new_mid' keys, and optional 'timestamp' and 'reason' keys
+        """
+        if not rows:
+            return
+            
+        try:
+            now = datetime.now()
+            conn = self._get_connection()
+            with conn:
+                conn.executemany(
+                    _INSERT_ADJ_AT_SQL,
+                    [
+                        (
+                            row.get('timestamp') or now,
+                            self._instrument_key(conn, row['instrument_id']),
+                            row['old_mid'],
+                            row['new_mid'],
+                            row.get('reason')
+                        )
+                        for row in rows
+                    ]
+                )
+                
+            logger.info(f"Stored {len(rows)} user adjustment(s)")
+            
+        except Exception as e:
+            self._instrument_keys.clear()
+            logger.error(f"Failed to store user adjustments: {e}")
+            raise
+            
+    def store_predictions_batch(self, rows: List[Dict[str, Any]]) -> None:
+        """Store a batch of served model predictions in a single transaction.
+        
+        Args:
+            rows: Prediction dictionaries with 'timestamp' and 'prediction'
+                keys, and optional 'model_version', 'latency_ms',
+                'queue_size' and 'error' keys
+        """
+        if not rows:
+            return
+            
+        try:
+            conn = self._get_connection()
+            with conn:
+                conn.executemany(
+                    _INSERT_PREDICTION_SQL,
+                    [
+                        (
+                            row['timestamp'],
+                            row.get('model_version'),
+                            orjson.dumps(row['prediction']).decode(),
+                            row.get('latency_ms'),
+                            row.get('queue_size'),
+                            int(row.get('error', False))
+                        )
+                        for row in rows
+                    ]
+                )
+                
+            logger.debug(f"Stored {len(rows)} prediction(s)")
+            
+        except Exception as e:
+            logger.error(f"Failed to store predictions: {e}")
+            raise
@@ -1,42 +1,71 @@
-from typing import List
+from typing import List, Optional
 import sqlite3
 import logging
 
 logger = logging.getLogger(__name__)
 
-SCHEMA_STATEMENTS: List[str] = [
-    """
-    CREATE TABLE IF NOT EXISTS market_snapshots (
+# Bumped whenever the layout changes; stored in PRAGMA user_version
+SCHEMA_VERSION = 2
+
+# Table definitions are templates so migrations can build the current
+# layout under a temporary name before swapping it in. A capture stores
+# one snapshot row per price level, numbered from the top of the book.
+_SNAPSHOTS_TABLE = """
+    CREATE TABLE IF NOT EXISTS {name} (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         timestamp DATETIME NOT NULL,
-        instrument_id TEXT NOT NULL,
+        instrument_id INTEGER NOT NULL REFERENCES instruments(id),
+        level INTEGER NOT NULL DEFAULT 0,
         bid_price REAL,
         ask_price REAL,
         mid_price REAL,
         source TEXT NOT NULL,
-        UNIQUE(timestamp, instrument_id)
+        UNIQUE(timestamp, instrument_id, level)
     )
-    """,
-    
-    """
-    CREATE TABLE IF NOT EXISTS instruments (
-        id TEXT PRIMARY KEY,
+"""
+
+# Snapshots and adjustments reference instruments by a small integer key;
+# the code is the section name used everywhere else
+_INSTRUMENTS_TABLE = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY,
+        code TEXT NOT NULL UNIQUE,
         name TEXT NOT NULL,
-        price_increment REAL NOT NULL,
+        price_increment REAL,
         active BOOLEAN DEFAULT TRUE,
         created_at DATETIME DEFAULT CURRENT_TIMESTAMP
     )
-    """,
-    
-    """
-    CREATE TABLE IF NOT EXISTS user_adjustments (
+"""
+
+_ADJUSTMENTS_TABLE = """
+    CREATE TABLE IF NOT EXISTS {name} (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         timestamp DATETIME NOT NULL,
-        instrument_id TEXT NOT NULL,
+        instrument_id INTEGER NOT NULL REFERENCES instruments(id),
         old_mid REAL,
         new_mid REAL,
-        reason TEXT,
-        FOREIGN KEY(instrument_id) REFERENCES instruments(id)
+        reason TEXT
+    )
+"""
+
+SCHEMA_STATEMENTS: List[str] = [
+    _SNAPSHOTS_TABLE.format(name='market_snapshots'),
+    _INSTRUMENTS_TABLE.format(name='instruments'),
+    _ADJUSTMENTS_TABLE.format(name='user_adjustments'),
+    
+    # Served predictions; accuracy and spread compliance are filled in
+    # once the outcome is known
+    """
+    CREATE TABLE IF NOT EXISTS model_predictions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME NOT NULL,
+        model_version TEXT,
+        prediction TEXT NOT NULL,
+        latency_ms REAL,
+        queue_size INTEGER,
+        error INTEGER NOT NULL DEFAULT 0,
+        accuracy REAL,
+        spread_compliant INTEGER
     )
     """,
     
@@ -46,23 +75,159 @@ SCHEMA_STATEMENTS: List[str] = [
     """,
     
     """
-    CREATE INDEX IF NOT EXISTS idx_snapshots_instrument 
-    ON market_snapshots(instrument_id)
+    CREATE INDEX IF NOT EXISTS idx_snapshots_instr_time
+    ON market_snapshots(instrument_id, timestamp)
+    """,
+    
+    # Superseded by the (instrument_id, timestamp) index above
+    """
+    DROP INDEX IF EXISTS idx_snapshots_instrument
+    """,
+    
+    """
+    CREATE INDEX IF NOT EXISTS idx_adj_instr_time
+    ON user_adjustments(instrument_id, timestamp)
+    """,
+    
+    """
+    CREATE INDEX IF NOT EXISTS idx_predictions_time
+    ON model_predictions(timestamp)
     """
 ]
 
-def initialize_database(db_path: str) -> None:
+def _migration_statements(conn: sqlite3.Connection) -> List[str]:
+    """Statements converting an older database to the current layout.
+    
+    Databases created before the schema was versioned keyed instruments by
+    their code, and snapshots and adjustments stored that code directly.
+    Each table still in that layout is rebuilt under a temporary name,
+    copied across with codes resolved to integer keys, and swapped in.
+    
+    Version 1 snapshots had no level column, so each capture could hold
+    one row per instrument; that table is rebuilt with levels numbered in
+    insertion order.
+    
+    Args:
+        conn: Connection to the database being migrated
+        
+    Returns:
+        Statements to run in a single transaction; empty if nothing to do
+    """
+    def columns(table: str) -> dict:
+        return {
+            row[1]: row[2].upper()
+            for row in conn.execute(f"PRAGMA table_info({table})")
+        }
+        
+    statements = []
+    instruments = columns('instruments')
+    if instruments and 'code' not in instruments:
+        statements += [
+            _INSTRUMENTS_TABLE.format(name='instruments_new'),
+            """
+            INSERT INTO instruments_new (code, name, price_increment, active, created_at)
+            SELECT id, name, price_increment, active, created_at FROM instruments
+            """,
+            "DROP TABLE instruments",
+            "ALTER TABLE instruments_new RENAME TO instruments",
+        ]
+        
+    for table, template, value_columns in (
+        ('market_snapshots', _SNAPSHOTS_TABLE,
+         'timestamp, bid_price, ask_price, mid_price, source'),
+        ('user_adjustments', _ADJUSTMENTS_TABLE,
+         'timestamp, old_mid, new_mid, reason'),
+    ):
+        if columns(table).get('instrument_id') != 'TEXT':
+            continue
+        selected = ', '.join(f"t.{column}" for column in value_columns.split(', '))
+        statements += [
+            # Register codes that were never added to instruments
+            _INSTRUMENTS_TABLE.format(name='instruments'),
+            f"""
+            INSERT OR IGNORE INTO instruments (code, name)
+            SELECT DISTINCT instrument_id, instrument_id FROM {table}
+            """,
+            template.format(name=f'{table}_new'),
+            f"""
+            INSERT INTO {table}_new (id, instrument_id, {value_columns})
+            SELECT t.id, i.id, {selected}
+            FROM {table} t JOIN instruments i ON i.code = t.instrument_id
+            """,
+            f"DROP TABLE {table}",
+            f"ALTER TABLE {table}_new RENAME TO {table}",
+        ]
+        
+    snapshots = columns('market_snapshots')
+    if snapshots and snapshots.get('instrument_id') != 'TEXT' and 'level' not in snapshots:
+        statements += [
+            _SNAPSHOTS_TABLE.format(name='market_snapshots_new'),
+            """
+            INSERT INTO market_snapshots_new
+            (id, timestamp, instrument_id, level, bid_price, ask_price, mid_price, source)
+            SELECT id, timestamp, instrument_id,
+                   ROW_NUMBER() OVER (PARTITION BY timestamp, instrument_id ORDER BY id) - 1,
+                   bid_price, ask_price, mid_price, source
+            FROM market_snapshots
+            """,
+            "DROP TABLE market_snapshots",
+            "ALTER TABLE market_snapshots_new RENAME TO market_snapshots",
+        ]
+        
+    return statements
+
+def _apply_schema(conn: sqlite3.Connection) -> None:
+    """Migrate if needed, then create any missing tables and indexes.
+    
+    Args:
+        conn: Open database connection
+        
+    Raises:
+        RuntimeError: If the database was written by a newer schema version
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version > SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema version {version} is newer than the supported "
+            f"version {SCHEMA_VERSION}; upgrade the application"
+        )
+        
+    statements = list(SCHEMA_STATEMENTS)
+    migration = _migration_statements(conn) if version < SCHEMA_VERSION else []
+    if migration:
+        logger.info(f"Migrating database schema from version {version} to {SCHEMA_VERSION}")
+        statements = migration + statements
+    statements.append(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    
+    # One transaction, so a failed migration leaves the database untouched
+    try:
+        conn.executescript("BEGIN;\n" + ";\n".join(statements) + ";\nCOMMIT;")
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+
+def initialize_database(db_path: str, conn: Optional[sqlite3.Connection] = None) -> None:
     """Initialize database with schema.
     
+    Databases from before the schema was versioned are migrated in place;
+    databases written by a newer version are rejected.
+    
     Args:
         db_path: Path to SQLite database file
+        conn: Optional open connection to apply the schema on; a temporary
+            connection to db_path is used if omitted
     """
     try:
-        with sqlite3.connect(db_path) as conn:
-            for statement in SCHEMA_STATEMENTS:
-                conn.execute(statement)
-            conn.commit()
+        if conn is not None:
+            _apply_schema(conn)
+        else:
+            own_conn = sqlite3.connect(db_path)
+            try:
+                _apply_schema(own_conn)
+            finally:
+                own_conn.close()
         logger.info(f"Database initialized at {db_path}")
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
-        raise 
\ No newline at end of file
+        raise
\ No newline at end of file
@@ -1,12 +1,36 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, BinaryIO, List, Tuple, Union
 import numpy as np
 import torch
 import torch.nn as nn
 from abc import ABC, abstractmethod
 import logging
+import threading
+
+from ...utils.jit import njit, NUMBA_AVAILABLE
 
 logger = logging.getLogger(__name__)
 
+
+@njit(cache=True, fastmath=True)
+def _segment_stats_kernel(values: np.ndarray, offsets: np.ndarray):
+    """Welford mean and population std of each values[offsets[i]:offsets[i + 1]]."""
+    n = offsets.size - 1
+    means = np.empty(n)
+    stds = np.empty(n)
+    for i in range(n):
+        mean = 0.0
+        m2 = 0.0
+        count = 0
+        for j in range(offsets[i], offsets[i + 1]):
+            count += 1
+            delta = values[j] - mean
+            mean += delta / count
+            m2 += delta * (values[j] - mean)
+        means[i] = mean
+        stds[i] = np.sqrt(m2 / count)
+    return means, stds
+
+
 class BaseAgent(ABC, nn.Module):
     """Base class for all ML agents."""
     
@@ -20,6 +44,15 @@ class BaseAgent(ABC, nn.Module):
         self.config = config
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         
+        # Optional fixed section order, so features and outputs line up with
+        # the order the model was trained on regardless of dict ordering
+        self._instrument_order = tuple(config.get('model', {}).get('instruments', ()))
+        
+        # Pinned staging buffer for host-to-device feature copies (CUDA only)
+        self._host_buffer = None
+        self._copy_done = None
+        self._staging_lock = threading.Lock()
+        
     @abstractmethod
     def forward(self, state: torch.Tensor) -> torch.Tensor:
         """Forward pass of the model.
@@ -44,6 +77,38 @@ class BaseAgent(ABC, nn.Module):
         """
         pass
         
+    def get_action_batch(self, states: List[Dict[str, Any]]) -> Dict[str, torch.Tensor]:
+        """Get price adjustments for a batch of market states.
+        
+        The default implementation calls get_action per state; agents should
+        override it with a single batched forward pass.
+        
+        Args:
+            states: Market state dictionaries sharing the same sections
+            
+        Returns:
+            Dictionary of adjustment tensors of shape (N,) for each instrument
+        """
+        actions = [self.get_action(state) for state in states]
+        return {
+            section: torch.tensor([action[section] for action in actions])
+            for section in actions[0]
+        } if actions else {}
+        
+    def warm_up(self, batch_sizes: Tuple[int, ...] = (1,)) -> None:
+        """Run dummy forward passes so one-off setup happens up front.
+        
+        With a compiled network the first call at each batch size pays the
+        compilation cost; warming up keeps that off the serving path.
+        
+        Args:
+            batch_sizes: Input batch sizes to run
+        """
+        input_size = self.config['model']['input_size']
+        with torch.inference_mode():
+            for batch_size in batch_sizes:
+                self.forward(torch.zeros(batch_size, input_size, device=self.device))
+                
     def preprocess_state(self, state: Dict[str, Any]) -> torch.Tensor:
         """Convert market state dictionary to tensor.
         
@@ -53,37 +118,152 @@ class BaseAgent(ABC, nn.Module):
         Returns:
             Tensor representation of state
         """
-        # Extract features from state
-        features = []
-        
-        for section_name, section_data in state.items():
-            if isinstance(section_data, dict):  # bid/ask section
-                bid = section_data['bid'].values
-                ask = section_data['ask'].values
-                spread = ask - bid
-                mid = (ask + bid) / 2
-                features.extend([
-                    np.mean(bid),
-                    np.mean(ask),
-                    np.mean(spread),
-                    np.mean(mid),
-                    np.std(bid),
-                    np.std(ask)
-                ])
-            else:  # midpoint section
-                mid = section_data.values
-                features.extend([
-                    np.mean(mid),
-                    np.std(mid)
-                ])
+        return self._to_device(self._extract_features([state])[0])
+        
+    def preprocess_states(self, states: List[Dict[str, Any]]) -> torch.Tensor:
+        """Convert a batch of market states to a single tensor.
+        
+        Args:
+            states: Market state dictionaries sharing the same sections
+            
+        Returns:
+            Tensor of shape (N, n_features)
+        """
+        return self._to_device(self._extract_features(states))
+        
+    def _extract_features(self, states: List[Dict[str, Any]]) -> np.ndarray:
+        """Compute the feature matrix for a batch of market states.
+        
+        Args:
+            states: Market state dictionaries sharing the sections of the first
+            
+        Returns:
+            float32 array of shape (N, n_features)
+        """
+        sections = self._section_order(states[0])
+        layout = [isinstance(states[0][section], dict) for section in sections]
+        if not layout:
+            return np.empty((len(states), 0), dtype=np.float32)
+            
+        # Gather every state's sections by kind, state-major
+        bids, asks, midpoints = [], [], []
+        for state in states:
+            for section, is_bid_ask in zip(sections, layout):
+                section_data = state[section]
+                if is_bid_ask:  # bid/ask section
+                    bids.append(np.asarray(section_data['bid'], dtype=np.float64))
+                    asks.append(np.asarray(section_data['ask'], dtype=np.float64))
+                else:  # midpoint section
+                    midpoints.append(np.asarray(section_data, dtype=np.float64))
+                    
+        n_states = len(states)
+        bid_ask_blocks = iter(())
+        if bids:
+            bid_mean, bid_std = self._segment_stats(bids)
+            ask_mean, ask_std = self._segment_stats(asks)
+            bid_ask_blocks = iter(np.stack([
+                bid_mean,
+                ask_mean,
+                ask_mean - bid_mean,
+                (ask_mean + bid_mean) * 0.5,
+                bid_std,
+                ask_std
+            ], axis=-1).reshape(n_states, -1, 6).transpose(1, 0, 2))
+            
+        midpoint_blocks = iter(())
+        if midpoints:
+            mid_mean, mid_std = self._segment_stats(midpoints)
+            midpoint_blocks = iter(np.stack(
+                [mid_mean, mid_std], axis=-1
+            ).reshape(n_states, -1, 2).transpose(1, 0, 2))
+            
+        return np.concatenate([
+            next(bid_ask_blocks) if is_bid_ask else next(midpoint_blocks)
+            for is_bid_ask in layout
+        ], axis=1).astype(np.float32)
+        
+    def _section_order(self, state: Dict[str, Any]) -> Tuple[str, ...]:
+        """Get the order in which state sections map to features and outputs.
+        
+        Args:
+            state: Market state dictionary
+            
+        Returns:
+            Configured instrument order, or the state's own order if unset
+        """
+        if not self._instrument_order:
+            return tuple(state)
+            
+        missing = [section for section in self._instrument_order if section not in state]
+        if missing:
+            raise ValueError(f"Market state missing sections: {missing}")
+        return self._instrument_order
+        
+    def _to_device(self, features: np.ndarray) -> torch.Tensor:
+        """Move a float32 feature array to the agent's device.
+        
+        On CUDA the features are staged through a reusable pinned host buffer
+        so the copy can be issued asynchronously. A fresh device tensor is
+        returned each call, as the trainer keeps inputs alive for backward.
+        
+        Args:
+            features: Feature vector or matrix as a float32 array
+            
+        Returns:
+            Feature tensor on the agent's device
+        """
+        if self.device.type != 'cuda':
+            return torch.from_numpy(features)
+            
+        # The staging buffer is shared, and the server calls in from
+        # several threads without holding a lock of its own
+        with self._staging_lock:
+            size = features.size
+            if self._host_buffer is None or self._host_buffer.numel() < size:
+                self._host_buffer = torch.empty(size, dtype=torch.float32, pin_memory=True)
+            elif self._copy_done is not None:
+                # The previous async copy may still be reading the staging buffer
+                self._copy_done.synchronize()
                 
-        return torch.tensor(features, dtype=torch.float32, device=self.device)
+            staging = self._host_buffer[:size].view(features.shape)
+            staging.numpy()[...] = features
+            
+            tensor = torch.empty(features.shape, dtype=torch.float32, device=self.device)
+            tensor.copy_(staging, non_blocking=True)
+            self._copy_done = torch.cuda.Event()
+            self._copy_done.record()
+        return tensor
+        
+    @staticmethod
+    def _segment_stats(segments: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Compute the mean and std of several 1-D arrays in one pass.
+        
+        Args:
+            segments: Non-empty arrays of price levels
+            
+        Returns:
+            Tuple of (means, population standard deviations), one per segment
+        """
+        counts = np.array([len(segment) for segment in segments], dtype=np.intp)
+        offsets = np.zeros(len(segments) + 1, dtype=np.intp)
+        np.cumsum(counts, out=offsets[1:])
+        values = np.concatenate(segments)
+        
+        if NUMBA_AVAILABLE:
+            return _segment_stats_kernel(values, offsets)
+            
+        # Without numba, segmented NumPy reductions beat a Python loop
+        starts = offsets[:-1]
+        means = np.add.reduceat(values, starts) / counts
+        deviations = values - np.repeat(means, counts)
+        stds = np.sqrt(np.add.reduceat(deviations * deviations, starts) / counts)
+        return means, stds
         
-    def save(self, path: str) -> None:
+    def save(self, path: Union[str, BinaryIO]) -> None:
         """Save model state.
         
         Args:
-            path: Path to save model state
+            path: Path or writable binary file object to save model state to
         """
         try:
             torch.save({
@@ -95,11 +275,11 @@ class BaseAgent(ABC, nn.Module):
             logger.error(f"Failed to save model: {e}")
             raise
             
-    def load(self, path: str) -> None:
+    def load(self, path: Union[str, BinaryIO]) -> None:
         """Load model state.
         
         Args:
-            path: Path to load model state from
+            path: Path or readable binary file object to load model state from
         """
         try:
             checkpoint = torch.load(path, map_location=self.device)
@@ -1,6 +1,6 @@
 import torch
 import torch.nn as nn
-from typing import Dict, Any
+from typing import Dict, Any, List
 import logging
 
 from .base_agent import BaseAgent
@@ -32,6 +32,16 @@ class PriceAgent(BaseAgent):
             nn.Tanh()  # Output between -1 and 1 for price adjustments
         )
         
+        # Optionally fuse the MLP with torch.compile (PyTorch 2.2+); the first
+        # forward pass pays the compilation cost, so this is opt-in
+        if config['model'].get('compile', False):
+            if hasattr(self.network, 'compile'):
+                self.network.compile(
+                    mode=config['model'].get('compile_mode', 'reduce-overhead')
+                )
+            else:
+                logger.warning("torch.compile not available, running network eagerly")
+        
         self.to(self.device)
         
     def forward(self, state: torch.Tensor) -> torch.Tensor:
@@ -56,24 +66,39 @@ class PriceAgent(BaseAgent):
         """
         try:
             # Preprocess state
+            sections = self._section_order(state)
             state_tensor = self.preprocess_state(state)
             
-            # Get model predictions
-            with torch.no_grad():
-                adjustments = self.forward(state_tensor)
-                
-            # Convert to price adjustments
+            # Get model predictions, scaled on-device to price adjustments
             max_adjustment = self.config['model']['max_adjustment']
-            adjustments = adjustments.cpu().numpy() * max_adjustment
-            
-            # Create adjustment dictionary
-            result = {}
-            for i, section in enumerate(state.keys()):
-                result[section] = float(adjustments[i])
+            with torch.inference_mode():
+                adjustments = self.forward(state_tensor).mul_(max_adjustment)
                 
-            return result
+            # Single device-to-host transfer into Python floats
+            return dict(zip(sections, adjustments.tolist()))
             
         except Exception as e:
             logger.error(f"Error getting price adjustments: {e}")
             # Return no adjustments on error
-            return {section: 0.0 for section in state.keys()} 
\ No newline at end of file
+            return {section: 0.0 for section in state.keys()}
+            
+    def get_action_batch(self, states: List[Dict[str, Any]]) -> Dict[str, torch.Tensor]:
+        """Get price adjustments for a batch of market states in one forward pass.
+        
+        Args:
+            states: Market state dictionaries sharing the same sections
+            
+        Returns:
+            Dictionary of adjustment tensors of shape (N,) for each instrument
+        """
+        if not states:
+            return {}
+            
+        sections = self._section_order(states[0])
+        state_tensor = self.preprocess_states(states)
+        
+        max_adjustment = self.config['model']['max_adjustment']
+        with torch.inference_mode():
+            adjustments = self.forward(state_tensor).mul_(max_adjustment)
+            
+        return dict(zip(sections, adjustments.unbind(dim=1))) 
\ No newline at end of file
@@ -1,28 +1,135 @@
 import logging
-from typing import Dict, Any, Optional, List
+from typing import TYPE_CHECKING, Dict, Any, Optional, List, Tuple
 from datetime import datetime
+from dataclasses import dataclass
 import json
+import orjson
 from pathlib import Path
+import os
 import shutil
-import subprocess
-import yaml
+import threading
+import time
+import contextlib
+import io
+import zipfile
 
-from ..versioning.version_manager import ModelVersionManager
-from ..monitoring.monitor import ModelMonitor
-from ..serving.model_server import ModelServer
-from ...data.storage.database_manager import DatabaseManager
+from ...utils.jsonl import migrate_legacy_json, read_jsonl
+
+if TYPE_CHECKING:
+    # Only needed for annotations; instances are injected by the caller, so
+    # status and admin scripts don't pay for the torch/serving import chain
+    from ..versioning.version_manager import ModelVersionManager
+    from ..monitoring.monitor import ModelMonitor
+    from ..serving.model_server import ModelServer
+    from ...data.storage.database_manager import DatabaseManager
 
 logger = logging.getLogger(__name__)
 
+# Background CPU sampling period and the age after which a sample is stale
+_CPU_SAMPLE_INTERVAL = 5.0
+_CPU_SAMPLE_MAX_AGE = 30.0
+
+# Version metrics where lower is better, so a bare requirement is a ceiling;
+# any other metric can be made one with a 'max_' prefix on its key
+_CEILING_METRICS = frozenset({'latency_ms', 'error_rate'})
+
+
+def _parse_requirement(key: str, threshold: Any) -> Tuple[str, str, float]:
+    """Split a requirements entry into (metric, comparison, threshold).
+    
+    Keys prefixed 'max_' or 'min_' set the direction explicitly; bare keys
+    are floors unless the metric is a known ceiling.
+    
+    Args:
+        key: Requirement key, e.g. 'accuracy' or 'max_latency_ms'
+        threshold: Required value
+        
+    Returns:
+        Metric name, '<=' or '>=', and the threshold
+    """
+    if key.startswith('max_'):
+        return key[4:], '<=', float(threshold)
+    if key.startswith('min_'):
+        return key[4:], '>=', float(threshold)
+    return key, '<=' if key in _CEILING_METRICS else '>=', float(threshold)
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    """Hard-link src to dst, falling back to an in-kernel copy, then copy2.
+    
+    Versioned model files are never modified in place, so sharing the inode
+    with a hard link is safe. copy_file_range reflinks on copy-on-write
+    filesystems and otherwise copies without passing through user space.
+    """
+    if dst.exists():
+        dst.unlink()
+        
+    try:
+        os.link(src, dst)
+        return
+    except OSError:
+        pass
+        
+    if hasattr(os, 'copy_file_range'):
+        try:
+            with open(src, 'rb') as fin, open(dst, 'wb') as fout:
+                remaining = os.fstat(fin.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fin.fileno(), fout.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                shutil.copystat(src, dst)
+                return
+        except OSError:
+            pass
+            
+    shutil.copy2(src, dst)
+
+
+@dataclass(frozen=True)
+class DeploymentConfig:
+    """Deployment settings, parsed and validated once at startup."""
+    base_dir: Path
+    min_memory_bytes: int  # Minimum free memory required to deploy
+    max_cpu_percent: float  # Maximum CPU usage allowed to deploy
+    status_window_hours: float = 24  # Metrics window for status reports
+    requirements: Tuple[Tuple[str, str, float], ...] = ()  # (metric, '<=' or '>=', threshold)
+    tests_in_process: bool = False  # Run integration tests via pytest.main
+    
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any]) -> 'DeploymentConfig':
+        """Build from the 'deployment' section of the configuration.
+        
+        Args:
+            config: Deployment configuration dictionary
+            
+        Returns:
+            Parsed deployment configuration
+        """
+        return cls(
+            base_dir=Path(config['base_dir']),
+            min_memory_bytes=int(config['min_memory_mb'] * 1024 * 1024),
+            max_cpu_percent=float(config['max_cpu_percent']),
+            status_window_hours=config.get('status_window_hours', 24),
+            requirements=tuple(
+                _parse_requirement(key, threshold)
+                for key, threshold in config.get('requirements', {}).items()
+            ),
+            tests_in_process=bool(config.get('tests_in_process', False))
+        )
+
+
 class DeploymentManager:
     """Manages model deployment and rollback."""
     
     def __init__(
         self,
-        version_manager: ModelVersionManager,
-        model_server: ModelServer,
-        model_monitor: ModelMonitor,
-        db_manager: DatabaseManager,
+        version_manager: 'ModelVersionManager',
+        model_server: 'ModelServer',
+        model_monitor: 'ModelMonitor',
+        db_manager: 'DatabaseManager',
         config: Dict[str, Any]
     ):
         """Initialize deployment manager.
@@ -39,12 +146,26 @@ class DeploymentManager:
         self.model_monitor = model_monitor
         self.db_manager = db_manager
         self.config = config
+        self.cfg = DeploymentConfig.from_dict(config['deployment'])
         
         # Load deployment history
-        self.deployment_dir = Path(config['deployment']['base_dir'])
+        self.deployment_dir = self.cfg.base_dir
         self.deployment_dir.mkdir(parents=True, exist_ok=True)
         self.deployment_history = self._load_deployment_history()
         
+        # Latest deployment time per version; later entries win
+        self._version_time_index: Dict[str, str] = {
+            deployment['version_id']: deployment['timestamp']
+            for deployment in self.deployment_history
+        }
+        
+        # CPU usage cached by a background sampler, started on first use
+        self._cpu_percent: Optional[float] = None
+        self._cpu_sampled_at = 0.0
+        self._cpu_sampler: Optional[threading.Thread] = None
+        self._cpu_sampler_lock = threading.Lock()
+        self._cpu_stop = threading.Event()
+        
     def deploy_model(
         self,
         version_id: str,
@@ -144,7 +265,7 @@ class DeploymentManager:
         
         # Get metrics for current deployment
         metrics_summary = self.model_monitor.get_metrics_summary(
-            window_hours=self.config['deployment']['status_window_hours']
+            window_hours=self.cfg.status_window_hours
         )
         
         # Get active alerts
@@ -165,15 +286,18 @@ class DeploymentManager:
             logger.error(f"Version {version_id} not found")
             return False
             
-        # Check version meets minimum requirements
+        # Check version meets its metric floors and ceilings
         metrics = version_info['metrics']
-        requirements = self.config['deployment']['requirements']
         
-        for metric, threshold in requirements.items():
-            if metrics.get(metric, 0) < threshold:
+        for metric, op, threshold in self.cfg.requirements:
+            value = metrics.get(metric)
+            met = value is not None and (
+                value <= threshold if op == '<=' else value >= threshold
+            )
+            if not met:
                 logger.error(
                     f"Version {version_id} does not meet {metric} requirement: "
-                    f"{metrics.get(metric, 0)} < {threshold}"
+                    f"needs {op} {threshold}, got {value}"
                 )
                 return False
                 
@@ -202,11 +326,31 @@ class DeploymentManager:
             return False
             
     def _validate_model(self, model_path: Path) -> bool:
-        """Validate model file integrity and compatibility."""
+        """Validate model file integrity and compatibility.
+        
+        The checkpoint is memory-mapped and loaded with weights_only, so no
+        pickled code runs and the weights are not read into memory up front.
+        """
         try:
             import torch
-            # Try loading model
-            model = torch.load(model_path, map_location='cpu')
+            
+            if not zipfile.is_zipfile(model_path):
+                logger.error(f"Model file is not a checkpoint archive: {model_path}")
+                return False
+                
+            checkpoint = torch.load(
+                model_path,
+                map_location=torch.device('cpu'),
+                mmap=True,
+                weights_only=True
+            )
+            state = checkpoint.get('model_state', checkpoint)
+            if not state:
+                logger.error(f"Model file contains no weights: {model_path}")
+                return False
+                
+            # Touch one tensor so its header is actually read
+            next(iter(state.values())).shape
             return True
         except Exception as e:
             logger.error(f"Model validation failed: {e}")
@@ -219,12 +363,12 @@ class DeploymentManager:
             
             # Check memory
             memory = psutil.virtual_memory()
-            if memory.available < self.config['deployment']['min_memory_mb'] * 1024 * 1024:
+            if memory.available < self.cfg.min_memory_bytes:
                 logger.error("Insufficient memory available")
                 return False
                 
             # Check CPU
-            if psutil.cpu_percent(interval=1) > self.config['deployment']['max_cpu_percent']:
+            if self._current_cpu_percent() > self.cfg.max_cpu_percent:
                 logger.error("CPU usage too high")
                 return False
                 
@@ -234,18 +378,75 @@ class DeploymentManager:
             logger.error(f"Resource check failed: {e}")
             return False
             
+    def _current_cpu_percent(self) -> float:
+        """Get system CPU usage without blocking on a fresh sample.
+        
+        Returns:
+            CPU usage percentage
+        """
+        import psutil
+        
+        with self._cpu_sampler_lock:
+            if self._cpu_sampler is None and not self._cpu_stop.is_set():
+                self._cpu_sampler = threading.Thread(
+                    target=self._sample_cpu, name='cpu-sampler', daemon=True)
+                self._cpu_sampler.start()
+            
+        if self._cpu_percent is None:
+            # No sample yet; take a short one rather than the old 1s sample
+            return psutil.cpu_percent(interval=0.1)
+            
+        if time.monotonic() - self._cpu_sampled_at > _CPU_SAMPLE_MAX_AGE:
+            # Sampler has stalled; usage since the last reading, non-blocking
+            return psutil.cpu_percent(interval=None)
+            
+        return self._cpu_percent
+        
+    def _sample_cpu(self) -> None:
+        """Refresh the cached CPU usage every few seconds."""
+        import psutil
+        
+        psutil.cpu_percent(interval=None)  # Prime the counters
+        while not self._cpu_stop.wait(_CPU_SAMPLE_INTERVAL):
+            self._cpu_percent = psutil.cpu_percent(interval=None)
+            self._cpu_sampled_at = time.monotonic()
+            
+    def shutdown(self) -> None:
+        """Stop the background CPU sampler, if it was started."""
+        self._cpu_stop.set()
+        with self._cpu_sampler_lock:
+            sampler = self._cpu_sampler
+        if sampler is not None:
+            sampler.join()
+            
     def _run_integration_tests(self, version_id: str) -> bool:
-        """Run integration tests for new version."""
+        """Run integration tests for new version.
+        
+        Tests run in a separate pytest process, isolated from this one's
+        imported modules and global state. Set deployment.tests_in_process
+        to run them through pytest.main instead, skipping interpreter and
+        import start-up.
+        """
         try:
-            # Run pytest with deployment tests
-            result = subprocess.run(
-                ['pytest', 'tests/integration'],
-                capture_output=True,
-                text=True
-            )
-            
-            if result.returncode != 0:
-                logger.error(f"Integration tests failed: {result.stderr}")
+            if self.cfg.tests_in_process:
+                import pytest
+                
+                buffer = io.StringIO()
+                with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer):
+                    exit_code = pytest.main(
+                        ['tests/integration', '-q', '--no-header', '--maxfail=1'])
+                output = buffer.getvalue()
+            else:
+                import subprocess
+                result = subprocess.run(
+                    ['pytest', 'tests/integration'],
+                    capture_output=True,
+                    text=True
+                )
+                exit_code, output = result.returncode, result.stdout + result.stderr
+                
+            if exit_code != 0:
+                logger.error(f"Integration tests failed: {output}")
                 return False
                 
             return True
@@ -261,29 +462,54 @@ class DeploymentManager:
             backup_dir = self.deployment_dir / 'backups' / current_version
             backup_dir.mkdir(parents=True, exist_ok=True)
             
-            # Copy model and config
-            shutil.copy2(
+            # Link (or copy) model and config
+            _link_or_copy(
                 self.version_manager.active_dir / current_version / 'model.pt',
                 backup_dir / 'model.pt'
             )
-            shutil.copy2(
+            _link_or_copy(
                 self.version_manager.active_dir / current_version / 'metadata.json',
                 backup_dir / 'metadata.json'
             )
             
+            # Record backup order in a manifest rather than relying on mtimes
+            backups = self._load_backup_index()
+            backups.append({
+                'version_id': current_version,
+                'timestamp': datetime.now().isoformat()
+            })
+            index_path = self.deployment_dir / 'backups' / 'index.json'
+            tmp_path = index_path.with_suffix('.json.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(backups, f, indent=2)
+            tmp_path.replace(index_path)
+            
+    def _load_backup_index(self) -> List[Dict[str, Any]]:
+        """Load the backup manifest, oldest backup first."""
+        index_path = self.deployment_dir / 'backups' / 'index.json'
+        if index_path.exists():
+            with open(index_path, 'r') as f:
+                return json.load(f)
+        return []
+            
     def _restore_backup(self) -> None:
         """Restore from most recent backup."""
         backup_dir = self.deployment_dir / 'backups'
         if not backup_dir.exists():
             return
             
-        # Get most recent backup
-        backups = sorted(backup_dir.iterdir(), key=lambda x: x.stat().st_mtime)
-        if not backups:
-            return
-            
-        latest_backup = backups[-1]
-        version_id = latest_backup.name
+        # Get most recent backup, scanning directories if there is no manifest
+        backups = self._load_backup_index()
+        if backups:
+            version_id = backups[-1]['version_id']
+        else:
+            backup_dirs = sorted(
+                (path for path in backup_dir.iterdir() if path.is_dir()),
+                key=lambda x: x.stat().st_mtime
+            )
+            if not backup_dirs:
+                return
+            version_id = backup_dirs[-1].name
         
         try:
             self.model_server.update_model(version_id)
@@ -306,25 +532,27 @@ class DeploymentManager:
         }
         
         self.deployment_history.append(deployment)
-        self._save_deployment_history()
+        self._version_time_index[version_id] = deployment['timestamp']
+        self._append_deployment(deployment)
         
     def _load_deployment_history(self) -> List[Dict[str, Any]]:
         """Load deployment history from disk."""
-        history_path = self.deployment_dir / 'deployment_history.json'
+        history_path = self.deployment_dir / 'deployment_history.jsonl'
+        legacy_path = self.deployment_dir / 'deployment_history.json'
+        
+        # One-time migration from the old single JSON list format
+        migrate_legacy_json(legacy_path, {history_path: list})
+        
         if history_path.exists():
-            with open(history_path, 'r') as f:
-                return json.load(f)
+            return list(read_jsonl(history_path))
         return []
         
-    def _save_deployment_history(self) -> None:
-        """Save deployment history to disk."""
-        history_path = self.deployment_dir / 'deployment_history.json'
-        with open(history_path, 'w') as f:
-            json.dump(self.deployment_history, f, indent=2)
+    def _append_deployment(self, deployment: Dict[str, Any]) -> None:
+        """Append a deployment record to the history file on disk."""
+        history_path = self.deployment_dir / 'deployment_history.jsonl'
+        with open(history_path, 'ab') as f:
+            f.write(orjson.dumps(deployment) + b'\n')
             
     def _get_deployment_time(self, version_id: str) -> Optional[str]:
         """Get deployment time for a version."""
-        for deployment in reversed(self.deployment_history):
-            if deployment['version_id'] == version_id:
-                return deployment['timestamp']
-        return None 
\ No newline at end of file
+        return self._version_time_index.get(version_id) 
\ No newline at end of file
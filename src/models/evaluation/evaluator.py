@@ -7,9 +7,42 @@ import torch
 
 from ..agents.base_agent import BaseAgent
 from ...data.storage.database_manager import DatabaseManager
+from ...utils.jit import njit
 
 logger = logging.getLogger(__name__)
 
+
+@njit(cache=True, fastmath=True)
+def _spread_metrics_kernel(current_spreads, adjustments, min_spread):
+    """Per-state spread impact and profitability in one fused pass.
+    
+    Args:
+        current_spreads: Current spreads, shape (N, bid/ask sections)
+        adjustments: Model's suggested adjustments, same shape
+        min_spread: Smallest spread still considered profitable
+        
+    Returns:
+        Tuple of mean spread impact (N,) and profitable flags (N,). With
+        no bid/ask sections the impact is zero and every state profitable.
+    """
+    n_states, n_sections = current_spreads.shape
+    impacts = np.zeros(n_states)
+    profitable = np.ones(n_states, dtype=np.bool_)
+    
+    for i in range(n_states):
+        total = 0.0
+        for s in range(n_sections):
+            new_spread = current_spreads[i, s] + adjustments[i, s]
+            total += new_spread - current_spreads[i, s]
+            # Profitable only if every section maintains a reasonable spread
+            if not new_spread >= min_spread:
+                profitable[i] = False
+        if n_sections > 0:
+            impacts[i] = total / n_sections
+            
+    return impacts, profitable
+
+
 class ModelEvaluator:
     """Evaluates model performance."""
     
@@ -51,33 +84,35 @@ class ModelEvaluator:
         }
         
         try:
-            adjustments = []
-            spread_impacts = []
-            profitable = 0
+            # One batched forward pass over the whole test set
+            with torch.inference_mode():
+                actions = self.agent.get_action_batch(test_data)
+                
+            sections = list(actions)
+            adjustments = torch.stack(
+                [actions[section] for section in sections], dim=1
+            ).cpu().numpy()  # (N, sections)
+            
+            # Spread metrics only apply to bid/ask sections
+            bid_ask = [
+                i for i, section in enumerate(sections)
+                if isinstance(test_data[0][section], dict)
+            ]
+            bid_ask_adjustments = adjustments[:, bid_ask]
+            current_spreads = self._current_spreads(
+                test_data, [sections[i] for i in bid_ask])
+            
+            spread_impacts, profitable = _spread_metrics_kernel(
+                np.ascontiguousarray(current_spreads, dtype=np.float64),
+                np.ascontiguousarray(bid_ask_adjustments, dtype=np.float64),
+                float(self.config['evaluation']['min_profitable_spread'])
+            )
             
-            with torch.no_grad():
-                for state in test_data:
-                    # Get model's price adjustments
-                    state_adjustments = self.agent.get_action(state)
-                    
-                    # Calculate metrics
-                    adj_values = list(state_adjustments.values())
-                    adjustments.extend(adj_values)
-                    
-                    # Calculate spread impact
-                    spread_impact = self._calculate_spread_impact(
-                        state, state_adjustments)
-                    spread_impacts.append(spread_impact)
-                    
-                    # Check if adjustment would be profitable
-                    if self._is_profitable_adjustment(state, state_adjustments):
-                        profitable += 1
-                        
             # Calculate final metrics
-            metrics['mean_adjustment'] = np.mean(adjustments)
-            metrics['adjustment_std'] = np.std(adjustments)
-            metrics['mean_spread_impact'] = np.mean(spread_impacts)
-            metrics['profitable_adjustments'] = profitable / len(test_data)
+            metrics['mean_adjustment'] = float(adjustments.mean())
+            metrics['adjustment_std'] = float(adjustments.std())
+            metrics['mean_spread_impact'] = float(spread_impacts.mean())
+            metrics['profitable_adjustments'] = float(profitable.mean())
             
             return metrics
             
@@ -85,53 +120,32 @@ class ModelEvaluator:
             logger.error(f"Error in model evaluation: {e}")
             raise
             
-    def _calculate_spread_impact(
+    def _current_spreads(
         self,
-        state: Dict[str, Any],
-        adjustments: Dict[str, float]
-    ) -> float:
-        """Calculate how adjustments affect spreads.
+        states: List[Dict[str, Any]],
+        sections: List[str]
+    ) -> np.ndarray:
+        """Get the mean bid/ask spread of each section in each state.
         
         Args:
-            state: Current market state
-            adjustments: Model's suggested price adjustments
+            states: Market states
+            sections: Bid/ask sections to measure
             
         Returns:
-            Average spread impact
+            Array of shape (N, len(sections))
         """
-        impacts = []
-        
-        for section, data in state.items():
-            if isinstance(data, dict):  # bid/ask section
-                current_spread = np.mean(data['ask'].values - data['bid'].values)
-                new_spread = current_spread + adjustments[section]
-                impacts.append(new_spread - current_spread)
-                
-        return np.mean(impacts) if impacts else 0.0
-        
-    def _is_profitable_adjustment(
-        self,
-        state: Dict[str, Any],
-        adjustments: Dict[str, float]
-    ) -> bool:
-        """Check if adjustments would be profitable.
-        
-        Args:
-            state: Current market state
-            adjustments: Model's suggested price adjustments
+        if not sections:
+            return np.empty((len(states), 0))
             
-        Returns:
-            True if adjustments seem profitable
-        """
-        # Simple profitability check - could be made more sophisticated
-        for section, data in state.items():
-            if isinstance(data, dict):
-                current_spread = np.mean(data['ask'].values - data['bid'].values)
-                new_spread = current_spread + adjustments[section]
-                
-                # Consider profitable if maintains reasonable spread
-                min_spread = self.config['evaluation']['min_profitable_spread']
-                if new_spread < min_spread:
-                    return False
-                    
-        return True 
\ No newline at end of file
+        # Concatenate every section's levels and reduce per segment in one go
+        bids = [np.asarray(state[section]['bid'], dtype=np.float64)
+                for state in states for section in sections]
+        asks = [np.asarray(state[section]['ask'], dtype=np.float64)
+                for state in states for section in sections]
+        counts = np.array([len(bid) for bid in bids])
+        starts = np.zeros(len(bids), dtype=np.intp)
+        np.cumsum(counts[:-1], out=starts[1:])
+        
+        spreads = np.concatenate(asks) - np.concatenate(bids)
+        means = np.add.reduceat(spreads, starts) / counts
+        return means.reshape(len(states), len(sections))
@@ -1,13 +1,61 @@
 import logging
-from typing import Dict, Any, Optional, List
+import threading
+from collections import deque
+from typing import Dict, Any, Optional, Iterable, Deque, Sequence
 from datetime import datetime
 import numpy as np
 
 from ...data.storage.database_manager import DatabaseManager
+from ...utils.jit import njit, NUMBA_AVAILABLE
 from ..agents.base_agent import BaseAgent
 
 logger = logging.getLogger(__name__)
 
+
+@njit(cache=True)
+def _feedback_stats_kernel(
+    codes: np.ndarray,
+    model_adjs: np.ndarray,
+    user_adjs: np.ndarray,
+    n_groups: int
+):
+    """Per-group mean/std of user - model adjustments and their correlation."""
+    counts = np.zeros(n_groups)
+    model_sum = np.zeros(n_groups)
+    user_sum = np.zeros(n_groups)
+    diff_sum = np.zeros(n_groups)
+    for i in range(codes.size):
+        g = codes[i]
+        counts[g] += 1.0
+        model_sum[g] += model_adjs[i]
+        user_sum[g] += user_adjs[i]
+        diff_sum[g] += user_adjs[i] - model_adjs[i]
+    model_mean = model_sum / counts
+    user_mean = user_sum / counts
+    diff_mean = diff_sum / counts
+    
+    # Second pass over centred values for numerically stable moments
+    diff_sq = np.zeros(n_groups)
+    cross = np.zeros(n_groups)
+    model_sq = np.zeros(n_groups)
+    user_sq = np.zeros(n_groups)
+    for i in range(codes.size):
+        g = codes[i]
+        model_centred = model_adjs[i] - model_mean[g]
+        user_centred = user_adjs[i] - user_mean[g]
+        diff_centred = user_adjs[i] - model_adjs[i] - diff_mean[g]
+        diff_sq[g] += diff_centred * diff_centred
+        cross[g] += model_centred * user_centred
+        model_sq[g] += model_centred * model_centred
+        user_sq[g] += user_centred * user_centred
+        
+    diff_std = np.sqrt(diff_sq / counts)
+    correlation = np.empty(n_groups)
+    for g in range(n_groups):
+        denom = model_sq[g] * user_sq[g]
+        correlation[g] = cross[g] / np.sqrt(denom) if denom > 0 else np.nan
+    return diff_mean, diff_std, correlation, counts
+
 class FeedbackManager:
     """Manages user feedback and model adjustments."""
     
@@ -27,7 +75,9 @@ class FeedbackManager:
         self.agent = agent
         self.db_manager = db_manager
         self.config = config
-        self.feedback_buffer: List[Dict[str, Any]] = []
+        self._buffer_size = config['feedback']['buffer_size']
+        self._lock = threading.Lock()
+        self.feedback_buffer: Deque[Dict[str, Any]] = self._new_buffer()
         
     def record_feedback(
         self,
@@ -53,77 +103,214 @@ class FeedbackManager:
                 'reason': reason
             }
             
-            # Store feedback
-            self.feedback_buffer.append(feedback)
+            # Buffer feedback; it is written to the database in batches.
+            # A full buffer is swapped out under the lock and processed
+            # outside it so concurrent producers are never blocked on it.
+            snapshot = None
+            with self._lock:
+                self.feedback_buffer.append(feedback)
+                if len(self.feedback_buffer) >= self._buffer_size:
+                    snapshot = self._swap_buffer()
+                    
+            if snapshot is not None:
+                self._process_feedback_buffer(snapshot)
+                
+        except Exception as e:
+            logger.error(f"Error recording feedback: {e}")
+            raise
             
-            # Store in database
-            self.db_manager.store_user_adjustment(
-                instrument_id=instrument_id,
-                old_mid=model_adjustment,
-                new_mid=user_adjustment,
-                reason=reason
-            )
+    def record_feedback_batch(self, entries: Iterable[Dict[str, Any]]) -> None:
+        """Record several feedback entries with a single lock acquisition.
+        
+        Args:
+            entries: Dicts with the instrument_id, model_adjustment,
+                user_adjustment and optional reason of each entry
+        """
+        try:
+            timestamp = datetime.now()
+            feedback = [
+                {
+                    'timestamp': timestamp,
+                    'instrument_id': entry['instrument_id'],
+                    'model_adjustment': entry['model_adjustment'],
+                    'user_adjustment': entry['user_adjustment'],
+                    'reason': entry.get('reason')
+                }
+                for entry in entries
+            ]
             
-            # Process feedback if buffer is full
-            if len(self.feedback_buffer) >= self.config['feedback']['buffer_size']:
-                self._process_feedback_buffer()
+            # Fill the buffer a flush-sized chunk at a time so the bounded
+            # deque never drops entries
+            snapshots = []
+            with self._lock:
+                start = 0
+                while start < len(feedback):
+                    # A requeued buffer can already hold more than a flush
+                    room = max(self._buffer_size - len(self.feedback_buffer), 0)
+                    self.feedback_buffer.extend(feedback[start:start + room])
+                    start += room
+                    if len(self.feedback_buffer) >= self._buffer_size:
+                        snapshots.append(self._swap_buffer())
+                        
+            for i, snapshot in enumerate(snapshots):
+                self._process_feedback_buffer(snapshot, behind=snapshots[i + 1:])
                 
         except Exception as e:
-            logger.error(f"Error recording feedback: {e}")
+            logger.error(f"Error recording feedback batch: {e}")
             raise
             
-    def _process_feedback_buffer(self) -> None:
-        """Process accumulated feedback to adjust model behavior."""
-        if not self.feedback_buffer:
+    def flush(self) -> None:
+        """Persist and process any buffered feedback.
+        
+        Call before shutdown so feedback below the buffer size is not lost.
+        """
+        self._process_feedback_buffer()
+        
+    def _new_buffer(self) -> Deque[Dict[str, Any]]:
+        """Create an empty feedback buffer with headroom over the flush size."""
+        return deque(maxlen=self._buffer_size * 2)
+        
+    def _swap_buffer(self) -> Deque[Dict[str, Any]]:
+        """Detach the current buffer and install an empty one.
+        
+        Must be called with ``self._lock`` held.
+        """
+        snapshot = self.feedback_buffer
+        self.feedback_buffer = self._new_buffer()
+        return snapshot
+        
+    def _requeue(self, *buffers: Deque[Dict[str, Any]]) -> None:
+        """Put detached feedback back ahead of anything recorded since.
+        
+        The oldest entries are dropped, and logged, if the combined
+        feedback exceeds the buffer's capacity.
+        
+        Args:
+            buffers: Feedback that could not be stored, oldest first
+        """
+        with self._lock:
+            requeued = self._new_buffer()
+            total = sum(map(len, buffers)) + len(self.feedback_buffer)
+            for buffer in buffers:
+                requeued.extend(buffer)
+            requeued.extend(self.feedback_buffer)
+            self.feedback_buffer = requeued
+            
+        dropped = total - len(requeued)
+        if dropped:
+            logger.warning(f"Feedback buffer full; dropped {dropped} oldest entries")
+        
+    def _process_feedback_buffer(
+        self,
+        buffer: Optional[Deque[Dict[str, Any]]] = None,
+        behind: Sequence[Deque[Dict[str, Any]]] = ()
+    ) -> None:
+        """Process accumulated feedback to adjust model behavior.
+        
+        Args:
+            buffer: Detached feedback to process. Defaults to swapping out
+                the current buffer.
+            behind: Detached buffers waiting to be processed after this
+                one; requeued in order if processing fails
+        """
+        if buffer is None:
+            with self._lock:
+                buffer = self._swap_buffer()
+                
+        if not buffer:
             return
             
+        try:
+            # Store buffered feedback in one transaction
+            self.db_manager.store_user_adjustments_batch([
+                {
+                    'timestamp': feedback['timestamp'],
+                    'instrument_id': feedback['instrument_id'],
+                    'old_mid': feedback['model_adjustment'],
+                    'new_mid': feedback['user_adjustment'],
+                    'reason': feedback['reason']
+                }
+                for feedback in buffer
+            ])
+        except Exception as e:
+            # Keep the feedback so the next flush retries the write
+            self._requeue(buffer, *behind)
+            logger.error(f"Error storing feedback: {e}")
+            raise
+            
         try:
             # Calculate feedback statistics
-            stats = self._calculate_feedback_stats()
+            stats = self._calculate_feedback_stats(buffer)
             
             # Update model parameters based on feedback
             self._update_model_parameters(stats)
             
-            # Clear buffer
-            self.feedback_buffer.clear()
-            
         except Exception as e:
+            # This buffer is stored; only the ones behind it still need it
+            self._requeue(*behind)
             logger.error(f"Error processing feedback: {e}")
             raise
             
-    def _calculate_feedback_stats(self) -> Dict[str, Any]:
+    def _calculate_feedback_stats(
+        self,
+        buffer: Optional[Iterable[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
         """Calculate statistics from feedback buffer.
         
+        Args:
+            buffer: Feedback entries to summarise. Defaults to a snapshot of
+                the current buffer.
+        
         Returns:
             Dictionary of feedback statistics
         """
-        stats = {}
-        
-        # Group feedback by instrument
-        by_instrument = {}
-        for feedback in self.feedback_buffer:
-            inst = feedback['instrument_id']
-            if inst not in by_instrument:
-                by_instrument[inst] = []
-            by_instrument[inst].append(feedback)
+        if buffer is None:
+            with self._lock:
+                buffer = list(self.feedback_buffer)
+                
+        # Integer code per instrument, in first-seen order
+        codes_by_instrument: Dict[str, int] = {}
+        count = len(buffer)
+        codes = np.fromiter(
+            (codes_by_instrument.setdefault(f['instrument_id'], len(codes_by_instrument))
+             for f in buffer),
+            np.intp, count)
+        model_adjs = np.fromiter(
+            (f['model_adjustment'] for f in buffer), np.float64, count)
+        user_adjs = np.fromiter(
+            (f['user_adjustment'] for f in buffer), np.float64, count)
+        n_groups = len(codes_by_instrument)
+        
+        if NUMBA_AVAILABLE:
+            diff_mean, diff_std, correlation, counts = _feedback_stats_kernel(
+                codes, model_adjs, user_adjs, n_groups)
+        else:
+            # Without numba, grouped bincount reductions beat a Python loop
+            counts = np.bincount(codes, minlength=n_groups)
             
-        # Calculate stats for each instrument
-        for inst, feedbacks in by_instrument.items():
-            model_adjs = [f['model_adjustment'] for f in feedbacks]
-            user_adjs = [f['user_adjustment'] for f in feedbacks]
+            def group_mean(values: np.ndarray) -> np.ndarray:
+                return np.bincount(codes, weights=values, minlength=n_groups) / counts
+                
+            differences = user_adjs - model_adjs
+            diff_mean = group_mean(differences)
+            diff_std = np.sqrt(group_mean((differences - diff_mean[codes]) ** 2))
             
-            stats[inst] = {
-                'mean_difference': np.mean(
-                    np.array(user_adjs) - np.array(model_adjs)
-                ),
-                'std_difference': np.std(
-                    np.array(user_adjs) - np.array(model_adjs)
-                ),
-                'correlation': np.corrcoef(model_adjs, user_adjs)[0, 1],
-                'num_samples': len(feedbacks)
+            # Per-instrument Pearson correlation from centred sums
+            model_centred = model_adjs - group_mean(model_adjs)[codes]
+            user_centred = user_adjs - group_mean(user_adjs)[codes]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                correlation = group_mean(model_centred * user_centred) / np.sqrt(
+                    group_mean(model_centred ** 2) * group_mean(user_centred ** 2))
+                
+        return {
+            instrument_id: {
+                'mean_difference': diff_mean[code],
+                'std_difference': diff_std[code],
+                'correlation': correlation[code],
+                'num_samples': int(counts[code])
             }
-            
-        return stats
+            for instrument_id, code in codes_by_instrument.items()
+        }
         
     def _update_model_parameters(self, stats: Dict[str, Any]) -> None:
         """Update model parameters based on feedback statistics.
@@ -164,4 +351,6 @@ class FeedbackManager:
         Returns:
             Dictionary containing feedback summary
         """
-        return self._calculate_feedback_stats() if self.feedback_buffer else {} 
\ No newline at end of file
+        with self._lock:
+            buffer = list(self.feedback_buffer)
+        return self._calculate_feedback_stats(buffer) if buffer else {} 
\ No newline at end of file
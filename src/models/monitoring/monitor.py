@@ -1,16 +1,29 @@
 import logging
-from typing import Dict, Any, List, Optional
+import threading
+from collections import deque
+from itertools import islice
+from operator import itemgetter
+from typing import Dict, Any, List, Optional, Tuple, Deque
 from datetime import datetime, timedelta
 import numpy as np
 import pandas as pd
 from dataclasses import dataclass
-import json
+import orjson
 from pathlib import Path
 
 from ...data.storage.database_manager import DatabaseManager
+from ...utils.jsonl import decode_records, migrate_legacy_json
+
+try:
+    import pynvml
+    PYNVML_AVAILABLE = True
+except ImportError:  # Fall back to the allocator's view of GPU memory
+    PYNVML_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+_BYTES_PER_MB = 1 / (1024 * 1024)
+
 @dataclass
 class PerformanceMetrics:
     """Container for model performance metrics."""
@@ -53,8 +66,25 @@ class ModelMonitor:
         self.metrics_dir.mkdir(parents=True, exist_ok=True)
         
         # Initialize metrics storage
-        self.performance_history: List[Dict[str, Any]] = []
-        self.health_history: List[Dict[str, Any]] = []
+        # Initialize metrics storage, keeping only the most recent records
+        self.max_history = config.get('monitoring', {}).get('max_history', 100_000)
+        self.performance_history: Deque[Dict[str, Any]] = deque(maxlen=self.max_history)
+        self.health_history: Deque[Dict[str, Any]] = deque(maxlen=self.max_history)
+        
+        # Time-indexed views of the histories, extended as records arrive;
+        # counts track records stored vs. records already in the views
+        self._history_frames: Dict[str, pd.DataFrame] = {}
+        self._stored_counts = {'performance': 0, 'health': 0}
+        self._framed_counts = {'performance': 0, 'health': 0}
+        # Running (sum, count) prefixes per (metric type, column), so any
+        # window mean is two lookups instead of a scan
+        self._prefix_sums: Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray]] = {}
+        
+        # Process handle for health metrics, created on first collection so
+        # cpu_percent() measures usage between consecutive collections
+        self._process = None
+        self._nvml_handle = None
+        self.start_time = datetime.now()
         
         # Load existing metrics if any
         self._load_metrics_history()
@@ -80,17 +110,19 @@ class ModelMonitor:
                 minutes=self.config['monitoring']['metrics_window_minutes']
             ))
             
-            # Get predictions from database
-            predictions = self._get_predictions(start_time, end_time)
+            # Aggregate predictions in the database
+            stats = self._aggregate_predictions(start_time, end_time)
+            count = stats['count']
+            span = stats['span_seconds'] or 0
             
             # Calculate metrics
             metrics = PerformanceMetrics(
-                prediction_latency=self._calculate_latency(predictions),
-                prediction_throughput=self._calculate_throughput(predictions),
-                error_rate=self._calculate_error_rate(predictions),
-                queue_utilization=self._calculate_queue_utilization(predictions),
-                prediction_accuracy=self._calculate_accuracy(predictions),
-                spread_compliance=self._calculate_spread_compliance(predictions)
+                prediction_latency=stats['latency'],
+                prediction_throughput=count / span if span > 0 else 0,
+                error_rate=stats['errors'] / count if count > 0 else 0,
+                queue_utilization=stats['queue_size'] / self.config['serving']['queue_size'],
+                prediction_accuracy=stats['accuracy'],
+                spread_compliance=stats['spread_compliance']
             )
             
             # Store metrics
@@ -112,11 +144,15 @@ class ModelMonitor:
             import psutil
             import torch
             
+            if self._process is None:
+                self._process = psutil.Process()
+                self._process.cpu_percent(interval=None)  # Seed the CPU counter
+                
             # Get system metrics
-            process = psutil.Process()
+            process = self._process
             metrics = HealthMetrics(
-                memory_usage=process.memory_info().rss / 1024 / 1024,  # MB
-                cpu_usage=process.cpu_percent(),
+                memory_usage=process.memory_info().rss * _BYTES_PER_MB,
+                cpu_usage=process.cpu_percent(interval=None),
                 gpu_usage=self._get_gpu_usage() if torch.cuda.is_available() else None,
                 queue_size=self._get_queue_size(),
                 active_threads=threading.active_count(),
@@ -144,31 +180,20 @@ class ModelMonitor:
         Returns:
             Dictionary of metric summaries
         """
-        cutoff_time = datetime.now() - timedelta(hours=window_hours)
-        
-        # Filter recent metrics
-        recent_performance = [
-            m for m in self.performance_history
-            if datetime.fromisoformat(m['timestamp']) > cutoff_time
-        ]
-        recent_health = [
-            m for m in self.health_history
-            if datetime.fromisoformat(m['timestamp']) > cutoff_time
-        ]
-        
-        # Calculate summaries
+        cutoff_time = pd.Timestamp(datetime.now() - timedelta(hours=window_hours))
+        
         return {
-            'performance': {
-                'avg_latency': np.mean([m['prediction_latency'] for m in recent_performance]),
-                'avg_throughput': np.mean([m['prediction_throughput'] for m in recent_performance]),
-                'avg_error_rate': np.mean([m['error_rate'] for m in recent_performance]),
-                'avg_accuracy': np.mean([m['prediction_accuracy'] for m in recent_performance])
-            },
-            'health': {
-                'avg_memory': np.mean([m['memory_usage'] for m in recent_health]),
-                'avg_cpu': np.mean([m['cpu_usage'] for m in recent_health]),
-                'avg_queue_size': np.mean([m['queue_size'] for m in recent_health])
-            }
+            'performance': self._window_means('performance', cutoff_time, {
+                'avg_latency': 'prediction_latency',
+                'avg_throughput': 'prediction_throughput',
+                'avg_error_rate': 'error_rate',
+                'avg_accuracy': 'prediction_accuracy'
+            }),
+            'health': self._window_means('health', cutoff_time, {
+                'avg_memory': 'memory_usage',
+                'avg_cpu': 'cpu_usage',
+                'avg_queue_size': 'queue_size'
+            })
         }
         
     def check_alerts(self) -> List[str]:
@@ -198,51 +223,83 @@ class ModelMonitor:
             
         return alerts
         
-    def _get_predictions(
+    def _aggregate_predictions(
         self,
         start_time: datetime,
         end_time: datetime
-    ) -> pd.DataFrame:
-        """Get predictions from database."""
-        return pd.read_sql_query(
+    ) -> Dict[str, float]:
+        """Aggregate predictions in a time window in a single query.
+        
+        Args:
+            start_time: Start of the window
+            end_time: End of the window
+            
+        Returns:
+            Dictionary with the prediction count, error total, time span in
+            seconds and mean latency, queue size, accuracy and spread
+            compliance. Means are NaN when the window is empty.
+        """
+        row = self.db_manager._get_connection().execute(
             """
-            SELECT * FROM model_predictions
+            SELECT COUNT(*),
+                   COALESCE(SUM(error), 0),
+                   (julianday(MAX(timestamp)) - julianday(MIN(timestamp))) * 86400,
+                   AVG(latency_ms),
+                   AVG(queue_size),
+                   AVG(accuracy),
+                   AVG(spread_compliant)
+            FROM model_predictions
             WHERE timestamp BETWEEN ? AND ?
             """,
-            self.db_manager._get_connection(),
-            params=[start_time, end_time],
-            parse_dates=['timestamp']
-        )
-        
-    def _calculate_latency(self, predictions: pd.DataFrame) -> float:
-        """Calculate average prediction latency."""
-        return predictions['latency_ms'].mean()
+            (start_time, end_time)
+        ).fetchone()
         
-    def _calculate_throughput(self, predictions: pd.DataFrame) -> float:
-        """Calculate prediction throughput."""
-        time_range = (predictions['timestamp'].max() - 
-                     predictions['timestamp'].min()).total_seconds()
-        return len(predictions) / time_range if time_range > 0 else 0
-        
-    def _calculate_error_rate(self, predictions: pd.DataFrame) -> float:
-        """Calculate prediction error rate."""
-        return (predictions['error'].sum() / len(predictions)) if len(predictions) > 0 else 0
+        count, errors, span_seconds, *means = row
+        latency, queue_size, accuracy, spread_compliance = (
+            np.nan if value is None else value for value in means
+        )
+        return {
+            'count': count,
+            'errors': errors,
+            'span_seconds': span_seconds,
+            'latency': latency,
+            'queue_size': queue_size,
+            'accuracy': accuracy,
+            'spread_compliance': spread_compliance
+        }
         
-    def _calculate_queue_utilization(self, predictions: pd.DataFrame) -> float:
-        """Calculate queue utilization."""
-        return predictions['queue_size'].mean() / self.config['serving']['queue_size']
+    def _get_gpu_usage(self) -> float:
+        """Get GPU utilization percentage of the first device.
         
-    def _calculate_accuracy(self, predictions: pd.DataFrame) -> float:
-        """Calculate prediction accuracy."""
-        return predictions['accuracy'].mean()
+        Uses NVML when pynvml is installed; otherwise reports the share of
+        device memory allocated by torch.
+        """
+        if PYNVML_AVAILABLE:
+            if self._nvml_handle is None:
+                pynvml.nvmlInit()
+                self._nvml_handle = pynvml.nvmlDeviceGetHandleByIndex(0)
+            return float(pynvml.nvmlDeviceGetUtilizationRates(self._nvml_handle).gpu)
+            
+        import torch
+        total = torch.cuda.get_device_properties(0).total_memory
+        return 100.0 * torch.cuda.memory_allocated(0) / total
         
-    def _calculate_spread_compliance(self, predictions: pd.DataFrame) -> float:
-        """Calculate spread compliance rate."""
-        return predictions['spread_compliant'].mean()
+    def clear_metrics(self) -> None:
+        """Discard all collected metrics, in memory and on disk."""
+        for kind in ('performance', 'health'):
+            self._history_path(kind).unlink(missing_ok=True)
+        self.performance_history.clear()
+        self.health_history.clear()
+        self._stored_counts = {'performance': 0, 'health': 0}
+        self._framed_counts = {'performance': 0, 'health': 0}
+        self._history_frames.clear()
+        self._prefix_sums.clear()
         
-    def _get_gpu_usage(self) -> float:
-        """Get GPU usage if available."""
-        return torch.cuda.memory_allocated() / torch.cuda.max_memory_allocated()
+    def shutdown(self) -> None:
+        """Release monitoring resources."""
+        if self._nvml_handle is not None:
+            pynvml.nvmlShutdown()
+            self._nvml_handle = None
         
     def _get_queue_size(self) -> int:
         """Get current prediction queue size."""
@@ -259,7 +316,8 @@ class ModelMonitor:
             **metrics.__dict__
         }
         self.performance_history.append(metric_dict)
-        self._save_metrics()
+        self._stored_counts['performance'] += 1
+        self._append_metrics('performance', metric_dict)
         
     def _store_health_metrics(self, metrics: HealthMetrics) -> None:
         """Store health metrics."""
@@ -268,22 +326,161 @@ class ModelMonitor:
             **metrics.__dict__
         }
         self.health_history.append(metric_dict)
-        self._save_metrics()
+        self._stored_counts['health'] += 1
+        self._append_metrics('health', metric_dict)
         
-    def _save_metrics(self) -> None:
-        """Save metrics to disk."""
-        metrics = {
-            'performance': self.performance_history,
-            'health': self.health_history
-        }
-        with open(self.metrics_dir / 'metrics_history.json', 'w') as f:
-            json.dump(metrics, f, indent=2)
+    def _history_frame(self, kind: str) -> pd.DataFrame:
+        """Get a metric type's history as a DataFrame indexed by timestamp.
+        
+        Only records added since the last call are parsed and appended, so
+        repeated summaries don't rescan the whole history. Rows evicted
+        from the bounded history are dropped from the frame as well.
+        
+        Args:
+            kind: Metric type, 'performance' or 'health'
+            
+        Returns:
+            History DataFrame with a DatetimeIndex
+        """
+        history = self.performance_history if kind == 'performance' else self.health_history
+        frame = self._history_frames.get(kind)
+        new_count = min(
+            self._stored_counts[kind] - self._framed_counts[kind], len(history))
+        
+        if frame is None or new_count > 0:
+            new_rows = pd.DataFrame.from_records(
+                list(islice(history, len(history) - new_count, None)))
+            timestamps = new_rows.pop('timestamp') if len(new_rows) else []
+            new_rows.index = pd.DatetimeIndex(pd.to_datetime(timestamps, format='ISO8601')).as_unit('ns')
+            frame = new_rows if frame is None else pd.concat([frame, new_rows])
+            self._framed_counts[kind] = self._stored_counts[kind]
+            
+            # Trim to the bounded history, keeping prefix sums aligned
+            excess = len(frame) - len(history)
+            if excess > 0:
+                frame = frame.iloc[excess:]
+                for key, (sums, counts) in list(self._prefix_sums.items()):
+                    if key[0] == kind:
+                        self._prefix_sums[key] = (sums[excess:], counts[excess:])
+            self._history_frames[kind] = frame
+            
+        return frame
+        
+    def _window_means(
+        self,
+        kind: str,
+        cutoff_time: pd.Timestamp,
+        columns: Dict[str, str]
+    ) -> Dict[str, float]:
+        """Mean of each column over records newer than cutoff_time.
+        
+        Args:
+            kind: Metric type, 'performance' or 'health'
+            cutoff_time: Only records after this time are included
+            columns: Mapping of output name to history column
+            
+        Returns:
+            Dictionary of means, NaN where the window has no values
+        """
+        frame = self._history_frame(kind)
+        
+        if not frame.index.is_monotonic_increasing:
+            # Clock went backwards at some point; fall back to a full scan
+            recent = frame.loc[frame.index > cutoff_time].reindex(columns=list(columns.values()))
+            means = recent.astype(np.float64).mean()
+            return {name: float(means[column]) for name, column in columns.items()}
+            
+        start = frame.index.searchsorted(cutoff_time, side='right')
+        result = {}
+        for name, column in columns.items():
+            sums, counts = self._prefix_sum(kind, column, frame)
+            count = counts[-1] - counts[start]
+            result[name] = float((sums[-1] - sums[start]) / count) if count else float('nan')
+        return result
+        
+    def _prefix_sum(
+        self,
+        kind: str,
+        column: str,
+        frame: pd.DataFrame
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Get running sums and non-NaN counts of a history column.
+        
+        Both arrays have len(frame) + 1 entries with a leading zero, and are
+        extended only by the rows appended since the last call.
+        """
+        sums, counts = self._prefix_sums.get((kind, column), (np.zeros(1), np.zeros(1, np.int64)))
+        cached = len(sums) - 1
+        
+        if cached < len(frame):
+            if column in frame:
+                values = pd.to_numeric(frame[column].iloc[cached:], errors='coerce')
+                values = values.to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                values = np.full(len(frame) - cached, np.nan)
+            valid = ~np.isnan(values)
+            sums = np.concatenate([sums, sums[-1] + np.cumsum(np.where(valid, values, 0.0))])
+            counts = np.concatenate([counts, counts[-1] + np.cumsum(valid)])
+            self._prefix_sums[(kind, column)] = (sums, counts)
+            
+        return sums, counts
+        
+    def _history_path(self, kind: str) -> Path:
+        """Path of the append-only history file for a metric type."""
+        return self.metrics_dir / f'{kind}_history.jsonl'
+        
+    def _append_metrics(self, kind: str, metric_dict: Dict[str, Any]) -> None:
+        """Append one metrics record to its history file on disk.
+        
+        Args:
+            kind: Metric type, 'performance' or 'health'
+            metric_dict: Metrics record to persist
+        """
+        with open(self._history_path(kind), 'ab') as f:
+            # Metric values are often numpy scalars straight from pandas
+            f.write(orjson.dumps(metric_dict, option=orjson.OPT_SERIALIZE_NUMPY) + b'\n')
             
     def _load_metrics_history(self) -> None:
         """Load metrics history from disk."""
-        history_path = self.metrics_dir / 'metrics_history.json'
-        if history_path.exists():
-            with open(history_path, 'r') as f:
-                metrics = json.load(f)
-                self.performance_history = metrics['performance']
-                self.health_history = metrics['health'] 
\ No newline at end of file
+        # One-time migration from the old single JSON document format
+        migrate_legacy_json(self.metrics_dir / 'metrics_history.json', {
+            self._history_path(kind): itemgetter(kind)
+            for kind in ('performance', 'health')
+        })
+        
+        self.performance_history = self._read_history('performance')
+        self.health_history = self._read_history('health')
+        self._stored_counts = {
+            'performance': len(self.performance_history),
+            'health': len(self.health_history)
+        }
+        self._framed_counts = {'performance': 0, 'health': 0}
+        self._history_frames.clear()
+        self._prefix_sums.clear()
+        
+    def _read_history(self, kind: str) -> Deque[Dict[str, Any]]:
+        """Read the most recent records from a metric type's history file.
+        
+        Files holding well over max_history records are compacted on disk
+        so they don't grow without bound.
+        """
+        history: Deque[Dict[str, Any]] = deque(maxlen=self.max_history)
+        history_path = self._history_path(kind)
+        if not history_path.exists():
+            return history
+            
+        total = 0
+        with open(history_path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    history.append(line)
+                    total += 1
+                    
+        if total > 2 * self.max_history:
+            tmp_path = history_path.with_suffix('.jsonl.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.writelines(history)
+            tmp_path.replace(history_path)
+            logger.info(f"Compacted {history_path} to {len(history)} records")
+            
+        return deque(decode_records(history, history_path), maxlen=self.max_history)
@@ -1,9 +1,11 @@
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple
 from pathlib import Path
 import json
 import threading
-from queue import Queue
+from collections import deque
+from datetime import datetime
+from queue import SimpleQueue, Empty
 import time
 
 from ..agents.base_agent import BaseAgent
@@ -33,25 +35,59 @@ class ModelServer:
         self.config = config
         
         # Initialize model
-        self.current_model: Optional[BaseAgent] = None
+        # The (version_id, model) pair is published in one assignment, so
+        # predictions read a matching pair without locking; model_lock only
+        # serializes loads
+        self._active: Optional[Tuple[str, BaseAgent]] = None
         self.model_lock = threading.Lock()
         
-        # Prediction queue for async processing
-        self.prediction_queue: Queue = Queue(
-            maxsize=config['serving']['queue_size']
+        # Prediction queue for async processing. SimpleQueue puts don't take
+        # a lock; the size limit is enforced approximately in predict()
+        self.prediction_queue: SimpleQueue = SimpleQueue()
+        self.queue_size = config['serving']['queue_size']
+        
+        # Async requests are drained from the queue in micro-batches
+        self.batch_size = config['serving'].get('batch_size', 32)
+        self.batch_timeout = config['serving'].get('batch_timeout_ms', 0) / 1000
+        
+        # Served predictions are buffered and written to the database in
+        # batches by a separate writer thread
+        self._pending_writes: deque = deque(
+            maxlen=config['serving'].get('write_buffer_size', 10000)
         )
+        # Writes evicted from the full buffer, reported on the next flush
+        self._dropped_writes = 0
+        self._drop_lock = threading.Lock()
+        self.write_interval = config['serving'].get('write_interval_ms', 100) / 1000
         
-        # Start prediction worker
+        # Start prediction worker and writer
         self.is_running = True
         self.worker_thread = threading.Thread(
             target=self._prediction_worker,
             daemon=True
         )
         self.worker_thread.start()
+        self.writer_thread = threading.Thread(
+            target=self._prediction_writer,
+            daemon=True
+        )
+        self.writer_thread.start()
         
         # Load active model
         self._load_active_model()
         
+    @property
+    def current_model(self) -> Optional[BaseAgent]:
+        """Model serving predictions, or None before the first load."""
+        active = self._active
+        return active[1] if active else None
+        
+    @property
+    def current_model_version(self) -> Optional[str]:
+        """Version id of the model serving predictions."""
+        active = self._active
+        return active[0] if active else None
+        
     def predict(
         self,
         market_state: Dict[str, Any],
@@ -67,12 +103,11 @@ class ModelServer:
             Dictionary of price adjustments or None if async
         """
         if async_mode:
-            try:
-                self.prediction_queue.put_nowait((market_state, time.time()))
-                return None
-            except Queue.Full:
+            if self.prediction_queue.qsize() >= self.queue_size:
                 logger.warning("Prediction queue full, dropping request")
                 return None
+            self.prediction_queue.put((market_state, time.time()))
+            return None
                 
         return self._get_prediction(market_state)
         
@@ -108,6 +143,7 @@ class ModelServer:
         """Shutdown the model server."""
         self.is_running = False
         self.worker_thread.join()
+        self.writer_thread.join()
         
     def _get_prediction(
         self,
@@ -121,30 +157,98 @@ class ModelServer:
         Returns:
             Dictionary of price adjustments
         """
-        with self.model_lock:
-            if self.current_model is None:
-                raise RuntimeError("No model loaded")
-            return self.current_model.get_action(market_state)
+        active = self._active
+        if active is None:
+            raise RuntimeError("No model loaded")
+        return active[1].get_action(market_state)
+            
+    def _get_predictions(
+        self,
+        market_states: List[Dict[str, Any]],
+        model: BaseAgent
+    ) -> List[Dict[str, float]]:
+        """Get predictions for several market states in one forward pass.
+        
+        Args:
+            market_states: Market states sharing the same sections
+            model: Model to run, taken from one read of the active pair
+            
+        Returns:
+            Price adjustments for each state, in input order
+        """
+        actions = model.get_action_batch(market_states)
+        
+        columns = [adjustments.tolist() for adjustments in actions.values()]
+        return [dict(zip(actions, row)) for row in zip(*columns)]
+        
+    def _next_batch(self) -> List[Tuple[Dict[str, Any], float]]:
+        """Collect up to batch_size queued requests.
+        
+        Blocks for the first request, then takes whatever else is queued,
+        waiting at most batch_timeout for stragglers.
+        
+        Returns:
+            List of (market_state, request_time) tuples
             
+        Raises:
+            Empty: If no request arrived within a second
+        """
+        batch = [self.prediction_queue.get(timeout=1.0)]
+        deadline = time.monotonic() + self.batch_timeout
+        
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self.prediction_queue.get(timeout=remaining))
+                else:
+                    batch.append(self.prediction_queue.get_nowait())
+            except Empty:
+                break
+                
+        return batch
+        
     def _prediction_worker(self) -> None:
         """Worker thread for processing async predictions."""
         while self.is_running:
             try:
-                # Get prediction request
-                market_state, request_time = self.prediction_queue.get(timeout=1.0)
+                # Get a micro-batch of prediction requests
+                batch = self._next_batch()
                 
-                # Check if request is still valid
-                if time.time() - request_time > self.config['serving']['max_delay']:
-                    logger.warning("Dropping stale prediction request")
-                    continue
+                # Drop stale requests before running the model
+                now = time.time()
+                max_delay = self.config['serving']['max_delay']
+                market_states = [
+                    market_state for market_state, request_time in batch
+                    if now - request_time <= max_delay
+                ]
+                if len(market_states) < len(batch):
+                    logger.warning(
+                        f"Dropping {len(batch) - len(market_states)} stale prediction requests"
+                    )
                     
-                # Get prediction
-                prediction = self._get_prediction(market_state)
-                
-                # Store prediction
-                self._store_prediction(prediction, market_state)
-                
-            except Queue.Empty:
+                # One forward pass per group of states with the same layout
+                groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+                for market_state in market_states:
+                    groups.setdefault(tuple(market_state), []).append(market_state)
+                    
+                # Read the active pair once so every prediction in the
+                # batch is stored under the version that produced it
+                active = self._active
+                if active is None:
+                    raise RuntimeError("No model loaded")
+                version_id, model = active
+                    
+                for group in groups.values():
+                    predictions = self._get_predictions(group, model)
+                    
+                    # Store predictions
+                    latency_ms = (time.time() - now) * 1000
+                    for prediction, market_state in zip(predictions, group):
+                        self._store_prediction(
+                            prediction, market_state, latency_ms, version_id)
+                        
+            except Empty:
                 continue
             except Exception as e:
                 logger.error(f"Error in prediction worker: {e}")
@@ -152,22 +256,69 @@ class ModelServer:
     def _store_prediction(
         self,
         prediction: Dict[str, float],
-        market_state: Dict[str, Any]
+        market_state: Dict[str, Any],
+        latency_ms: Optional[float] = None,
+        model_version: Optional[str] = None
     ) -> None:
-        """Store model prediction in database.
+        """Queue a model prediction for storage in the database.
+        
+        When the buffer is full the oldest pending write is evicted; the
+        count is logged on the next flush.
         
         Args:
             prediction: Model's price adjustments
             market_state: Input market state
+            latency_ms: Optional time taken to serve the prediction
+            model_version: Version that made the prediction; defaults to
+                the active version
         """
+        if len(self._pending_writes) == self._pending_writes.maxlen:
+            with self._drop_lock:
+                self._dropped_writes += 1
+        self._pending_writes.append({
+            'timestamp': datetime.now(),
+            'model_version': model_version or self.current_model_version,
+            'prediction': prediction,
+            'latency_ms': latency_ms,
+            'queue_size': self.prediction_queue.qsize()
+        })
+        
+    def _prediction_writer(self) -> None:
+        """Writer thread that periodically flushes buffered predictions."""
+        # Keep going until the worker has stopped producing predictions
+        while self.is_running or self.worker_thread.is_alive():
+            time.sleep(self.write_interval)
+            self._flush_predictions()
+            
+        # Write whatever is left on shutdown
+        self._flush_predictions()
+        
+    def flush(self) -> None:
+        """Write buffered predictions now instead of waiting for the writer.
+        
+        Lets callers that read predictions or metrics straight after serving
+        (tests, admin scripts) see a consistent database without sleeping.
+        """
+        self._flush_predictions()
+        
+    def _flush_predictions(self) -> None:
+        """Write all buffered predictions in one database transaction."""
+        with self._drop_lock:
+            dropped, self._dropped_writes = self._dropped_writes, 0
+        if dropped:
+            logger.warning(f"Prediction write buffer full; dropped {dropped} predictions")
+            
+        rows = []
+        while self._pending_writes:
+            rows.append(self._pending_writes.popleft())
+            
+        if not rows:
+            return
+            
         try:
-            self.db_manager.store_prediction(
-                prediction=prediction,
-                market_state=market_state,
-                model_version=self.current_model_version
-            )
+            self.db_manager.store_predictions_batch(rows)
         except Exception as e:
-            logger.error(f"Error storing prediction: {e}")
+            logger.error(f"Error storing {len(rows)} predictions: {e}")
             
     def _load_active_model(self) -> None:
         """Load the currently active model version."""
@@ -195,15 +346,22 @@ class ModelServer:
         with open(metadata_path, 'r') as f:
             metadata = json.load(f)
             
-        # Create and load model
+        # Create and load model, then publish it with its version
         model = self._create_model(metadata['config'])
         model.load(str(model_path))
+        model.eval()
         
-        self.current_model = model
-        self.current_model_version = version_id
+        # Pay any compilation cost before the model takes traffic
+        model.warm_up(batch_sizes=(1, self.batch_size))
+        
+        self._active = (version_id, model)
         
     def _create_model(self, config: Dict[str, Any]) -> BaseAgent:
         """Create model instance from configuration."""
         # This could be made more flexible to support different model types
         from ..agents.price_agent import PriceAgent
+        
+        # The serving config can opt in to torch.compile for every version
+        if self.config['serving'].get('compile', False):
+            config = {**config, 'model': {**config['model'], 'compile': True}}
         return PriceAgent(config) 
\ No newline at end of file
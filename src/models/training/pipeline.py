@@ -1,16 +1,20 @@
 import logging
 from typing import Dict, Any, Optional, List
+from collections import deque
+from operator import itemgetter
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
 import os
 from pathlib import Path
 import json
+import pandas as pd
 
 from ..agents.base_agent import BaseAgent
 from ..agents.price_agent import PriceAgent
 from ..feedback.feedback_manager import FeedbackManager
 from ..evaluation.evaluator import ModelEvaluator
 from .trainer import ModelTrainer
-from ...data.capture.data_collector import DataCollector
+from ...data.capture.data_collector import DataCollector, RowCursor
 from ...data.storage.database_manager import DatabaseManager
 
 logger = logging.getLogger(__name__)
@@ -47,6 +51,17 @@ class TrainingPipeline:
         self.current_epoch = 0
         self.best_metrics: Optional[Dict[str, float]] = None
         
+        # Checkpoints are written in the background while training continues
+        self._checkpoint_pool = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='checkpoint')
+        self._pending_checkpoint: Optional[Future] = None
+        self.keep_checkpoints = config['training'].get('keep_checkpoints', 5)
+        
+        # Sliding training window, extended with new data each epoch
+        self._window_states: deque = deque()
+        self._window_adjustments: Optional[pd.DataFrame] = None
+        self._window_cursor: Optional[RowCursor] = None
+        
     def _create_agent(self) -> BaseAgent:
         """Create model agent based on configuration."""
         return PriceAgent(self.config)
@@ -102,6 +117,7 @@ class TrainingPipeline:
                 # Save checkpoint
                 self._save_checkpoint()
                 
+            self.wait_for_checkpoints()
             return metrics_history
             
         except Exception as e:
@@ -109,15 +125,43 @@ class TrainingPipeline:
             raise
             
     def _get_training_data(self) -> tuple:
-        """Get data for current training epoch."""
+        """Get data for current training epoch.
+        
+        The window is cached across epochs: only rows stored since the last
+        fetch are queried, and data that has slid out of the window is
+        dropped. New rows are tracked by insert order, so rows written late
+        with an older timestamp are still merged into the window.
+        """
         # Calculate time window for training data
         end_time = datetime.now()
         start_time = end_time - timedelta(
             days=self.config['training']['data_window_days'])
             
-        return self.data_collector.get_training_data(
-            start_time=start_time,
-            end_time=end_time
+        records, adjustments, self._window_cursor = (
+            self.data_collector.get_new_training_records(
+                start_time=start_time,
+                after=self._window_cursor
+            )
+        )
+        
+        if self._window_adjustments is not None:
+            adjustments = pd.concat([self._window_adjustments, adjustments])
+            
+        # Late rows can predate the newest cached state; keep time order
+        if records and self._window_states and records[0][0] < self._window_states[-1][0]:
+            self._window_states = deque(
+                sorted([*self._window_states, *records], key=itemgetter(0)))
+        else:
+            self._window_states.extend(records)
+            
+        # Slide the window forward
+        while self._window_states and self._window_states[0][0] < start_time:
+            self._window_states.popleft()
+        self._window_adjustments = adjustments[adjustments['timestamp'] >= start_time]
+        
+        return (
+            [state for _, state in self._window_states],
+            self.data_collector.process_adjustments(self._window_adjustments)
         )
         
     def _evaluate_model(self) -> Dict[str, float]:
@@ -163,9 +207,60 @@ class TrainingPipeline:
             json.dump(metrics, f)
             
     def _save_checkpoint(self) -> None:
-        """Save training checkpoint."""
+        """Save training checkpoint in the background.
+        
+        The state is snapshotted on the calling thread; only serialization
+        and the disk write run on the checkpoint thread. At most one write
+        is in flight, and a failed write is raised on the next call.
+        """
         checkpoint_path = self.checkpoint_dir / f'checkpoint_epoch_{self.current_epoch}.pt'
-        self.trainer.save_checkpoint(str(checkpoint_path))
+        checkpoint = self.trainer.checkpoint_state()
+        
+        self.wait_for_checkpoints()
+        self._pending_checkpoint = self._checkpoint_pool.submit(
+            self._write_checkpoint, checkpoint_path, checkpoint)
+        
+    def _write_checkpoint(self, path: Path, checkpoint: Dict[str, Any]) -> None:
+        """Write a checkpoint snapshot, then drop the oldest ones.
+        
+        Only the keep_checkpoints most recent epoch checkpoints are kept;
+        the best model is stored separately and never removed.
+        
+        Args:
+            path: Path to save the checkpoint to
+            checkpoint: Snapshot from the trainer's checkpoint_state
+        """
+        self.trainer.save_checkpoint(str(path), checkpoint)
+        
+        if not self.keep_checkpoints:
+            return
+            
+        existing = sorted(
+            self.checkpoint_dir.glob('checkpoint_epoch_*.pt'),
+            key=lambda p: int(p.stem.rsplit('_', 1)[1])
+        )
+        for old_path in existing[:-self.keep_checkpoints]:
+            old_path.unlink(missing_ok=True)
+            logger.debug(f"Removed old checkpoint {old_path}")
+            
+        
+    def wait_for_checkpoints(self) -> None:
+        """Block until any background checkpoint write has finished.
+        
+        Raises:
+            Exception: Whatever the background write raised
+        """
+        pending, self._pending_checkpoint = self._pending_checkpoint, None
+        if pending is not None:
+            pending.result()
+            
+    def close(self) -> None:
+        """Finish checkpoint writes, stop the writer thread and flush feedback."""
+        try:
+            self.wait_for_checkpoints()
+        finally:
+            self._checkpoint_pool.shutdown(wait=True)
+            self.feedback_manager.flush()
         
     def load_best_model(self) -> None:
         """Load the best performing model."""
@@ -185,6 +280,7 @@ class TrainingPipeline:
         Args:
             epoch: Epoch number to resume from
         """
+        self.wait_for_checkpoints()
         checkpoint_path = self.checkpoint_dir / f'checkpoint_epoch_{epoch}.pt'
         if checkpoint_path.exists():
             self.trainer.load_checkpoint(str(checkpoint_path))
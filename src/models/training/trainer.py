@@ -1,8 +1,13 @@
+import contextlib
+import copy
 import logging
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, BinaryIO, List, NamedTuple, Optional, Tuple, Union
 import torch
 import torch.nn as nn
 import torch.optim as optim
+import torch.distributed as dist
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data import DataLoader, Dataset
 from datetime import datetime
 import numpy as np
 from pathlib import Path
@@ -12,6 +17,73 @@ from ...data.storage.database_manager import DatabaseManager
 
 logger = logging.getLogger(__name__)
 
+
+def _detached_copy(obj: Any) -> Any:
+    """Recursively copy a state dict, cloning tensors onto the CPU."""
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to('cpu', copy=True)
+    if isinstance(obj, dict):
+        return {key: _detached_copy(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_detached_copy(value) for value in obj)
+    return copy.deepcopy(obj)
+
+
+class PreparedBatch(NamedTuple):
+    """Featurized training batch, built on the CPU ahead of the forward pass."""
+    features: torch.Tensor        # (B, n_features) float32
+    spreads: torch.Tensor         # (B, len(spread_columns)) mean bid/ask spreads
+    sections: Tuple[str, ...]     # Section order of the prediction columns
+    spread_columns: List[int]     # Prediction columns of bid/ask sections
+
+
+class MarketStateDataset(Dataset):
+    """Map-style dataset over a list of market state dictionaries."""
+    
+    def __init__(self, states: List[Dict[str, Any]]):
+        self.states = states
+        
+    def __len__(self) -> int:
+        return len(self.states)
+        
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        return self.states[index]
+        
+        
+class MarketStateCollator:
+    """Collate market states into a PreparedBatch using the agent's features.
+    
+    Only NumPy work happens here, so it can run in DataLoader workers.
+    """
+    
+    def __init__(self, agent: BaseAgent):
+        self.agent = agent
+        
+    def __call__(self, states: List[Dict[str, Any]]) -> PreparedBatch:
+        sections = self.agent._section_order(states[0])
+        columns = [
+            i for i, section in enumerate(sections)
+            if isinstance(states[0][section], dict)  # bid/ask section
+        ]
+        
+        # Mean spread of every (state, bid/ask section) pair in one pass
+        spreads = np.empty((len(states), len(columns)), dtype=np.float32)
+        if columns:
+            means, _ = self.agent._segment_stats([
+                np.asarray(state[sections[i]]['ask'], dtype=np.float64)
+                - np.asarray(state[sections[i]]['bid'], dtype=np.float64)
+                for state in states for i in columns
+            ])
+            spreads[...] = means.reshape(len(states), len(columns))
+            
+        return PreparedBatch(
+            features=torch.from_numpy(self.agent._extract_features(states)),
+            spreads=torch.from_numpy(spreads),
+            sections=sections,
+            spread_columns=columns
+        )
+
+
 class ModelTrainer:
     """Handles model training and evaluation."""
     
@@ -33,11 +105,44 @@ class ModelTrainer:
         self.config = config
         self.device = agent.device
         
+        # Data-parallel training when launched under torch.distributed;
+        # self.agent stays the bare module for preprocessing and checkpoints
+        self.distributed = dist.is_available() and dist.is_initialized()
+        self.rank = dist.get_rank() if self.distributed else 0
+        self.world_size = dist.get_world_size() if self.distributed else 1
+        if self.distributed:
+            device_ids = [self.device.index] if self.device.type == 'cuda' else None
+            self.model = DistributedDataParallel(agent, device_ids=device_ids)
+            logger.info(
+                f"Training rank {self.rank} of {self.world_size} with DistributedDataParallel"
+            )
+        else:
+            self.model = agent
+            
+        # Optionally fuse the training forward with torch.compile; compiled
+        # in place so state dict keys are unchanged. Skipped when the agent
+        # already compiles its network.
+        agent_compiled = agent.config['model'].get('compile', False)
+        if config['training'].get('compile', False) and not agent_compiled:
+            if hasattr(self.model, 'compile'):
+                self.model.compile(
+                    mode=config['training'].get('compile_mode', 'reduce-overhead'),
+                    dynamic=False
+                )
+            else:
+                logger.warning("torch.compile not available, training eagerly")
+        
         self.optimizer = optim.Adam(
             agent.parameters(),
             lr=config['training']['learning_rate']
         )
         
+        # Featurizes batches on the CPU, in DataLoader workers if configured
+        self.collate = MarketStateCollator(agent)
+        
+        # Device-resident price targets, keyed by per-section target values
+        self._target_cache: Dict[Tuple[float, ...], torch.Tensor] = {}
+        
         # Loss functions for different components
         self.price_loss = nn.MSELoss()
         self.spread_loss = nn.MSELoss()
@@ -72,11 +177,34 @@ class ModelTrainer:
         }
         
         try:
-            # Process data in batches
-            batch_size = self.config['training']['batch_size']
-            for i in range(0, len(train_data), batch_size):
-                batch = train_data[i:i + batch_size]
-                batch_metrics = self._train_batch(batch, user_adjustments)
+            if self.distributed:
+                # Equal-sized shard per rank so every rank runs the same
+                # number of batches (DDP all-reduces on each backward)
+                per_rank = len(train_data) // self.world_size
+                train_data = train_data[self.rank:per_rank * self.world_size:self.world_size]
+                
+            # Featurize batches in background workers (training.num_workers)
+            # into pinned memory so preparation overlaps with training
+            loader = DataLoader(
+                MarketStateDataset(train_data),
+                batch_size=self.config['training']['batch_size'],
+                shuffle=False,
+                collate_fn=self.collate,
+                num_workers=self.config['training'].get('num_workers', 0),
+                pin_memory=self.device.type == 'cuda'
+            )
+            
+            # Step the optimizer every grad_accum_steps batches and at the
+            # end of the epoch
+            accum_steps = max(1, self.config['training'].get('grad_accum_steps', 1))
+            num_batches = len(loader)
+            for batch_idx, prepared in enumerate(loader):
+                batch_metrics = self._train_step(
+                    prepared,
+                    user_adjustments,
+                    zero_grad=batch_idx % accum_steps == 0,
+                    step=(batch_idx + 1) % accum_steps == 0 or batch_idx == num_batches - 1
+                )
                 
                 # Update epoch metrics
                 for k, v in batch_metrics.items():
@@ -89,6 +217,9 @@ class ModelTrainer:
                 if k != 'num_batches':
                     epoch_metrics[k] /= epoch_metrics['num_batches']
                     
+            if self.distributed:
+                self._average_across_ranks(epoch_metrics)
+                
             # Update history
             for k, v in epoch_metrics.items():
                 if k != 'num_batches':
@@ -103,105 +234,184 @@ class ModelTrainer:
     def _train_batch(
         self,
         batch: List[Dict[str, Any]],
-        user_adjustments: Optional[Dict[str, float]] = None
+        user_adjustments: Optional[Dict[str, float]] = None,
+        zero_grad: bool = True,
+        step: bool = True
     ) -> Dict[str, float]:
         """Train on a single batch.
         
         Args:
             batch: List of market states
             user_adjustments: Optional user adjustments to learn from
+            zero_grad: Whether to clear gradients before this batch
+            step: Whether to step the optimizer after this batch; if False
+                gradients are only accumulated
             
         Returns:
             Batch training metrics
         """
-        self.optimizer.zero_grad()
+        return self._train_step(self.collate(batch), user_adjustments, zero_grad, step)
+        
+    def _train_step(
+        self,
+        prepared: PreparedBatch,
+        user_adjustments: Optional[Dict[str, float]] = None,
+        zero_grad: bool = True,
+        step: bool = True
+    ) -> Dict[str, float]:
+        """Train on a single featurized batch.
+        
+        Args:
+            prepared: Batch from MarketStateCollator
+            user_adjustments: Optional user adjustments to learn from
+            zero_grad: Whether to clear gradients before this batch
+            step: Whether to step the optimizer after this batch; if False
+                gradients are only accumulated
+            
+        Returns:
+            Batch training metrics
+        """
+        if zero_grad:
+            self.optimizer.zero_grad()
         
         try:
-            # Process each state in batch
-            batch_loss = 0.0
-            price_loss = 0.0
-            spread_loss = 0.0
-            
-            for state in batch:
-                # Get model predictions
-                state_tensor = self.agent.preprocess_state(state)
-                predictions = self.agent(state_tensor)
-                
-                # Calculate losses
-                if user_adjustments:
-                    # Learn from user adjustments
-                    target_adjustments = []
-                    for section in state.keys():
-                        target_adjustments.append(user_adjustments.get(section, 0.0))
-                    target_tensor = torch.tensor(
-                        target_adjustments,
-                        dtype=torch.float32,
-                        device=self.device
-                    )
-                    price_loss += self.price_loss(predictions, target_tensor)
-                
-                # Add spread maintenance loss
-                spread_loss += self._calculate_spread_loss(state, predictions)
+            # One forward pass over the whole batch; pinned inputs are
+            # copied asynchronously
+            features = prepared.features.to(self.device, non_blocking=True)
+            predictions = self.model(features)  # (B, S)
+            
+            # Calculate losses, summed over the states in the batch
+            if user_adjustments:
+                # Learn from user adjustments; targets are per section
+                target_tensor = self._price_targets(
+                    user_adjustments, prepared.sections
+                ).expand_as(predictions)
+                price_loss = self.price_loss(predictions, target_tensor) * len(features)
+            else:
+                price_loss = torch.zeros((), device=self.device)
                 
+            # Add spread maintenance loss
+            spread_loss = self._calculate_spread_loss(prepared, predictions)
+            
             # Combine losses
             total_loss = price_loss + self.config['training']['spread_weight'] * spread_loss
             
-            # Backpropagate
-            total_loss.backward()
-            self.optimizer.step()
+            # Backpropagate; accumulation steps skip the DDP all-reduce
+            sync_context = (
+                self.model.no_sync() if self.distributed and not step
+                else contextlib.nullcontext()
+            )
+            with sync_context:
+                total_loss.backward()
+            if step:
+                self.optimizer.step()
             
-            return {
-                'total_loss': total_loss.item(),
-                'price_loss': price_loss.item(),
-                'spread_loss': spread_loss.item()
-            }
+            # Read all three losses back in a single device sync
+            with torch.no_grad():
+                losses = torch.stack([total_loss, price_loss, spread_loss]).tolist()
+            return dict(zip(('total_loss', 'price_loss', 'spread_loss'), losses))
             
         except Exception as e:
             logger.error(f"Error in batch training: {e}")
             raise
             
+    def _price_targets(
+        self,
+        user_adjustments: Dict[str, float],
+        sections: Tuple[str, ...]
+    ) -> torch.Tensor:
+        """Get the per-section price target vector on the device.
+        
+        Targets are the same for every batch of an epoch, so the device
+        tensor is built once and reused instead of copied per batch.
+        
+        Args:
+            user_adjustments: User adjustments to learn from
+            sections: Section order of the prediction columns
+            
+        Returns:
+            Target tensor of shape (S,)
+        """
+        key = tuple(float(user_adjustments.get(section, 0.0)) for section in sections)
+        target = self._target_cache.get(key)
+        if target is None:
+            if len(self._target_cache) >= 64:
+                self._target_cache.clear()
+            target = torch.tensor(key, dtype=torch.float32, device=self.device)
+            self._target_cache[key] = target
+        return target
+        
+    def _average_across_ranks(self, metrics: Dict[str, float]) -> None:
+        """Average epoch loss metrics over all ranks for logging.
+        
+        Args:
+            metrics: Epoch metrics, updated in place
+        """
+        keys = [k for k in metrics if k != 'num_batches']
+        values = torch.tensor([metrics[k] for k in keys], device=self.device)
+        dist.all_reduce(values)
+        values /= self.world_size
+        metrics.update(zip(keys, values.tolist()))
+        
     def _calculate_spread_loss(
         self,
-        state: Dict[str, Any],
+        prepared: PreparedBatch,
         predictions: torch.Tensor
     ) -> torch.Tensor:
         """Calculate loss for maintaining reasonable spreads.
         
         Args:
-            state: Current market state
-            predictions: Model's price adjustment predictions
+            prepared: Featurized batch carrying the current spreads
+            predictions: Model's price adjustment predictions, shape (B, S)
             
         Returns:
-            Spread maintenance loss
+            Spread maintenance loss, summed over the batch
         """
-        loss = torch.tensor(0.0, device=self.device)
+        if not prepared.spread_columns:
+            return torch.zeros((), device=self.device)
+            
+        current_spread = prepared.spreads.to(self.device, non_blocking=True)
         
-        for i, (section, data) in enumerate(state.items()):
-            if isinstance(data, dict):  # bid/ask section
-                current_spread = torch.mean(
-                    torch.tensor(data['ask'].values - data['bid'].values)
-                )
-                adjustment = predictions[i]
-                
-                # Penalize if adjustment would make spread too small
-                min_spread = self.config['training']['min_spread']
-                if current_spread + adjustment < min_spread:
-                    loss += (min_spread - (current_spread + adjustment)) ** 2
-                    
-        return loss
+        # Penalize adjustments that would make the spread too small
+        min_spread = self.config['training']['min_spread']
+        new_spread = current_spread + predictions[:, prepared.spread_columns]
+        return torch.relu(min_spread - new_spread).pow(2).sum()
         
-    def save_checkpoint(self, path: str) -> None:
-        """Save training checkpoint.
+    def checkpoint_state(self) -> Dict[str, Any]:
+        """Snapshot the training state for checkpointing.
         
-        Args:
-            path: Path to save checkpoint
+        Tensors are cloned to the CPU and containers copied, so the snapshot
+        can be written out while training keeps updating the live state.
+        
+        Returns:
+            Checkpoint dictionary accepted by save_checkpoint
         """
-        checkpoint = {
+        return _detached_copy({
             'model_state': self.agent.state_dict(),
             'optimizer_state': self.optimizer.state_dict(),
             'metrics_history': self.metrics_history,
             'config': self.config
-        }
+        })
+        
+    def save_checkpoint(
+        self,
+        path: Union[str, BinaryIO],
+        checkpoint: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Save training checkpoint.
+        
+        Args:
+            path: Path or writable binary file object to save checkpoint to
+            checkpoint: Optional snapshot from checkpoint_state; the current
+                state is saved if omitted
+        """
+        if checkpoint is None:
+            checkpoint = {
+                'model_state': self.agent.state_dict(),
+                'optimizer_state': self.optimizer.state_dict(),
+                'metrics_history': self.metrics_history,
+                'config': self.config
+            }
         
         try:
             torch.save(checkpoint, path)
@@ -210,11 +420,11 @@ class ModelTrainer:
             logger.error(f"Failed to save checkpoint: {e}")
             raise
             
-    def load_checkpoint(self, path: str) -> None:
+    def load_checkpoint(self, path: Union[str, BinaryIO]) -> None:
         """Load training checkpoint.
         
         Args:
-            path: Path to load checkpoint from
+            path: Path or readable binary file object to load checkpoint from
         """
         try:
             checkpoint = torch.load(path, map_location=self.device)
@@ -1,16 +1,27 @@
 import logging
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Set, Tuple
 from datetime import datetime
-import json
+import os
+import orjson
 from pathlib import Path
 import shutil
+import bisect
 import hashlib
+import math
+import torch
 
 from ..agents.base_agent import BaseAgent
 from ...data.storage.database_manager import DatabaseManager
+from ...utils.jsonl import migrate_legacy_json, read_jsonl
 
 logger = logging.getLogger(__name__)
 
+# Metrics and configs often carry numpy scalars
+_JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY
+
+# Bytes of tensor storage moved to the CPU per hash update
+_HASH_CHUNK_BYTES = 4 << 20
+
 class ModelVersionManager:
     """Manages model versions and deployment."""
     
@@ -42,6 +53,21 @@ class ModelVersionManager:
         # Load version history
         self.version_history = self._load_version_history()
         
+        # Per-metric (value, version_id) lists sorted by value, plus the
+        # versions that report each metric, for threshold filtering
+        self._metric_index: Dict[str, List[Tuple[float, str]]] = {}
+        self._metric_versions: Dict[str, Set[str]] = {}
+        for metadata in self.version_history.values():
+            self._index_metrics(metadata)
+            
+        # Latest version per (weights hash, serialized config), so identical
+        # models can share a saved file instead of being pickled again
+        self._versions_by_content: Dict[Tuple[str, bytes], str] = {}
+        for version_id, metadata in self.version_history.items():
+            if 'hash' in metadata:
+                key = (metadata['hash'], self._config_key(metadata['config']))
+                self._versions_by_content[key] = version_id
+        
     def register_model(
         self,
         model: BaseAgent,
@@ -66,13 +92,17 @@ class ModelVersionManager:
             model_hash = self._compute_model_hash(model)
             version_id = f"v{timestamp}_{model_hash[:8]}"
             
-            # Create version directory
-            version_dir = self.models_dir / version_id
-            version_dir.mkdir()
+            # Create version directory; the same model registered twice
+            # within a second gets a numbered suffix
+            version_dir = self._create_version_dir(version_id)
+            version_id = version_dir.name
             
             # Save model and metadata
             model_path = version_dir / 'model.pt'
-            model.save(str(model_path))
+            content_key = (model_hash, self._config_key(model.config))
+            if not self._link_saved_model(content_key, model_path):
+                model.save(str(model_path))
+            self._versions_by_content[content_key] = version_id
             
             metadata = {
                 'version_id': version_id,
@@ -85,12 +115,13 @@ class ModelVersionManager:
             }
             
             metadata_path = version_dir / 'metadata.json'
-            with open(metadata_path, 'w') as f:
-                json.dump(metadata, f, indent=2)
+            with open(metadata_path, 'wb') as f:
+                f.write(orjson.dumps(metadata, option=_JSON_OPTIONS | orjson.OPT_INDENT_2))
                 
             # Update version history
             self.version_history[version_id] = metadata
-            self._save_version_history()
+            self._index_metrics(metadata)
+            self._append_version_history(metadata)
             
             logger.info(f"Registered new model version: {version_id}")
             return version_id
@@ -99,6 +130,54 @@ class ModelVersionManager:
             logger.error(f"Error registering model: {e}")
             raise
             
+    def _create_version_dir(self, version_id: str) -> Path:
+        """Create a fresh directory for a new version.
+        
+        Args:
+            version_id: Preferred version identifier
+            
+        Returns:
+            The created directory, named version_id or version_id_<n>
+        """
+        name = version_id
+        suffix = 1
+        while True:
+            version_dir = self.models_dir / name
+            try:
+                version_dir.mkdir()
+                return version_dir
+            except FileExistsError:
+                suffix += 1
+                name = f"{version_id}_{suffix}"
+                
+    @staticmethod
+    def _config_key(config: Dict[str, Any]) -> bytes:
+        """Canonical serialization of a model config for content lookups."""
+        return orjson.dumps(config, option=_JSON_OPTIONS | orjson.OPT_SORT_KEYS)
+        
+    def _link_saved_model(self, content_key: Tuple[str, bytes], model_path: Path) -> bool:
+        """Hard-link the saved file of an identical, earlier version.
+        
+        Registered versions are never modified, so sharing the inode is safe.
+        
+        Args:
+            content_key: Weights hash and serialized config of the model
+            model_path: Destination path for the new version's model file
+            
+        Returns:
+            True if model_path was linked, False if the model must be saved
+        """
+        previous = self._versions_by_content.get(content_key)
+        if previous is None:
+            return False
+            
+        try:
+            os.link(self.models_dir / previous / 'model.pt', model_path)
+            logger.debug(f"Reused saved model of {previous} for {model_path}")
+            return True
+        except OSError:
+            return False
+            
     def activate_version(self, version_id: str) -> None:
         """Activate a specific model version.
         
@@ -110,31 +189,82 @@ class ModelVersionManager:
             if not version_dir.exists():
                 raise ValueError(f"Version {version_id} not found")
                 
-            # Archive current active version if exists
-            current_active = list(self.active_dir.glob('*'))
-            if current_active:
-                for item in current_active:
-                    archive_path = self.archive_dir / item.name
-                    shutil.move(str(item), str(archive_path))
-                    
-            # Copy new version to active directory
+            # Point the active directory at the version instead of copying
+            # it; the link is created under a hidden name and renamed into
+            # place so it appears atomically
             active_path = self.active_dir / version_id
-            shutil.copytree(str(version_dir), str(active_path))
+            if active_path.is_dir() and not active_path.is_symlink():
+                # A copied-in version can't be replaced by a link in one step
+                self._archive_active(active_path)
+            tmp_link = self.active_dir / f".{version_id}.tmp"
+            if tmp_link.is_symlink():
+                tmp_link.unlink()
+            tmp_link.symlink_to(version_dir.resolve(), target_is_directory=True)
+            self._order_after_active(tmp_link)
+            os.replace(tmp_link, active_path)
             
+            # Only then archive the previous version, so there is always an
+            # active version
+            for item in self.active_dir.glob('*'):
+                if item != active_path and not item.name.startswith('.'):
+                    self._archive_active(item)
+                    
             logger.info(f"Activated model version: {version_id}")
             
         except Exception as e:
             logger.error(f"Error activating version: {e}")
             raise
             
+    def _order_after_active(self, link: Path) -> None:
+        """Make a new link's mtime later than every active entry's.
+        
+        get_active_version picks the most recently linked entry, so links
+        made within the filesystem's timestamp granularity must not tie.
+        
+        Args:
+            link: Newly created symlink in the active directory
+        """
+        latest = max(
+            (item.lstat().st_mtime_ns for item in self.active_dir.glob('*')
+             if item != link),
+            default=0
+        )
+        if link.lstat().st_mtime_ns <= latest and os.utime in os.supports_follow_symlinks:
+            os.utime(link, ns=(latest + 1, latest + 1), follow_symlinks=False)
+            
+    def _archive_active(self, item: Path) -> None:
+        """Move an entry out of the active directory into the archive.
+        
+        Active entries are symlinks into models/, so archiving usually just
+        renames the link.
+        
+        Args:
+            item: Entry in the active directory
+        """
+        archive_path = self.archive_dir / item.name
+        if item.is_symlink() and not (
+            archive_path.is_dir() and not archive_path.is_symlink()
+        ):
+            os.replace(item, archive_path)
+        else:
+            shutil.move(str(item), str(archive_path))
+            
     def get_active_version(self) -> Optional[str]:
         """Get currently active model version.
         
+        While an activation is in progress the outgoing version is briefly
+        still present; the most recently linked entry is the active one.
+        
         Returns:
             Active version ID or None if no active version
         """
-        active_versions = list(self.active_dir.glob('*'))
-        return active_versions[0].name if active_versions else None
+        active_versions = [
+            item for item in self.active_dir.glob('*')
+            if not item.name.startswith('.')
+        ]
+        if not active_versions:
+            return None
+        return max(active_versions, key=lambda item: item.lstat().st_mtime_ns).name
         
     def get_version_info(self, version_id: str) -> Dict[str, Any]:
         """Get information about a specific version.
@@ -161,8 +291,16 @@ class ModelVersionManager:
         Returns:
             List of version metadata dictionaries
         """
-        versions = list(self.version_history.values())
-        
+        # Filter by metrics using the sorted metric index
+        if metric_threshold:
+            version_ids = None
+            for metric, threshold in metric_threshold.items():
+                matching = self._versions_meeting(metric, threshold)
+                version_ids = matching if version_ids is None else version_ids & matching
+            versions = [self.version_history[v] for v in version_ids]
+        else:
+            versions = list(self.version_history.values())
+            
         # Filter by tags
         if tags:
             versions = [
@@ -170,48 +308,91 @@ class ModelVersionManager:
                 if any(tag in v['tags'] for tag in tags)
             ]
             
-        # Filter by metrics
-        if metric_threshold:
-            versions = [
-                v for v in versions
-                if all(
-                    v['metrics'].get(metric, 0) >= threshold
-                    for metric, threshold in metric_threshold.items()
-                )
-            ]
-            
         return sorted(
             versions,
             key=lambda x: x['timestamp'],
             reverse=True
         )
         
+    def _index_metrics(self, metadata: Dict[str, Any]) -> None:
+        """Add a version's metrics to the metric index.
+        
+        Args:
+            metadata: Version metadata record
+        """
+        version_id = metadata['version_id']
+        for metric, value in (metadata.get('metrics') or {}).items():
+            self._metric_versions.setdefault(metric, set()).add(version_id)
+            if isinstance(value, (int, float)) and not math.isnan(value):
+                index = self._metric_index.setdefault(metric, [])
+                bisect.insort(index, (float(value), version_id))
+                
+    def _versions_meeting(self, metric: str, threshold: float) -> Set[str]:
+        """Get the versions whose metric is at least threshold.
+        
+        Versions that don't report the metric count as 0, as before.
+        
+        Args:
+            metric: Metric name
+            threshold: Minimum metric value
+            
+        Returns:
+            Matching version IDs
+        """
+        index = self._metric_index.get(metric, [])
+        start = bisect.bisect_left(index, (threshold,))
+        matching = {version_id for _, version_id in index[start:]}
+        if threshold <= 0:
+            matching |= self.version_history.keys() - self._metric_versions.get(metric, set())
+        return matching
+        
     def _compute_model_hash(self, model: BaseAgent) -> str:
         """Compute hash of model state for versioning.
         
+        Always hashes the current weights: writes through ``.data`` bypass
+        autograd version counters, so no cheap cache key is reliable.
+        
         Args:
             model: The model to hash
             
         Returns:
             Hash string
         """
-        state_dict = model.state_dict()
-        state_bytes = json.dumps(
-            {k: v.tolist() for k, v in state_dict.items()},
-            sort_keys=True
-        ).encode()
-        return hashlib.sha256(state_bytes).hexdigest()
+        state_dict = model.state_dict(keep_vars=True)
+        digest = hashlib.sha256()
+        for key in sorted(state_dict):
+            tensor = state_dict[key].detach()
+            digest.update(f"{key}:{tensor.dtype}:{tuple(tensor.shape)}".encode())
+            # Hash the raw storage bytes in bounded chunks so device tensors
+            # are never copied to the CPU whole; viewing as uint8 works for
+            # any dtype and CPU chunks are hashed without copying
+            flat = tensor.reshape(-1).view(torch.uint8)
+            for chunk in flat.split(_HASH_CHUNK_BYTES):
+                digest.update(chunk.cpu().numpy())
+        return digest.hexdigest()
         
     def _load_version_history(self) -> Dict[str, Dict[str, Any]]:
-        """Load version history from disk."""
-        history_path = self.base_dir / 'version_history.json'
+        """Load version history from disk.
+        
+        History is an append-only JSONL log with one metadata record per
+        registered version; the old single JSON document is migrated once.
+        """
+        history_path = self.base_dir / 'version_history.jsonl'
+        legacy_path = self.base_dir / 'version_history.json'
+        migrate_legacy_json(legacy_path, {history_path: dict.values})
+        
+        history: Dict[str, Dict[str, Any]] = {}
         if history_path.exists():
-            with open(history_path, 'r') as f:
-                return json.load(f)
-        return {}
-        
-    def _save_version_history(self) -> None:
-        """Save version history to disk."""
-        history_path = self.base_dir / 'version_history.json'
-        with open(history_path, 'w') as f:
-            json.dump(self.version_history, f, indent=2) 
\ No newline at end of file
+            for metadata in read_jsonl(history_path):
+                history[metadata['version_id']] = metadata
+        return history
+        
+    def _append_version_history(self, metadata: Dict[str, Any]) -> None:
+        """Append one version's metadata to the history log on disk.
+        
+        Args:
+            metadata: Version metadata record
+        """
+        history_path = self.base_dir / 'version_history.jsonl'
+        with open(history_path, 'ab') as f:
+            f.write(orjson.dumps(metadata, option=_JSON_OPTIONS) + b'\n')
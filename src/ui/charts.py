@@ -0,0 +1,79 @@
+"""Chart helpers shared by the dashboard pages.
+
+Long metric histories are downsampled with Largest-Triangle-Three-Buckets
+(LTTB) before plotting, which keeps the visual shape of a series (peaks,
+dips) while sending only a bounded number of points to the browser.
+"""
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+# Points per series sent to the browser
+MAX_CHART_POINTS = 2000
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Select the indices of at most max_points representative points.
+    
+    Args:
+        x: Monotonic x values as floats
+        y: y values, same length as x
+        max_points: Number of points to keep, including both endpoints
+    
+    Returns:
+        Sorted indices into x and y
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    
+    # First and last points are always kept; the rest is split into
+    # max_points - 2 buckets, each contributing one point
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.intp)
+    selected = np.empty(max_points, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    
+    a = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        
+        # Average of the next bucket (or the last point) as the third vertex
+        if i + 2 < len(edges):
+            next_x = x[end:edges[i + 2]].mean()
+            next_y = y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[n - 1], y[n - 1]
+        
+        # Keep the point forming the largest triangle with the previous pick
+        area = np.abs(
+            (x[a] - next_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (next_y - y[a])
+        )
+        a = start + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        selected[i + 1] = a
+    
+    return selected
+
+def downsample_series(
+    x: pd.Series,
+    y: pd.Series,
+    max_points: int = MAX_CHART_POINTS
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Downsample a time series for plotting.
+    
+    Args:
+        x: Timestamps (datetimes or ISO strings)
+        y: Metric values
+        max_points: Maximum number of points to return
+    
+    Returns:
+        Tuple of (timestamps, values) as NumPy arrays
+    """
+    timestamps = pd.to_datetime(x, format='ISO8601').to_numpy()
+    values = pd.to_numeric(y, errors='coerce').to_numpy(dtype=np.float64)
+    if len(values) <= max_points:
+        return timestamps, values
+    
+    positions = timestamps.astype('datetime64[ns]').view(np.int64).astype(np.float64)
+    keep = lttb_indices(positions, values, max_points)
+    return timestamps[keep], values[keep]
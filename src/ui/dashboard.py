@@ -6,6 +6,8 @@ from datetime import datetime, timedelta
 import time
 import json
 
+from src.ui.charts import downsample_series
+
 # API Configuration
 API_BASE_URL = "http://localhost:8000"
 
@@ -16,6 +18,23 @@ def init_session_state():
     if 'last_refresh' not in st.session_state:
         st.session_state.last_refresh = datetime.now()
 
+@st.cache_data(ttl=300, max_entries=32, show_spinner=False)
+def fetch_json(endpoint: str, refresh_key: str):
+    """GET an API endpoint, cached until the next dashboard refresh.
+    
+    Widget interactions rerun the script without a new refresh_key, so
+    they are served from the cache instead of hitting the API again.
+    """
+    response = requests.get(f"{API_BASE_URL}{endpoint}")
+    return response.json()
+
+@st.cache_data(ttl=300, max_entries=32, show_spinner=False)
+def fetch_versions_df(refresh_key: str) -> pd.DataFrame:
+    """Get model versions as a DataFrame, newest first, cached like fetch_json."""
+    version_df = pd.DataFrame(fetch_json("/versions", refresh_key))
+    version_df['timestamp'] = pd.to_datetime(version_df['timestamp'])
+    return version_df.sort_values('timestamp', ascending=False)
+
 def format_timestamp(timestamp: str) -> str:
     """Format timestamp for display."""
     dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
@@ -24,12 +43,12 @@ def format_timestamp(timestamp: str) -> str:
 def create_metric_chart(history: list, metric_name: str) -> go.Figure:
     """Create a time series chart for a metric."""
     df = pd.DataFrame(history)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    x, y = downsample_series(df['timestamp'], df[metric_name])
     
     fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=df['timestamp'],
-        y=df[metric_name],
+    fig.add_trace(go.Scattergl(
+        x=x,
+        y=y,
         mode='lines+markers',
         name=metric_name
     ))
@@ -74,14 +93,14 @@ def main():
         st.session_state.last_refresh = datetime.now()
         st.experimental_rerun()
         
+    refresh_key = st.session_state.last_refresh.isoformat()
+        
     try:
         # Get current status
-        status_response = requests.get(f"{API_BASE_URL}/status")
-        status = status_response.json()
+        status = fetch_json("/status", refresh_key)
         
         # Get metrics
-        metrics_response = requests.get(f"{API_BASE_URL}/metrics")
-        metrics = metrics_response.json()
+        metrics = fetch_json("/metrics", refresh_key)
         
         # Status Section
         st.header("System Status")
@@ -163,12 +182,7 @@ def main():
             
         # Model Versions
         st.header("Model Versions")
-        versions_response = requests.get(f"{API_BASE_URL}/versions")
-        versions = versions_response.json()
-        
-        version_df = pd.DataFrame(versions)
-        version_df['timestamp'] = pd.to_datetime(version_df['timestamp'])
-        version_df = version_df.sort_values('timestamp', ascending=False)
+        version_df = fetch_versions_df(refresh_key)
         
         st.dataframe(
             version_df[['version_id', 'timestamp', 'description', 'tags']],
@@ -205,6 +219,8 @@ def main():
                     )
                     result = response.json()
                     if result['success']:
+                        fetch_json.clear()
+                        fetch_versions_df.clear()
                         st.success(result['message'])
                     else:
                         st.error(result['message'])
@@ -214,6 +230,8 @@ def main():
                     response = requests.post(f"{API_BASE_URL}/rollback")
                     result = response.json()
                     if result['success']:
+                        fetch_json.clear()
+                        fetch_versions_df.clear()
                         st.success("Rollback successful")
                     else:
                         st.error("Rollback failed")
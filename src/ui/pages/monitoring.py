@@ -2,28 +2,45 @@ import streamlit as st
 import requests
 import pandas as pd
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 from datetime import datetime, timedelta
 
+from src.ui.charts import downsample_series
+
 API_BASE_URL = "http://localhost:8000"
 
-def create_metric_chart(data: list, metric_name: str, title: str) -> go.Figure:
-    """Create a time series chart for a metric."""
+def create_metrics_figure(
+    data: list,
+    panels: list,
+    cols: int = 2,
+    panel_height: int = 400
+) -> go.Figure:
+    """Create one figure with a downsampled WebGL subplot per (metric, title) panel."""
     df = pd.DataFrame(data)
+    rows = -(-len(panels) // cols)
     
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=df['timestamp'],
-        y=df[metric_name],
-        mode='lines+markers',
-        name=metric_name
-    ))
-    
-    fig.update_layout(
-        title=title,
-        xaxis_title="Time",
-        yaxis_title="Value",
-        height=400
+    fig = make_subplots(
+        rows=rows,
+        cols=cols,
+        shared_xaxes=True,
+        subplot_titles=[title for _, title in panels]
     )
+    for i, (metric_name, _) in enumerate(panels):
+        x, y = downsample_series(df['timestamp'], df[metric_name])
+        fig.add_trace(
+            go.Scattergl(
+                x=x,
+                y=y,
+                mode='lines+markers',
+                name=metric_name
+            ),
+            row=i // cols + 1,
+            col=i % cols + 1
+        )
+        
+    fig.update_xaxes(title_text="Time", row=rows)
+    fig.update_yaxes(title_text="Value", col=1)
+    fig.update_layout(height=panel_height * rows, showlegend=False)
     
     return fig
 
@@ -63,61 +80,31 @@ def main():
         
         # Create performance charts
         perf_metrics = metrics['performance']
-        col1, col2 = st.columns(2)
+        perf_chart = create_metrics_figure(
+            perf_metrics['history'],
+            [
+                ('latency_ms', 'Prediction Latency'),
+                ('error_rate', 'Error Rate'),
+                ('throughput', 'Prediction Throughput'),
+                ('accuracy', 'Prediction Accuracy')
+            ]
+        )
+        st.plotly_chart(perf_chart, use_container_width=True)
         
-        with col1:
-            latency_chart = create_metric_chart(
-                perf_metrics['history'],
-                'latency_ms',
-                'Prediction Latency'
-            )
-            st.plotly_chart(latency_chart, use_container_width=True)
-            
-            throughput_chart = create_metric_chart(
-                perf_metrics['history'],
-                'throughput',
-                'Prediction Throughput'
-            )
-            st.plotly_chart(throughput_chart, use_container_width=True)
-            
-        with col2:
-            error_chart = create_metric_chart(
-                perf_metrics['history'],
-                'error_rate',
-                'Error Rate'
-            )
-            st.plotly_chart(error_chart, use_container_width=True)
-            
-            accuracy_chart = create_metric_chart(
-                perf_metrics['history'],
-                'accuracy',
-                'Prediction Accuracy'
-            )
-            st.plotly_chart(accuracy_chart, use_container_width=True)
-            
         # System Health
         st.header("System Health")
         
         # Create health charts
         health_metrics = metrics['health']
-        col1, col2 = st.columns(2)
+        health_chart = create_metrics_figure(
+            health_metrics['history'],
+            [
+                ('memory_usage', 'Memory Usage (MB)'),
+                ('cpu_usage', 'CPU Usage (%)')
+            ]
+        )
+        st.plotly_chart(health_chart, use_container_width=True)
         
-        with col1:
-            memory_chart = create_metric_chart(
-                health_metrics['history'],
-                'memory_usage',
-                'Memory Usage (MB)'
-            )
-            st.plotly_chart(memory_chart, use_container_width=True)
-            
-        with col2:
-            cpu_chart = create_metric_chart(
-                health_metrics['history'],
-                'cpu_usage',
-                'CPU Usage (%)'
-            )
-            st.plotly_chart(cpu_chart, use_container_width=True)
-            
         # Alerts History
         st.header("Alerts History")
         if metrics['alerts']:
@@ -0,0 +1,26 @@
+"""Optional numba JIT support.
+
+Numeric kernels decorated with :func:`njit` are compiled with numba when it
+is installed and run as plain Python functions otherwise, so numba stays an
+optional dependency.
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    logger.debug("numba not installed, JIT kernels will run as plain Python")
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for ``numba.njit``."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
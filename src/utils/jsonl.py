@@ -0,0 +1,85 @@
+"""Append-only JSONL history files.
+
+Histories are written one record per line so appends never rewrite the
+file. A crash mid-append can leave a truncated last line, so readers skip
+records that don't decode instead of failing to load the whole history.
+"""
+import logging
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Mapping
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+def decode_records(lines: Iterable[bytes], path: Path) -> Iterator[Any]:
+    """Decode JSONL lines, skipping blank and corrupt ones.
+
+    Args:
+        lines: Raw lines read from the file
+        path: File the lines came from, for the warning
+
+    Yields:
+        Decoded records in file order
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield orjson.loads(line)
+        except orjson.JSONDecodeError:
+            logger.warning(f"Skipping corrupt record in {path}")
+
+def read_jsonl(path: Path) -> Iterator[Any]:
+    """Read every decodable record of a JSONL file.
+
+    Args:
+        path: File to read
+
+    Yields:
+        Decoded records in file order
+    """
+    with open(path, 'rb') as f:
+        yield from decode_records(f, path)
+
+def write_jsonl(path: Path, records: Iterable[Any]) -> None:
+    """Atomically replace a JSONL file with the given records.
+
+    Args:
+        path: File to write
+        records: Records to serialize, one per line
+    """
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.writelines(orjson.dumps(record) + b'\n' for record in records)
+    tmp_path.replace(path)
+
+def migrate_legacy_json(
+    legacy_path: Path,
+    targets: Mapping[Path, Callable[[Any], Iterable[Any]]]
+) -> None:
+    """Convert an old single-document JSON history to JSONL files, once.
+
+    Nothing happens if the legacy file is missing or any target already
+    exists. A legacy file that doesn't decode is left in place for manual
+    recovery and the history starts empty.
+
+    Args:
+        legacy_path: Old JSON document
+        targets: JSONL path for each history, mapped to a function that
+            extracts its records from the legacy document
+    """
+    if not legacy_path.exists() or any(path.exists() for path in targets):
+        return
+
+    try:
+        with open(legacy_path, 'rb') as f:
+            document = orjson.loads(f.read())
+    except orjson.JSONDecodeError:
+        logger.warning(f"Not migrating corrupt legacy history {legacy_path}")
+        return
+
+    for path, extract in targets.items():
+        write_jsonl(path, extract(document))
+    legacy_path.unlink()
+    logger.info(f"Migrated {legacy_path} to JSONL")
@@ -1,10 +1,14 @@
+import atexit
+import copy
 import logging
 import os
+import queue
 import sys
-from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 
+import orjson
 import pythonjsonlogger.jsonlogger as jsonlogger
 from dotenv import load_dotenv
 
@@ -15,18 +19,67 @@ load_dotenv()
 log_dir = Path("logs")
 log_dir.mkdir(exist_ok=True)
 
+# Background listeners that format and write records, one per logger
+_listeners = []
+
+@atexit.register
+def _stop_listeners():
+    """Flush queued records to their handlers on interpreter exit."""
+    for listener in _listeners:
+        listener.stop()
+
+class _ExcTextQueueHandler(QueueHandler):
+    """QueueHandler that keeps the traceback as the record's exc_text.
+    
+    The stock prepare() merges the formatted traceback into the message
+    and clears exc_info and exc_text, so the JSON formatter lost its
+    exc_info field.
+    """
+    _exc_formatter = logging.Formatter()
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The traceback is rendered before enqueueing so no frames are
+        # kept alive on the queue
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self._exc_formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
 class CustomJsonFormatter(jsonlogger.JsonFormatter):
+    # Timestamps come from record.created, set when the record was made, as
+    # epoch seconds by default; LOG_TIMESTAMP_FORMAT=iso emits UTC ISO 8601
+    iso_timestamps = os.getenv('LOG_TIMESTAMP_FORMAT', 'epoch').lower() == 'iso'
+    
     def add_fields(self, log_record, record, message_dict):
         super(CustomJsonFormatter, self).add_fields(log_record, record, message_dict)
-        log_record['timestamp'] = datetime.utcnow().isoformat()
+        if self.iso_timestamps:
+            log_record['timestamp'] = datetime.fromtimestamp(record.created, timezone.utc).isoformat()
+        else:
+            log_record['timestamp'] = record.created
         log_record['level'] = record.levelname
         log_record['module'] = record.module
         log_record['function'] = record.funcName
+        
+    def jsonify_log_record(self, log_record):
+        # orjson handles datetimes and numpy scalars natively; anything
+        # else falls back to str() like the stdlib encoder does
+        return orjson.dumps(
+            log_record,
+            default=str,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        ).decode()
 
 def setup_logger(name: str = __name__) -> logging.Logger:
     """
     Set up a logger with both file and console handlers.
     
+    The handlers run on a background QueueListener thread, so logging from
+    latency-sensitive code only costs an enqueue.
+    
     Args:
         name (str): Name of the logger
         
@@ -65,8 +118,19 @@ def setup_logger(name: str = __name__) -> logging.Logger:
     console_handler.setFormatter(formatter)
     file_handler.setFormatter(formatter)
 
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    # Log calls only enqueue the record; formatting and console/file I/O
+    # (including rotation) happen on the listener's background thread
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(
+        log_queue,
+        console_handler,
+        file_handler,
+        respect_handler_level=True
+    )
+    listener.start()
+    _listeners.append(listener)
+
+    logger.addHandler(_ExcTextQueueHandler(log_queue))
 
     return logger
 
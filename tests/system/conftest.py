@@ -1,18 +1,28 @@
 import pytest
 import os
+import socket
 import subprocess
 import time
 import requests
+from requests.adapters import HTTPAdapter
 from pathlib import Path
+from types import MappingProxyType
 import json
-import pandas as pd
 import numpy as np
 from typing import Dict, Any
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
 
 from src.models.deployment.deployment_manager import DeploymentManager
 from src.models.serving.model_server import ModelServer
 from src.models.monitoring.monitor import ModelMonitor
 from src.data.storage.database_manager import DatabaseManager
+from src.api.routes import (
+    router,
+    get_deployment_manager,
+    get_model_server,
+    get_model_monitor
+)
 
 @pytest.fixture(scope="session")
 def test_config():
@@ -60,48 +70,112 @@ def test_db():
         db_path.unlink()
 
 @pytest.fixture(scope="session")
-def api_process():
-    """Start API server for testing."""
+def api_client(system_components):
+    """In-process client for the API, without starting a server.
+    
+    Routes are wired to the session's system_components, so tests can
+    inspect (and flush) the same server, monitor and deployment manager
+    that handle their requests.
+    """
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_model_server] = lambda: system_components['server']
+    app.dependency_overrides[get_model_monitor] = lambda: system_components['monitor']
+    app.dependency_overrides[get_deployment_manager] = lambda: system_components['deployment']
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture(scope="session")
+def http():
+    """Shared HTTP session so real-server calls reuse pooled connections."""
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=20, pool_maxsize=20))
+    yield session
+    session.close()
+
+@pytest.fixture(scope="session")
+def api_process(http):
+    """Start API server for testing.
+    
+    Only needed to check uvicorn bootstrapping; other tests use api_client.
+    """
+    # Ask the OS for a free port so parallel test runs don't collide
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        port = sock.getsockname()[1]
+    base_url = f"http://localhost:{port}"
+    
+    # Output is never read, so don't let it fill a pipe and block the server
     server = subprocess.Popen(
-        ["uvicorn", "src.api.routes:router", "--port", "8001"],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
+        ["uvicorn", "src.api.routes:router", "--port", str(port), "--log-level", "warning"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
     )
     
-    # Wait for server to start
-    time.sleep(2)
+    # Poll until the server answers instead of sleeping a fixed time
+    deadline = time.monotonic() + 5.0
+    while True:
+        try:
+            http.get(f"{base_url}/status", timeout=0.2)
+            break
+        except requests.exceptions.RequestException:
+            if server.poll() is not None or time.monotonic() > deadline:
+                server.terminate()
+                server.wait()
+                pytest.fail("API server did not start")
+            time.sleep(0.05)
     
-    yield "http://localhost:8001"
+    yield base_url
     
     # Cleanup
     server.terminate()
     server.wait()
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def test_market_data():
-    """Generate test market data."""
-    return {
-        'section1': {
-            'bid': pd.Series([100.25, 100.50]),
-            'ask': pd.Series([100.50, 100.75])
-        },
-        'section2': {
-            'bid': pd.Series([50.25, 50.50]),
-            'ask': pd.Series([50.50, 50.75])
-        }
-    }
+    """Generate test market data.
+    
+    Shared by the whole session, so it is read-only; copy it to modify.
+    """
+    return MappingProxyType({
+        'section1': MappingProxyType({
+            'bid': np.array([100.25, 100.50], dtype=np.float64),
+            'ask': np.array([100.50, 100.75], dtype=np.float64)
+        }),
+        'section2': MappingProxyType({
+            'bid': np.array([50.25, 50.50], dtype=np.float64),
+            'ask': np.array([50.50, 50.75], dtype=np.float64)
+        })
+    })
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def system_components(test_config, test_db):
-    """Initialize system components."""
+    """Initialize system components once for the whole session.
+    
+    Tests that need clean monitoring or deployment state should request
+    system_components_reset instead.
+    """
     model_server = ModelServer(None, test_db, test_config)
     model_monitor = ModelMonitor(test_db, test_config)
     deployment_manager = DeploymentManager(
         None, model_server, model_monitor, test_db, test_config
     )
     
-    return {
+    yield {
         'server': model_server,
         'monitor': model_monitor,
         'deployment': deployment_manager
-    } 
\ No newline at end of file
+    }
+    
+    # Cleanup: write queued predictions before test_db is removed
+    model_server.flush()
+    model_server.shutdown()
+    deployment_manager.shutdown()
+    model_monitor.shutdown()
+
+@pytest.fixture
+def system_components_reset(system_components):
+    """Shared system components with metrics and deployment history cleared."""
+    system_components['monitor'].clear_metrics()
+    system_components['deployment'].deployment_history.clear()
+    return system_components
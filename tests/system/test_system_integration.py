@@ -1,16 +1,28 @@
+import asyncio
+import httpx
 import pytest
-import requests
 import json
 import time
 from datetime import datetime, timedelta
 
-def test_end_to_end_workflow(api_process, test_market_data):
+PREDICT_PAYLOAD = {
+    'instrument_id': 'section1',
+    'bid_prices': [100.25],
+    'ask_prices': [100.50]
+}
+
+def get_json(client, path):
+    """GET an endpoint, check it succeeded and return the decoded body."""
+    response = client.get(path)
+    assert response.status_code == 200
+    return response.json()
+
+def test_end_to_end_workflow(api_client, test_market_data, system_components):
     """Test complete system workflow."""
-    base_url = api_process
     
     # 1. Deploy initial model
-    deploy_response = requests.post(
-        f"{base_url}/deploy",
+    deploy_response = api_client.post(
+        "/deploy",
         json={
             'version_id': 'v20230101_000000_test',
             'description': 'Initial deployment'
@@ -20,8 +32,8 @@ def test_end_to_end_workflow(api_process, test_market_data):
     assert deploy_response.json()['success']
     
     # 2. Get predictions
-    predict_response = requests.post(
-        f"{base_url}/predict",
+    predict_response = api_client.post(
+        "/predict",
         json={
             'instrument_id': 'section1',
             'bid_prices': [100.25, 100.50],
@@ -34,16 +46,14 @@ def test_end_to_end_workflow(api_process, test_market_data):
     assert 'latency_ms' in prediction
     
     # 3. Check metrics
-    time.sleep(1)  # Wait for metrics to update
-    metrics_response = requests.get(f"{base_url}/metrics")
-    assert metrics_response.status_code == 200
-    metrics = metrics_response.json()
+    system_components['server'].flush()  # Write buffered predictions
+    metrics = get_json(api_client, "/metrics")
     assert 'performance' in metrics
     assert 'health' in metrics
     
     # 4. Deploy new version
-    deploy_response = requests.post(
-        f"{base_url}/deploy",
+    deploy_response = api_client.post(
+        "/deploy",
         json={
             'version_id': 'v20230102_000000_test',
             'description': 'Updated model'
@@ -52,29 +62,24 @@ def test_end_to_end_workflow(api_process, test_market_data):
     assert deploy_response.status_code == 200
     
     # 5. Verify deployment
-    status_response = requests.get(f"{base_url}/status")
-    assert status_response.status_code == 200
-    status = status_response.json()
+    status = get_json(api_client, "/status")
     assert status['current_version'] == 'v20230102_000000_test'
     
     # 6. Test rollback
-    rollback_response = requests.post(f"{base_url}/rollback")
+    rollback_response = api_client.post("/rollback")
     assert rollback_response.status_code == 200
     assert rollback_response.json()['success']
     
     # Verify rollback
-    status_response = requests.get(f"{base_url}/status")
-    assert status_response.status_code == 200
-    status = status_response.json()
+    status = get_json(api_client, "/status")
     assert status['current_version'] == 'v20230101_000000_test'
 
-def test_error_handling(api_process):
+def test_error_handling(api_client):
     """Test system error handling."""
-    base_url = api_process
     
     # Test invalid model version
-    response = requests.post(
-        f"{base_url}/deploy",
+    response = api_client.post(
+        "/deploy",
         json={
             'version_id': 'invalid_version',
             'description': 'Invalid deployment'
@@ -83,37 +88,39 @@ def test_error_handling(api_process):
     assert response.status_code == 500
     
     # Test invalid market data
-    response = requests.post(
-        f"{base_url}/predict",
+    response = api_client.post(
+        "/predict",
         json={
             'instrument_id': 'section1',
             'bid_prices': [],  # Empty prices
             'ask_prices': [100.50]
         }
     )
-    assert response.status_code == 500
+    assert response.status_code == 422
 
-def test_monitoring_integration(api_process, system_components):
+def test_monitoring_integration(api_client, system_components):
     """Test monitoring system integration."""
-    base_url = api_process
     monitor = system_components['monitor']
     
-    # Generate some load
-    for _ in range(10):
-        requests.post(
-            f"{base_url}/predict",
-            json={
-                'instrument_id': 'section1',
-                'bid_prices': [100.25],
-                'ask_prices': [100.50]
-            }
+    import concurrent.futures
+    
+    def make_prediction(_):
+        return api_client.post(
+            "/predict",
+            json=PREDICT_PAYLOAD
         )
-        time.sleep(0.1)
     
-    # Check metrics
-    metrics_response = requests.get(f"{base_url}/metrics")
-    assert metrics_response.status_code == 200
-    metrics = metrics_response.json()
+    # Generate some load in one concurrent burst
+    with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
+        list(executor.map(make_prediction, range(10)))
+    
+    # Poll metrics until the load shows up rather than sleeping
+    deadline = time.monotonic() + 2.0
+    while True:
+        metrics = get_json(api_client, "/metrics")
+        if metrics['performance']['avg_latency'] > 0 or time.monotonic() > deadline:
+            break
+        time.sleep(0.01)
     
     # Verify metrics are being collected
     assert metrics['performance']['avg_latency'] > 0
@@ -121,47 +128,32 @@ def test_monitoring_integration(api_process, system_components):
     assert 'avg_memory' in metrics['health']
     assert 'avg_cpu' in metrics['health']
 
-def test_concurrent_requests(api_process):
+def test_concurrent_requests(api_client):
     """Test system under concurrent load."""
-    base_url = api_process
-    import concurrent.futures
-    
-    def make_prediction():
-        return requests.post(
-            f"{base_url}/predict",
-            json={
-                'instrument_id': 'section1',
-                'bid_prices': [100.25],
-                'ask_prices': [100.50]
-            }
-        )
+    async def fire():
+        transport = httpx.ASGITransport(app=api_client.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            return await asyncio.gather(
+                *[client.post("/predict", json=PREDICT_PAYLOAD) for _ in range(10)]
+            )
     
     # Make concurrent requests
-    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-        futures = [executor.submit(make_prediction) for _ in range(10)]
-        responses = [f.result() for f in futures]
+    responses = asyncio.run(fire())
     
     # Verify all requests succeeded
     assert all(r.status_code == 200 for r in responses)
     
     # Check system health after load
-    status_response = requests.get(f"{base_url}/status")
-    assert status_response.status_code == 200
-    status = status_response.json()
+    status = get_json(api_client, "/status")
     assert status['health_status'] == 'healthy'
 
-def test_data_persistence(api_process, test_db):
+def test_data_persistence(api_client, test_db):
     """Test data persistence across system components."""
-    base_url = api_process
     
     # Make predictions
-    prediction_response = requests.post(
-        f"{base_url}/predict",
-        json={
-            'instrument_id': 'section1',
-            'bid_prices': [100.25],
-            'ask_prices': [100.50]
-        }
+    prediction_response = api_client.post(
+        "/predict",
+        json=PREDICT_PAYLOAD
     )
     prediction_id = prediction_response.json()['prediction_id']
     
@@ -170,7 +162,12 @@ def test_data_persistence(api_process, test_db):
     assert stored_prediction is not None
     
     # Check metrics were stored
-    metrics_response = requests.get(f"{base_url}/metrics")
-    assert metrics_response.status_code == 200
-    metrics = metrics_response.json()
-    assert len(metrics['performance']['history']) > 0 
\ No newline at end of file
+    metrics = get_json(api_client, "/metrics")
+    assert len(metrics['performance']['history']) > 0 
+
+@pytest.mark.serial
+def test_api_server_bootstrap(api_process, http):
+    """Test the API starts and serves requests under uvicorn."""
+    response = http.get(f"{api_process}/status")
+    assert response.status_code == 200
+    assert 'current_version' in response.json()
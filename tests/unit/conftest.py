@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+@pytest.fixture
+def market_state():
+    """Build market states with one bid/ask section per 6 model input features.
+    
+    The returned function takes the model input size, the best bid and the
+    number of price levels; asks sit one 0.25 tick above each bid.
+    """
+    def build(input_size, bid=100.25, levels=1):
+        bids = bid + 0.25 * np.arange(levels)
+        return {
+            f'section{i + 1}': {
+                'bid': bids.copy(),
+                'ask': bids + 0.25
+            }
+            for i in range(input_size // 6)
+        }
+    return build
@@ -1,6 +1,8 @@
 import pytest
+from fastapi import FastAPI
 from fastapi.testclient import TestClient
 from datetime import datetime
+import numpy as np
 from unittest.mock import MagicMock, patch
 
 from src.api.routes import router, get_deployment_manager, get_model_server, get_model_monitor
@@ -37,18 +39,32 @@ def mock_model_monitor():
     monitor.check_alerts.return_value = []
     return monitor
 
+@pytest.fixture(scope="session")
+def _app():
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+@pytest.fixture(scope="session")
+def _test_client(_app):
+    return TestClient(_app)
+
 @pytest.fixture
 def client(
+    _app,
+    _test_client,
     mock_deployment_manager,
     mock_model_server,
     mock_model_monitor
 ):
-    # Override dependency injection
-    app = TestClient(router)
-    app.dependency_overrides[get_deployment_manager] = lambda: mock_deployment_manager
-    app.dependency_overrides[get_model_server] = lambda: mock_model_server
-    app.dependency_overrides[get_model_monitor] = lambda: mock_model_monitor
-    return app
+    # Override dependency injection; the app and client are shared
+    _app.dependency_overrides = {
+        get_deployment_manager: lambda: mock_deployment_manager,
+        get_model_server: lambda: mock_model_server,
+        get_model_monitor: lambda: mock_model_monitor
+    }
+    yield _test_client
+    _app.dependency_overrides = {}
 
 def test_predict_endpoint(client):
     response = client.post(
@@ -67,6 +83,27 @@ def test_predict_endpoint(client):
     assert 'prediction_id' in data
     assert 'latency_ms' in data
 
+def test_predict_binary_endpoint(client, mock_model_server):
+    prices = np.array([100.25, 100.50], dtype='<f8')
+    response = client.post(
+        "/predict_bin?instrument_id=section1",
+        content=prices.tobytes()
+    )
+    
+    assert response.status_code == 200
+    assert 'adjustments' in response.json()
+    state = mock_model_server.predict.call_args[0][0]
+    assert state['section1']['bid'].tolist() == [100.25]
+    assert state['section1']['ask'].tolist() == [100.50]
+
+def test_predict_binary_rejects_odd_payload(client):
+    response = client.post(
+        "/predict_bin?instrument_id=section1",
+        content=b'\x00' * 24
+    )
+    
+    assert response.status_code == 400
+
 def test_deploy_endpoint(client):
     response = client.post(
         "/deploy",
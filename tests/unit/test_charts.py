@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from src.ui.charts import lttb_indices, downsample_series
+
+def test_lttb_keeps_endpoints_and_extremes():
+    x = np.arange(10_000, dtype=np.float64)
+    y = np.sin(x / 500.0)
+    y[4321] = 10.0  # Spike that must survive downsampling
+    
+    indices = lttb_indices(x, y, 200)
+    
+    assert len(indices) == 200
+    assert indices[0] == 0 and indices[-1] == len(x) - 1
+    assert np.all(np.diff(indices) > 0)
+    assert 4321 in indices
+
+def test_lttb_short_series_unchanged():
+    x = np.arange(50, dtype=np.float64)
+    assert np.array_equal(lttb_indices(x, x, 100), np.arange(50))
+
+def test_downsample_series():
+    timestamps = pd.Series(
+        pd.date_range('2024-01-01', periods=5000, freq='s').strftime('%Y-%m-%dT%H:%M:%S')
+    )
+    values = pd.Series(np.random.default_rng(0).random(5000))
+    
+    x, y = downsample_series(timestamps, values, max_points=500)
+    
+    assert len(x) == len(y) == 500
+    assert x.dtype.kind == 'M'
+    assert x[0] == np.datetime64('2024-01-01T00:00:00')
+    assert y[0] == values.iloc[0]
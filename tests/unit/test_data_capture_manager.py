@@ -1,9 +1,16 @@
 import pytest
-from unittest.mock import MagicMock, patch, call
+import sqlite3
+from unittest.mock import MagicMock, call
 from datetime import datetime, time
-import pandas as pd
+from time import monotonic, sleep
+import numpy as np
 from src.data.capture.data_capture_manager import DataCaptureManager
-from src.data.storage.database_manager import DatabaseManager
+
+def wait_until(predicate, timeout):
+    """Poll predicate every 10ms until it holds or timeout seconds pass."""
+    deadline = monotonic() + timeout
+    while not predicate() and monotonic() < deadline:
+        sleep(0.01)
 
 @pytest.fixture
 def mock_config():
@@ -24,43 +31,46 @@ def mock_reader():
     reader = MagicMock()
     reader.read_market_data.return_value = {
         'section1': {
-            'bid': pd.Series([100.25, 100.50]),
-            'ask': pd.Series([100.50, 100.75])
+            'bid': np.array([100.25, 100.50], dtype=np.float64),
+            'ask': np.array([100.50, 100.75], dtype=np.float64)
         }
     }
     return reader
 
+class _StubDB:
+    """Minimal stand-in for DatabaseManager exposing only what capture uses."""
+    
+    def __init__(self):
+        self.store_snapshots = MagicMock()
+
 @pytest.fixture
 def mock_db_manager():
-    return MagicMock(spec=DatabaseManager)
+    return _StubDB()
+
+def at_time(hour, minute):
+    """Fixed clock for DataCaptureManager._now."""
+    now = datetime.combine(datetime.today(), time(hour=hour, minute=minute))
+    return lambda: now
 
-def test_trading_hours_check(mock_reader, mock_config):
-    manager = DataCaptureManager(mock_reader, mock_config)
+def test_trading_hours_check(mock_reader, mock_config, mock_db_manager, monkeypatch):
+    manager = DataCaptureManager(mock_reader, mock_config, mock_db_manager)
     
     # Test during trading hours
-    with patch('datetime.datetime') as mock_dt:
-        mock_dt.now.return_value = datetime.combine(
-            datetime.today(),
-            time(hour=10, minute=30)
-        )
-        assert manager._is_trading_hours() == True
-        
+    monkeypatch.setattr(manager, '_now', at_time(10, 30))
+    assert manager._is_trading_hours() == True
+    
     # Test outside trading hours
-    with patch('datetime.datetime') as mock_dt:
-        mock_dt.now.return_value = datetime.combine(
-            datetime.today(),
-            time(hour=18, minute=30)
-        )
-        assert manager._is_trading_hours() == False
+    monkeypatch.setattr(manager, '_now', at_time(18, 30))
+    assert manager._is_trading_hours() == False
 
-def test_stability_check(mock_reader, mock_config):
-    manager = DataCaptureManager(mock_reader, mock_config)
+def test_stability_check(mock_reader, mock_config, mock_db_manager):
+    manager = DataCaptureManager(mock_reader, mock_config, mock_db_manager)
     
     # Test with stable data
     stable_data = {
         'section1': {
-            'bid': pd.Series([100.25, 100.50]),
-            'ask': pd.Series([100.50, 100.75])
+            'bid': np.array([100.25, 100.50], dtype=np.float64),
+            'ask': np.array([100.50, 100.75], dtype=np.float64)
         }
     }
     
@@ -69,15 +79,15 @@ def test_stability_check(mock_reader, mock_config):
     assert manager._is_stable(stable_data) == False  # Second sample
     assert manager._is_stable(stable_data) == True   # Third sample - should be stable
 
-def test_capture_loop_error_handling(mock_reader, mock_config):
-    manager = DataCaptureManager(mock_reader, mock_config)
+def test_capture_loop_error_handling(mock_reader, mock_config, mock_db_manager):
+    manager = DataCaptureManager(mock_reader, mock_config, mock_db_manager)
     
     # Make reader raise an exception
     mock_reader.read_market_data.side_effect = Exception("Test error")
     
     # Start capture
     manager.start_capture()
-    time.sleep(0.1)  # Let it run briefly
+    wait_until(lambda: mock_reader.read_market_data.called, timeout=0.1)
     
     # Stop capture
     manager.stop_capture()
@@ -91,60 +101,119 @@ def test_process_capture_stores_data(mock_reader, mock_config, mock_db_manager):
     
     test_data = {
         'section1': {
-            'bid': pd.Series([100.25, 100.50]),
-            'ask': pd.Series([100.50, 100.75])
+            'bid': np.array([100.25, 100.50], dtype=np.float64),
+            'ask': np.array([100.50, 100.75], dtype=np.float64)
         }
     }
     
-    # Process the capture
+    # Process the capture and flush the write buffer
     manager._process_capture(test_data)
+    manager._flush_snapshots()
     
     # Verify data was stored
-    mock_db_manager.store_snapshot.assert_called_once_with(test_data)
+    mock_db_manager.store_snapshots.assert_called_once()
+    (snapshots,), _ = mock_db_manager.store_snapshots.call_args
+    assert len(snapshots) == 1
+    assert snapshots[0][1] is test_data
+
+def test_process_capture_batches_writes(mock_reader, mock_config, mock_db_manager):
+    """Test that captures are written in batches of snapshot_batch_size."""
+    mock_config['system']['snapshot_batch_size'] = 3
+    manager = DataCaptureManager(mock_reader, mock_config, mock_db_manager)
+    
+    test_data = {
+        'section1': {
+            'bid': np.array([100.25], dtype=np.float64),
+            'ask': np.array([100.50], dtype=np.float64)
+        }
+    }
+    
+    manager._process_capture(test_data)
+    manager._process_capture(test_data)
+    assert not mock_db_manager.store_snapshots.called
+    
+    manager._process_capture(test_data)
+    mock_db_manager.store_snapshots.assert_called_once()
+    assert len(mock_db_manager.store_snapshots.call_args[0][0]) == 3
 
-def test_capture_loop_with_database(mock_reader, mock_config, mock_db_manager):
+def test_capture_loop_with_database(mock_reader, mock_config, mock_db_manager, monkeypatch):
     """Test full capture loop with database integration."""
+    # Stability needs several reads; poll fast rather than every 5 seconds
+    mock_config['system']['capture_interval'] = 0.01
     manager = DataCaptureManager(mock_reader, mock_config, mock_db_manager)
     
     # Configure mock reader to return test data
     test_data = {
         'section1': {
-            'bid': pd.Series([100.25, 100.50]),
-            'ask': pd.Series([100.50, 100.75])
+            'bid': np.array([100.25, 100.50], dtype=np.float64),
+            'ask': np.array([100.50, 100.75], dtype=np.float64)
         }
     }
     mock_reader.read_market_data.return_value = test_data
     
+    # Simulate being in trading hours
+    monkeypatch.setattr(manager, '_now', at_time(10, 30))
+    
     # Start capture
-    with patch('datetime.datetime') as mock_dt:
-        # Simulate being in trading hours
-        mock_dt.now.return_value = datetime.combine(
-            datetime.today(),
-            time(hour=10, minute=30)
-        )
-        
-        manager.start_capture()
-        time.sleep(0.2)  # Let it run briefly
-        manager.stop_capture()
+    manager.start_capture()
+    wait_until(lambda: mock_reader.read_market_data.call_count >= 3, timeout=1.0)
+    manager.stop_capture()
     
     # Verify data was stored
-    assert mock_db_manager.store_snapshot.called
+    assert mock_db_manager.store_snapshots.called
 
 def test_error_handling_with_database(mock_reader, mock_config, mock_db_manager):
     """Test error handling when database storage fails."""
     manager = DataCaptureManager(mock_reader, mock_config, mock_db_manager)
     
     # Make database storage raise an error
-    mock_db_manager.store_snapshot.side_effect = Exception("Database error")
+    mock_db_manager.store_snapshots.side_effect = Exception("Database error")
     
     test_data = {
         'section1': {
-            'bid': pd.Series([100.25]),
-            'ask': pd.Series([100.50])
+            'bid': np.array([100.25], dtype=np.float64),
+            'ask': np.array([100.50], dtype=np.float64)
         }
     }
     
     # Should not raise exception
     manager._process_capture(test_data)
+    manager._flush_snapshots()
+    
+    # Verify error was logged (would need log capture to verify properly) 
+
+def test_failed_batch_falls_back_to_single_captures(mock_reader, mock_config, mock_db_manager):
+    """A rejected batch is retried per capture, dropping only the bad one."""
+    manager = DataCaptureManager(mock_reader, mock_config, mock_db_manager)
+    
+    def store(snapshots):
+        if len(snapshots) > 1 or snapshots[0][1] is duplicate:
+            raise sqlite3.IntegrityError("UNIQUE constraint failed")
+    mock_db_manager.store_snapshots.side_effect = store
+    
+    good = {'section1': {'bid': np.array([100.25]), 'ask': np.array([100.50])}}
+    duplicate = {'section1': {'bid': np.array([100.25]), 'ask': np.array([100.50])}}
+    manager._process_capture(good)
+    manager._process_capture(duplicate)
+    manager._process_capture(good)
+    manager._flush_snapshots()
+    
+    # One batch attempt, then one per capture; nothing left to retry
+    assert mock_db_manager.store_snapshots.call_count == 4
+    assert manager._snapshot_buffer == []
+
+def test_unavailable_storage_requeues_captures(mock_reader, mock_config, mock_db_manager):
+    """Captures are kept for the next flush while storage is unavailable."""
+    manager = DataCaptureManager(mock_reader, mock_config, mock_db_manager)
+    mock_db_manager.store_snapshots.side_effect = sqlite3.OperationalError("database is locked")
+    
+    test_data = {'section1': {'bid': np.array([100.25]), 'ask': np.array([100.50])}}
+    manager._process_capture(test_data)
+    manager._process_capture(test_data)
+    manager._flush_snapshots()
+    assert len(manager._snapshot_buffer) == 2
     
-    # Verify error was logged (would need log capture to verify properly) 
\ No newline at end of file
+    mock_db_manager.store_snapshots.side_effect = None
+    manager._flush_snapshots()
+    assert len(mock_db_manager.store_snapshots.call_args[0][0]) == 2
+    assert manager._snapshot_buffer == []
@@ -5,35 +5,37 @@ import numpy as np
 from unittest.mock import MagicMock, patch
 from src.data.capture.data_collector import DataCollector
 
+# Static query results, built once for the module
+_TIMESTAMP = datetime(2024, 1, 2, 10, 30)
+
+_SNAPSHOTS = pd.DataFrame({
+    'timestamp': [_TIMESTAMP] * 4,
+    'instrument_id': ['section1', 'section1', 'section2', 'section2'],
+    'bid_price': [100.25, 100.50, 50.25, 50.50],
+    'ask_price': [100.50, 100.75, 50.50, 50.75]
+})
+
+_ADJUSTMENTS = pd.DataFrame({
+    'timestamp': [_TIMESTAMP],
+    'instrument_id': ['section1'],
+    'old_mid': [100.25],
+    'new_mid': [100.50]
+})
+
 @pytest.fixture
-def mock_db_manager():
+def mock_db_manager(monkeypatch):
     manager = MagicMock()
     
-    # Mock snapshot data
-    snapshots = pd.DataFrame({
-        'timestamp': [datetime.now()] * 4,
-        'instrument_id': ['section1', 'section1', 'section2', 'section2'],
-        'bid_price': [100.25, 100.50, 50.25, 50.50],
-        'ask_price': [100.50, 100.75, 50.50, 50.75]
-    })
-    
-    # Mock adjustment data
-    adjustments = pd.DataFrame({
-        'timestamp': [datetime.now()],
-        'instrument_id': ['section1'],
-        'old_mid': [100.25],
-        'new_mid': [100.50]
-    })
-    
     # Mock read_sql_query to return appropriate data
     def mock_read_sql(*args, **kwargs):
         if 'market_snapshots' in args[0]:
-            return snapshots
+            return iter([_SNAPSHOTS])
         elif 'user_adjustments' in args[0]:
-            return adjustments
+            return _ADJUSTMENTS
     
     manager._get_connection().cursor = MagicMock()
-    pd.read_sql_query = MagicMock(side_effect=mock_read_sql)
+    # Restored after each test so the patch can't leak into other modules
+    monkeypatch.setattr(pd, 'read_sql_query', MagicMock(side_effect=mock_read_sql))
     
     return manager
 
@@ -62,14 +64,7 @@ def test_get_training_data(mock_db_manager, collector_config):
 def test_process_snapshots(mock_db_manager, collector_config):
     collector = DataCollector(mock_db_manager, collector_config)
     
-    snapshots = pd.DataFrame({
-        'timestamp': [datetime.now()] * 4,
-        'instrument_id': ['section1', 'section1', 'section2', 'section2'],
-        'bid_price': [100.25, 100.50, 50.25, 50.50],
-        'ask_price': [100.50, 100.75, 50.50, 50.75]
-    })
-    
-    market_states = collector._process_snapshots(snapshots)
+    market_states = collector._process_snapshots(_SNAPSHOTS)
     
     assert len(market_states) > 0
     assert all('bid' in state['section1'] for state in market_states)
@@ -78,14 +73,7 @@ def test_process_snapshots(mock_db_manager, collector_config):
 def test_process_adjustments(mock_db_manager, collector_config):
     collector = DataCollector(mock_db_manager, collector_config)
     
-    adjustments = pd.DataFrame({
-        'timestamp': [datetime.now()],
-        'instrument_id': ['section1'],
-        'old_mid': [100.25],
-        'new_mid': [100.50]
-    })
-    
-    adj_dict = collector._process_adjustments(adjustments)
+    adj_dict = collector.process_adjustments(_ADJUSTMENTS)
     
     assert 'section1' in adj_dict
     assert len(adj_dict['section1']) > 0
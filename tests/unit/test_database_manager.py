@@ -1,14 +1,24 @@
 import pytest
+import json
+import shutil
 import sqlite3
 from datetime import datetime, timedelta
-import pandas as pd
+import numpy as np
 from pathlib import Path
 from src.data.storage.database_manager import DatabaseManager
 
+@pytest.fixture(scope="session")
+def template_db(tmp_path_factory):
+    """Database with the schema applied once, copied for each test."""
+    db_path = tmp_path_factory.mktemp("template") / "template.db"
+    DatabaseManager(str(db_path)).close()
+    return db_path
+
 @pytest.fixture
-def temp_db(tmp_path):
+def temp_db(tmp_path, template_db):
     """Create temporary database for testing."""
     db_path = tmp_path / "test.db"
+    shutil.copyfile(template_db, db_path)
     return str(db_path)
 
 @pytest.fixture
@@ -18,8 +28,9 @@ def db_manager(temp_db):
     yield manager
     manager.close()
 
-def test_database_initialization(temp_db):
+def test_database_initialization(tmp_path):
     """Test database is properly initialized."""
+    temp_db = str(tmp_path / "fresh.db")
     manager = DatabaseManager(temp_db)
     
     # Check tables exist
@@ -40,8 +51,8 @@ def test_store_snapshot(db_manager):
     """Test storing market data snapshot."""
     test_data = {
         'section1': {
-            'bid': pd.Series([100.25, 100.50]),
-            'ask': pd.Series([100.50, 100.75])
+            'bid': np.array([100.25, 100.50], dtype=np.float64),
+            'ask': np.array([100.50, 100.75], dtype=np.float64)
         }
     }
     
@@ -54,13 +65,32 @@ def test_store_snapshot(db_manager):
     assert 'ask_price' in df.columns
     assert 'mid_price' in df.columns
 
+def test_store_snapshots_batch(db_manager):
+    """Test storing several snapshots in one batch."""
+    test_data = {
+        'section1': {
+            'bid': np.array([100.25], dtype=np.float64),
+            'ask': np.array([100.50], dtype=np.float64)
+        }
+    }
+    now = datetime.now()
+    
+    db_manager.store_snapshots([
+        (now - timedelta(seconds=2), test_data),
+        (now - timedelta(seconds=1), test_data)
+    ])
+    
+    df = db_manager.get_recent_data('section1', minutes=1)
+    assert len(df) == 2
+    assert (df['mid_price'] == 100.375).all()
+
 def test_get_recent_data(db_manager):
     """Test retrieving recent market data."""
     # Store some test data
     test_data = {
         'section1': {
-            'bid': pd.Series([100.25]),
-            'ask': pd.Series([100.50])
+            'bid': np.array([100.25], dtype=np.float64),
+            'ask': np.array([100.50], dtype=np.float64)
         }
     }
     
@@ -75,6 +105,27 @@ def test_get_recent_data(db_manager):
     assert (df['bid_price'] == 100.25).all()
     assert (df['ask_price'] == 100.50).all()
 
+def test_store_predictions_batch(db_manager):
+    """Test storing served predictions in one batch."""
+    db_manager.store_predictions_batch([
+        {
+            'timestamp': datetime.now(),
+            'model_version': 'v1',
+            'prediction': {'section1': 0.25},
+            'latency_ms': 1.5,
+            'queue_size': i
+        }
+        for i in range(3)
+    ])
+    
+    conn = db_manager._get_connection()
+    rows = conn.execute("SELECT * FROM model_predictions").fetchall()
+    
+    assert len(rows) == 3
+    assert rows[0]['model_version'] == 'v1'
+    assert json.loads(rows[0]['prediction']) == {'section1': 0.25}
+    assert rows[0]['error'] == 0
+
 def test_store_user_adjustment(db_manager):
     """Test storing user price adjustments."""
     db_manager.store_user_adjustment(
@@ -87,11 +138,149 @@ def test_store_user_adjustment(db_manager):
     # Verify adjustment was stored
     conn = db_manager._get_connection()
     cursor = conn.cursor()
-    cursor.execute("SELECT * FROM user_adjustments")
+    cursor.execute("""
+        SELECT a.*, i.code FROM user_adjustments a
+        JOIN instruments i ON i.id = a.instrument_id
+    """)
     row = cursor.fetchone()
     
     assert row is not None
-    assert row['instrument_id'] == 'section1'
+    assert row['code'] == 'section1'
     assert row['old_mid'] == 100.25
     assert row['new_mid'] == 100.50
-    assert row['reason'] == 'Test adjustment' 
\ No newline at end of file
+    assert row['reason'] == 'Test adjustment' 
+
+def test_user_adjustment_paths_share_clock(db_manager):
+    """Single and batched adjustments are stamped with the same local clock."""
+    before = datetime.now()
+    db_manager.store_user_adjustment('section1', 100.25, 100.50)
+    db_manager.store_user_adjustments_batch([
+        {'instrument_id': 'section1', 'old_mid': 100.50, 'new_mid': 100.75}
+    ])
+    after = datetime.now()
+    
+    conn = db_manager._get_connection()
+    rows = conn.execute(
+        "SELECT timestamp FROM user_adjustments ORDER BY id").fetchall()
+    
+    timestamps = [datetime.fromisoformat(row['timestamp']) for row in rows]
+    assert len(timestamps) == 2
+    assert all(before <= ts <= after for ts in timestamps)
+
+def test_unversioned_database_is_migrated(tmp_path):
+    """Databases keyed by instrument code are migrated to integer keys."""
+    db_path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE market_snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME NOT NULL,
+            instrument_id TEXT NOT NULL,
+            bid_price REAL, ask_price REAL, mid_price REAL,
+            source TEXT NOT NULL,
+            UNIQUE(timestamp, instrument_id)
+        );
+        CREATE TABLE instruments (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            price_increment REAL NOT NULL,
+            active BOOLEAN DEFAULT TRUE,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE user_adjustments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME NOT NULL,
+            instrument_id TEXT NOT NULL,
+            old_mid REAL, new_mid REAL, reason TEXT,
+            FOREIGN KEY(instrument_id) REFERENCES instruments(id)
+        );
+        CREATE INDEX idx_snapshots_instrument ON market_snapshots(instrument_id);
+        INSERT INTO instruments (id, name, price_increment) VALUES ('NI', 'Nickel', 0.5);
+        INSERT INTO market_snapshots (timestamp, instrument_id, bid_price, ask_price, mid_price, source)
+        VALUES ('2024-01-02 10:30:00', 'NI', 100.0, 100.5, 100.25, 'excel'),
+               ('2024-01-02 10:30:00', 'CA', 50.0, 50.25, 50.125, 'excel');
+        INSERT INTO user_adjustments (timestamp, instrument_id, old_mid, new_mid)
+        VALUES ('2024-01-02 10:31:00', 'NI', 100.25, 100.5);
+    """)
+    conn.close()
+    
+    manager = DatabaseManager(db_path)
+    conn = manager._get_connection()
+    
+    assert conn.execute("PRAGMA user_version").fetchone()[0] > 0
+    assert conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'idx_snapshots_instrument'"
+    ).fetchone() is None
+    
+    codes = conn.execute("""
+        SELECT i.code FROM market_snapshots s
+        JOIN instruments i ON i.id = s.instrument_id ORDER BY s.id
+    """).fetchall()
+    assert [row['code'] for row in codes] == ['NI', 'CA']
+    
+    adjustment = conn.execute("""
+        SELECT i.code, i.name, a.new_mid FROM user_adjustments a
+        JOIN instruments i ON i.id = a.instrument_id
+    """).fetchone()
+    assert (adjustment['code'], adjustment['name'], adjustment['new_mid']) == ('NI', 'Nickel', 100.5)
+    
+    # New rows resolve to the migrated keys
+    manager.store_user_adjustment('CA', 50.125, 50.25)
+    assert conn.execute("SELECT COUNT(*) FROM instruments").fetchone()[0] == 2
+    manager.close()
+
+def test_version_1_snapshots_gain_levels(tmp_path):
+    """Version 1 snapshot tables are rebuilt to key rows by price level."""
+    db_path = str(tmp_path / "v1.db")
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE instruments (
+            id INTEGER PRIMARY KEY,
+            code TEXT NOT NULL UNIQUE,
+            name TEXT NOT NULL,
+            price_increment REAL,
+            active BOOLEAN DEFAULT TRUE,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE market_snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME NOT NULL,
+            instrument_id INTEGER NOT NULL REFERENCES instruments(id),
+            bid_price REAL, ask_price REAL, mid_price REAL,
+            source TEXT NOT NULL,
+            UNIQUE(timestamp, instrument_id)
+        );
+        INSERT INTO instruments (id, code, name) VALUES (1, 'section1', 'section1');
+        INSERT INTO market_snapshots (timestamp, instrument_id, bid_price, ask_price, mid_price, source)
+        VALUES ('2024-01-02 10:30:00', 1, 100.0, 100.5, 100.25, 'excel');
+        PRAGMA user_version = 1;
+    """)
+    conn.close()
+    
+    manager = DatabaseManager(db_path)
+    conn = manager._get_connection()
+    row = conn.execute("SELECT level, mid_price FROM market_snapshots").fetchone()
+    assert (row['level'], row['mid_price']) == (0, 100.25)
+    
+    # Several levels can now share a timestamp
+    manager.store_snapshot({
+        'section1': {
+            'bid': np.array([100.25, 100.50], dtype=np.float64),
+            'ask': np.array([100.50, 100.75], dtype=np.float64)
+        }
+    })
+    levels = conn.execute(
+        "SELECT level FROM market_snapshots WHERE source = 'excel' ORDER BY id"
+    ).fetchall()
+    assert [row['level'] for row in levels] == [0, 0, 1]
+    manager.close()
+
+def test_newer_schema_version_is_rejected(tmp_path):
+    """Opening a database written by a newer schema version fails fast."""
+    db_path = str(tmp_path / "future.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA user_version = 999")
+    conn.close()
+    
+    with pytest.raises(RuntimeError, match="newer than the supported"):
+        DatabaseManager(db_path)
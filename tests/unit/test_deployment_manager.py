@@ -4,8 +4,10 @@ import json
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 import shutil
+import threading
+import torch
 
-from src.models.deployment.deployment_manager import DeploymentManager
+from src.models.deployment.deployment_manager import DeploymentConfig, DeploymentManager
 
 @pytest.fixture
 def deployment_config():
@@ -23,8 +25,19 @@ def deployment_config():
     }
 
 @pytest.fixture
-def mock_version_manager():
+def mock_version_manager(tmp_path):
     manager = MagicMock()
+    
+    # Real checkpoints, so model validation and backups use actual files
+    manager.models_dir = tmp_path / 'models'
+    manager.active_dir = tmp_path / 'active'
+    for version_id in ('v20230101_000000_test', 'v20230102_000000_test'):
+        for root in (manager.models_dir, manager.active_dir):
+            version_dir = root / version_id
+            version_dir.mkdir(parents=True)
+            torch.save({'model_state': {'weight': torch.zeros(2, 2)}}, version_dir / 'model.pt')
+            (version_dir / 'metadata.json').write_text(json.dumps({'version_id': version_id}))
+            
     manager.get_version_info.return_value = {
         'metrics': {
             'accuracy': 0.9,
@@ -71,13 +84,17 @@ def deployment_manager(
     tmp_path
 ):
     deployment_config['deployment']['base_dir'] = str(tmp_path)
-    return DeploymentManager(
+    manager = DeploymentManager(
         mock_version_manager,
         mock_model_server,
         mock_model_monitor,
         mock_db_manager,
         deployment_config
     )
+    # The integration suite runs in a separate pytest session, not here
+    with patch.object(manager, '_run_integration_tests', return_value=True):
+        yield manager
+    manager.shutdown()
 
 def test_deploy_model(deployment_manager):
     success = deployment_manager.deploy_model(
@@ -118,6 +135,33 @@ def test_rollback_deployment(deployment_manager):
     assert success
     assert deployment_manager.model_server.current_model_version == 'v20230101_000000_test'
 
+def test_requirement_directions(deployment_manager, mock_version_manager):
+    # latency_ms is a ceiling, accuracy a floor
+    assert deployment_manager._verify_version('v20230101_000000_test')
+    
+    mock_version_manager.get_version_info.return_value = {
+        'metrics': {'accuracy': 0.9, 'latency_ms': 150}
+    }
+    assert not deployment_manager._verify_version('v20230101_000000_test')
+    
+    mock_version_manager.get_version_info.return_value = {
+        'metrics': {'accuracy': 0.7, 'latency_ms': 50}
+    }
+    assert not deployment_manager._verify_version('v20230101_000000_test')
+    
+def test_prefixed_requirements():
+    config = DeploymentConfig.from_dict({
+        'base_dir': 'deployments',
+        'min_memory_mb': 1024,
+        'max_cpu_percent': 80,
+        'requirements': {'max_spread': 0.5, 'min_latency_ms': 1, 'accuracy': 0.8}
+    })
+    assert config.requirements == (
+        ('spread', '<=', 0.5),
+        ('latency_ms', '>=', 1.0),
+        ('accuracy', '>=', 0.8)
+    )
+
 def test_deployment_status(deployment_manager):
     deployment_manager.deploy_model(
         'v20230101_000000_test',
@@ -146,6 +190,22 @@ def test_resource_checks(mock_cpu, mock_memory, deployment_manager):
     
     assert not deployment_manager._check_resources()
 
+def test_cpu_sampler_starts_once_and_stops(deployment_manager):
+    threads = [
+        threading.Thread(target=deployment_manager._current_cpu_percent)
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+        
+    samplers = [t for t in threading.enumerate() if t.name == 'cpu-sampler']
+    assert samplers == [deployment_manager._cpu_sampler]
+    
+    deployment_manager.shutdown()
+    assert not deployment_manager._cpu_sampler.is_alive()
+
 def test_deployment_history_persistence(deployment_manager, tmp_path):
     # Deploy a model
     deployment_manager.deploy_model(
@@ -154,11 +214,39 @@ def test_deployment_history_persistence(deployment_manager, tmp_path):
     )
     
     # Check history was saved
-    history_file = tmp_path / 'deployment_history.json'
+    history_file = tmp_path / 'deployment_history.jsonl'
     assert history_file.exists()
     
     # Verify content
     with open(history_file, 'r') as f:
-        saved_history = json.load(f)
+        saved_history = [json.loads(line) for line in f if line.strip()]
         assert len(saved_history) == 1
-        assert saved_history[0]['version_id'] == 'v20230101_000000_test' 
\ No newline at end of file
+        assert saved_history[0]['version_id'] == 'v20230101_000000_test'
+
+def test_corrupt_history_line_is_skipped(
+    deployment_manager,
+    mock_version_manager,
+    mock_model_server,
+    mock_model_monitor,
+    mock_db_manager,
+    deployment_config,
+    tmp_path
+):
+    # A crash mid-append leaves a truncated last record
+    history_file = tmp_path / 'deployment_history.jsonl'
+    history_file.write_text(
+        json.dumps({'version_id': 'v20230101_000000_test', 'timestamp': '2023-01-01T00:00:00'})
+        + '\n{"version_id": "v2023'
+    )
+    
+    manager = DeploymentManager(
+        mock_version_manager,
+        mock_model_server,
+        mock_model_monitor,
+        mock_db_manager,
+        deployment_config
+    )
+    try:
+        assert [d['version_id'] for d in manager.deployment_history] == ['v20230101_000000_test']
+    finally:
+        manager.shutdown()
@@ -48,21 +48,71 @@ def test_record_feedback(mock_agent, mock_db_manager, feedback_config):
     
     assert len(manager.feedback_buffer) == 1
     assert manager.feedback_buffer[0]['instrument_id'] == 'section1'
-    mock_db_manager.store_user_adjustment.assert_called_once()
+    mock_db_manager.store_user_adjustments_batch.assert_not_called()
+    
+    # Buffered feedback is written in one batch on flush
+    manager.flush()
+    mock_db_manager.store_user_adjustments_batch.assert_called_once()
+    rows = mock_db_manager.store_user_adjustments_batch.call_args[0][0]
+    assert rows[0]['instrument_id'] == 'section1'
+    assert rows[0]['new_mid'] == 0.30
+    assert len(manager.feedback_buffer) == 0
 
 def test_process_feedback_buffer(mock_agent, mock_db_manager, feedback_config):
     manager = FeedbackManager(mock_agent, mock_db_manager, feedback_config)
     
     # Add multiple feedback entries
-    for i in range(feedback_config['feedback']['buffer_size']):
-        manager.record_feedback(
-            instrument_id='section1',
-            model_adjustment=0.25,
-            user_adjustment=0.30
-        )
+    manager.record_feedback_batch([
+        {
+            'instrument_id': 'section1',
+            'model_adjustment': 0.25,
+            'user_adjustment': 0.30
+        }
+        for _ in range(feedback_config['feedback']['buffer_size'])
+    ])
     
     # Buffer should be cleared after processing
     assert len(manager.feedback_buffer) == 0
+    mock_db_manager.store_user_adjustments_batch.assert_called_once()
+    
+def test_record_feedback_batch_spanning_buffers(mock_agent, mock_db_manager, feedback_config):
+    manager = FeedbackManager(mock_agent, mock_db_manager, feedback_config)
+    buffer_size = feedback_config['feedback']['buffer_size']
+    
+    manager.record_feedback('section1', 0.25, 0.30)
+    manager.record_feedback_batch([
+        {'instrument_id': 'section2', 'model_adjustment': 0.1, 'user_adjustment': 0.2}
+        for _ in range(2 * buffer_size + 4)
+    ])
+    
+    # Full buffers are written as they fill; the rest stays buffered
+    calls = mock_db_manager.store_user_adjustments_batch.call_args_list
+    assert [len(call.args[0]) for call in calls] == [buffer_size, buffer_size]
+    assert calls[0].args[0][0]['instrument_id'] == 'section1'
+    assert len(manager.feedback_buffer) == 5
+    
+def test_concurrent_record_feedback(mock_agent, mock_db_manager, feedback_config):
+    import threading
+    
+    manager = FeedbackManager(mock_agent, mock_db_manager, feedback_config)
+    
+    def produce():
+        for _ in range(25):
+            manager.record_feedback('section1', 0.25, 0.30)
+            
+    threads = [threading.Thread(target=produce) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    manager.flush()
+    
+    # Every event is persisted exactly once
+    stored = sum(
+        len(call.args[0])
+        for call in mock_db_manager.store_user_adjustments_batch.call_args_list
+    )
+    assert stored == 100
     
 def test_calculate_feedback_stats(mock_agent, mock_db_manager, feedback_config):
     manager = FeedbackManager(mock_agent, mock_db_manager, feedback_config)
@@ -93,4 +143,35 @@ def test_update_model_parameters(mock_agent, mock_db_manager, feedback_config):
     manager._update_model_parameters(stats)
     
     # Verify model parameters were updated
-    assert mock_agent.config['training']['spread_weight'] > 0.1 
\ No newline at end of file
+    assert mock_agent.config['training']['spread_weight'] > 0.1 
+
+def test_failed_store_requeues_feedback(mock_agent, mock_db_manager, feedback_config):
+    manager = FeedbackManager(mock_agent, mock_db_manager, feedback_config)
+    mock_db_manager.store_user_adjustments_batch.side_effect = RuntimeError('locked')
+    
+    manager.record_feedback('section1', 0.25, 0.30)
+    with pytest.raises(RuntimeError):
+        manager.flush()
+        
+    # The entry is kept and written by the next flush
+    assert len(manager.feedback_buffer) == 1
+    mock_db_manager.store_user_adjustments_batch.side_effect = None
+    manager.flush()
+    
+    rows = mock_db_manager.store_user_adjustments_batch.call_args[0][0]
+    assert [row['new_mid'] for row in rows] == [0.30]
+    assert len(manager.feedback_buffer) == 0
+
+def test_failed_store_requeues_every_detached_buffer(mock_agent, mock_db_manager, feedback_config):
+    feedback_config['feedback']['buffer_size'] = 4
+    manager = FeedbackManager(mock_agent, mock_db_manager, feedback_config)
+    mock_db_manager.store_user_adjustments_batch.side_effect = RuntimeError('locked')
+    
+    with pytest.raises(RuntimeError):
+        manager.record_feedback_batch([
+            {'instrument_id': 'section1', 'model_adjustment': 0.0, 'user_adjustment': float(i)}
+            for i in range(8)
+        ])
+        
+    # Both detached buffers are kept, in recording order
+    assert [f['user_adjustment'] for f in manager.feedback_buffer] == [float(i) for i in range(8)]
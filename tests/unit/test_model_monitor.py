@@ -1,6 +1,4 @@
 import pytest
-from datetime import datetime, timedelta
-import pandas as pd
 import numpy as np
 from unittest.mock import MagicMock, patch
 import json
@@ -27,18 +25,17 @@ def monitor_config():
 def mock_db_manager():
     manager = MagicMock()
     
-    # Mock prediction data
-    predictions = pd.DataFrame({
-        'timestamp': [datetime.now() - timedelta(minutes=i) for i in range(10)],
-        'latency_ms': np.random.uniform(10, 90, 10),
-        'error': [0] * 9 + [1],  # 10% error rate
-        'queue_size': np.random.randint(0, 100, 10),
-        'accuracy': np.random.uniform(0.8, 1.0, 10),
-        'spread_compliant': [1] * 8 + [0] * 2  # 80% compliance
-    })
-    
-    manager._get_connection().cursor = MagicMock()
-    pd.read_sql_query = MagicMock(return_value=predictions)
+    # Mock aggregated prediction data: count, errors, span in seconds,
+    # then mean latency, queue size, accuracy and spread compliance
+    rng = np.random.default_rng(0)
+    manager._get_connection().execute.return_value.fetchone.return_value = (
+        10, 1, 540.0,  # 10% error rate over 9 minutes
+        rng.uniform(10, 90),
+        int(rng.integers(0, 100)),
+        rng.uniform(0.8, 1.0),
+        0.8  # 80% compliance
+    )
+    manager.get_queue_size.return_value = 5
     
     return manager
 
@@ -117,14 +114,45 @@ def test_metrics_persistence(model_monitor, tmp_path):
     model_monitor.collect_performance_metrics()
     model_monitor.collect_health_metrics()
     
-    # Check file was created
-    metrics_file = tmp_path / 'metrics_history.json'
-    assert metrics_file.exists()
+    # Check history files were created
+    for kind in ('performance', 'health'):
+        history_file = tmp_path / f'{kind}_history.jsonl'
+        assert history_file.exists()
+        
+        # Verify content
+        with open(history_file, 'r') as f:
+            records = [json.loads(line) for line in f]
+            assert len(records) > 0
+            assert 'timestamp' in records[0]
+
+def test_clear_metrics(model_monitor, tmp_path):
+    model_monitor.collect_performance_metrics()
+    model_monitor.collect_health_metrics()
+    model_monitor.get_metrics_summary(window_hours=1)
+    
+    model_monitor.clear_metrics()
     
-    # Verify content
-    with open(metrics_file, 'r') as f:
-        saved_metrics = json.load(f)
-        assert 'performance' in saved_metrics
-        assert 'health' in saved_metrics
-        assert len(saved_metrics['performance']) > 0
-        assert len(saved_metrics['health']) > 0 
\ No newline at end of file
+    assert len(model_monitor.performance_history) == 0
+    assert len(model_monitor.health_history) == 0
+    assert not (tmp_path / 'performance_history.jsonl').exists()
+    
+    # Collection and summaries keep working after a clear
+    model_monitor.collect_performance_metrics()
+    summary = model_monitor.get_metrics_summary(window_hours=1)
+    assert summary['performance']['avg_latency'] > 0
+
+def test_legacy_history_migrated_and_corrupt_records_skipped(monitor_config, mock_db_manager, tmp_path):
+    record = {'timestamp': '2023-01-01T00:00:00', 'prediction_latency': 10.0}
+    (tmp_path / 'metrics_history.json').write_text(
+        json.dumps({'performance': [record], 'health': []})
+    )
+    ModelMonitor(mock_db_manager, monitor_config, metrics_dir=str(tmp_path))
+    assert not (tmp_path / 'metrics_history.json').exists()
+    
+    # A crash mid-append leaves a truncated last record
+    with open(tmp_path / 'performance_history.jsonl', 'a') as f:
+        f.write('{"timestamp": "2023-01-0')
+        
+    monitor = ModelMonitor(mock_db_manager, monitor_config, metrics_dir=str(tmp_path))
+    assert list(monitor.performance_history) == [record]
+    assert len(monitor.health_history) == 0
@@ -1,6 +1,7 @@
+import copy
+import io
 import pytest
 from datetime import datetime
-import numpy as np
 from unittest.mock import MagicMock, patch
 import time
 import threading
@@ -9,40 +10,49 @@ import json
 from src.models.serving.model_server import ModelServer
 from src.models.agents.price_agent import PriceAgent
 
+_SERVER_CONFIG = {
+    'model': {
+        'input_size': 24,
+        'hidden_size': 64,
+        'output_size': 4,
+        'max_adjustment': 0.5
+    },
+    'serving': {
+        'queue_size': 100,
+        'max_delay': 1.0
+    }
+}
+
+def _write_version(active_root, version_id, config, saved_model):
+    """Lay out an activated model version as the version manager would."""
+    version_dir = active_root / version_id
+    version_dir.mkdir(parents=True)
+    (version_dir / 'model.pt').write_bytes(saved_model)
+    with open(version_dir / 'metadata.json', 'w') as f:
+        json.dump({
+            'config': config,
+            'version_id': version_id
+        }, f)
+
 @pytest.fixture
 def server_config():
-    return {
-        'model': {
-            'input_size': 24,
-            'hidden_size': 64,
-            'output_size': 4,
-            'max_adjustment': 0.5
-        },
-        'serving': {
-            'queue_size': 100,
-            'max_delay': 1.0
-        }
-    }
+    return copy.deepcopy(_SERVER_CONFIG)
+
+@pytest.fixture(scope="module")
+def saved_model():
+    """Checkpoint of an untrained agent, serialized once for the module."""
+    buffer = io.BytesIO()
+    PriceAgent(copy.deepcopy(_SERVER_CONFIG)).save(buffer)
+    return buffer.getvalue()
 
 @pytest.fixture
-def mock_version_manager(tmp_path):
+def mock_version_manager(tmp_path, server_config, saved_model):
     manager = MagicMock()
     
     # Set up mock active version
     version_id = 'v20230101_000000_test'
-    active_dir = tmp_path / 'active' / version_id
-    active_dir.mkdir(parents=True)
-    
-    # Create mock model files
-    model = PriceAgent(server_config())
-    model.save(str(active_dir / 'model.pt'))
+    _write_version(tmp_path / 'active', version_id, server_config, saved_model)
     
-    with open(active_dir / 'metadata.json', 'w') as f:
-        json.dump({
-            'config': server_config(),
-            'version_id': version_id
-        }, f)
-        
     manager.get_active_version.return_value = version_id
     manager.active_dir = tmp_path / 'active'
     
@@ -67,41 +77,33 @@ def test_server_initialization(model_server):
     assert model_server.is_running
     assert model_server.worker_thread.is_alive()
 
-def test_synchronous_prediction(model_server):
-    market_state = {
-        'section1': {
-            'bid': np.array([100.25]),
-            'ask': np.array([100.50])
-        }
-    }
-    
-    prediction = model_server.predict(market_state)
+def test_synchronous_prediction(model_server, server_config, market_state):
+    prediction = model_server.predict(market_state(server_config['model']['input_size']))
     
     assert isinstance(prediction, dict)
     assert 'section1' in prediction
     assert isinstance(prediction['section1'], float)
 
-def test_async_prediction(model_server):
-    market_state = {
-        'section1': {
-            'bid': np.array([100.25]),
-            'ask': np.array([100.50])
-        }
-    }
+def test_async_prediction(model_server, mock_db_manager, server_config, market_state):
+    stored = threading.Event()
+    mock_db_manager.store_predictions_batch.side_effect = lambda rows: stored.set()
     
     # Submit async prediction
-    result = model_server.predict(market_state, async_mode=True)
+    result = model_server.predict(
+        market_state(server_config['model']['input_size']), async_mode=True)
     assert result is None
     
-    # Wait for processing
-    time.sleep(0.1)
+    # Wait for processing and the batched write
+    assert stored.wait(timeout=1.0)
     
     # Verify prediction was stored
-    mock_db_manager.store_prediction.assert_called_once()
+    mock_db_manager.store_predictions_batch.assert_called_once()
 
-def test_model_update(model_server, mock_version_manager):
+def test_model_update(model_server, mock_version_manager, server_config, saved_model):
     # Create new version
     new_version = 'v20230102_000000_test'
+    _write_version(
+        mock_version_manager.active_dir, new_version, server_config, saved_model)
     
     # Update to new version
     success = model_server.update_model(new_version)
@@ -113,4 +115,21 @@ def test_server_shutdown(model_server):
     model_server.shutdown()
     
     assert not model_server.is_running
-    assert not model_server.worker_thread.is_alive() 
\ No newline at end of file
+    assert not model_server.worker_thread.is_alive() 
+
+def test_full_write_buffer_counts_drops(server_config, mock_version_manager, mock_db_manager, market_state, caplog):
+    server_config['serving']['write_buffer_size'] = 2
+    server_config['serving']['write_interval_ms'] = 1000  # Flushed manually below
+    server = ModelServer(mock_version_manager, mock_db_manager, server_config)
+    state = market_state(server_config['model']['input_size'])
+    try:
+        for _ in range(3):
+            server._store_prediction({'section1': 0.0}, state)
+        server.flush()
+    finally:
+        server.shutdown()
+        
+    (rows,), _ = mock_db_manager.store_predictions_batch.call_args
+    assert len(rows) == 2
+    assert rows[0]['model_version'] == 'v20230101_000000_test'
+    assert "dropped 1 predictions" in caplog.text
@@ -1,6 +1,8 @@
+import io
 import pytest
 import torch
 import numpy as np
+from unittest.mock import MagicMock
 from src.models.training.trainer import ModelTrainer
 from src.models.agents.price_agent import PriceAgent
 import pandas as pd
@@ -26,6 +28,10 @@ def trainer_config():
 def mock_db_manager():
     return MagicMock()
 
+@pytest.fixture
+def test_state(trainer_config, market_state):
+    return market_state(trainer_config['model']['input_size'], levels=2)
+
 @pytest.fixture
 def trainer(trainer_config, mock_db_manager):
     agent = PriceAgent(trainer_config)
@@ -45,15 +51,16 @@ def test_train_epoch(trainer, test_state):
     assert 'price_loss' in metrics
     assert 'spread_loss' in metrics
     
-def test_checkpoint_save_load(trainer, tmp_path):
-    save_path = tmp_path / "checkpoint.pt"
+def test_checkpoint_save_load(trainer, test_state, trainer_config, mock_db_manager):
+    buffer = io.BytesIO()
     
     # Train a bit
     train_data = [test_state] * 4
     trainer.train_epoch(train_data)
     
     # Save checkpoint
-    trainer.save_checkpoint(str(save_path))
+    trainer.save_checkpoint(buffer)
+    buffer.seek(0)
     
     # Create new trainer and load checkpoint
     new_trainer = ModelTrainer(
@@ -61,7 +68,7 @@ def test_checkpoint_save_load(trainer, tmp_path):
         mock_db_manager,
         trainer_config
     )
-    new_trainer.load_checkpoint(str(save_path))
+    new_trainer.load_checkpoint(buffer)
     
     # Compare states
     for p1, p2 in zip(trainer.agent.parameters(),
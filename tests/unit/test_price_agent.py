@@ -1,3 +1,4 @@
+import io
 import pytest
 import torch
 import numpy as np
@@ -48,16 +49,17 @@ def test_get_action(model_config, test_state):
     assert all(abs(v) <= model_config['model']['max_adjustment'] 
                for v in adjustments.values())
     
-def test_model_save_load(model_config, tmp_path):
+def test_model_save_load(model_config):
     agent = PriceAgent(model_config)
-    save_path = tmp_path / "test_model.pt"
+    buffer = io.BytesIO()
     
     # Save model
-    agent.save(str(save_path))
+    agent.save(buffer)
+    buffer.seek(0)
     
     # Load model
     new_agent = PriceAgent(model_config)
-    new_agent.load(str(save_path))
+    new_agent.load(buffer)
     
     # Compare model parameters
     for p1, p2 in zip(agent.parameters(), new_agent.parameters()):
@@ -1,10 +1,11 @@
 import pytest
-from datetime import datetime
-import numpy as np
+from datetime import datetime, timedelta
+import pandas as pd
 from unittest.mock import MagicMock, patch
 from pathlib import Path
 import json
 
+from src.data.storage.database_manager import DatabaseManager
 from src.models.training.pipeline import TrainingPipeline
 
 @pytest.fixture
@@ -20,6 +21,7 @@ def pipeline_config():
             'learning_rate': 0.001,
             'batch_size': 32,
             'spread_weight': 0.1,
+            'min_spread': 0.25,
             'data_window_days': 7
         },
         'evaluation': {
@@ -51,13 +53,20 @@ def test_pipeline_initialization(pipeline):
     assert pipeline.feedback_manager is not None
     assert pipeline.data_collector is not None
 
-def test_training_loop(pipeline, mock_db_manager):
+def test_training_loop(pipeline, mock_db_manager, pipeline_config, market_state):
     # Mock training data
-    mock_data = ([{'section1': {'bid': np.array([100.25]),
-                               'ask': np.array([100.50])}}], {})
+    mock_data = ([market_state(pipeline_config['model']['input_size'])], {})
+    pipeline.data_collector = MagicMock()
     pipeline.data_collector.get_training_data.return_value = mock_data
+    pipeline.data_collector.get_new_training_records.return_value = (
+        [(pd.Timestamp.now(), mock_data[0][0])],
+        pd.DataFrame(columns=['timestamp', 'instrument_id', 'old_mid', 'new_mid']),
+        None
+    )
+    pipeline.data_collector.process_adjustments.return_value = {}
     
     # Mock evaluation metrics
+    pipeline.evaluator = MagicMock()
     mock_metrics = {
         'profitable_adjustments': 0.8,
         'mean_spread_impact': 0.1
@@ -90,10 +99,11 @@ def test_model_saving(pipeline, tmp_path):
         saved_metrics = json.load(f)
     assert saved_metrics == mock_metrics
 
-def test_checkpoint_loading(pipeline, tmp_path):
+def test_checkpoint_loading(pipeline, pipeline_config, mock_db_manager, tmp_path):
     # Create and save a checkpoint
     pipeline.current_epoch = 5
     pipeline._save_checkpoint()
+    pipeline.wait_for_checkpoints()
     
     # Create new pipeline and load checkpoint
     new_pipeline = TrainingPipeline(
@@ -103,4 +113,32 @@ def test_checkpoint_loading(pipeline, tmp_path):
     )
     new_pipeline.resume_from_checkpoint(5)
     
-    assert new_pipeline.current_epoch == 5 
\ No newline at end of file
+    assert new_pipeline.current_epoch == 5
+
+def test_training_window_picks_up_late_rows(pipeline_config, market_state, tmp_path):
+    db_manager = DatabaseManager(str(tmp_path / 'market.db'))
+    pipeline = TrainingPipeline(
+        pipeline_config,
+        db_manager,
+        checkpoint_dir=str(tmp_path / 'checkpoints')
+    )
+    now = datetime.now()
+    input_size = pipeline_config['model']['input_size']
+    
+    try:
+        db_manager.store_snapshots([(now - timedelta(hours=1), market_state(input_size))])
+        states, _ = pipeline._get_training_data()
+        assert len(states) == 1
+        
+        # Written after the first fetch, but timestamped before it
+        db_manager.store_snapshots([(now - timedelta(hours=2), market_state(input_size, bid=99.75))])
+        states, _ = pipeline._get_training_data()
+        assert len(states) == 2
+        assert states[0]['section1']['bid'][0] == 99.75
+        
+        # Already-read rows are not fetched again
+        states, _ = pipeline._get_training_data()
+        assert len(states) == 2
+    finally:
+        pipeline.close()
+        db_manager.close()
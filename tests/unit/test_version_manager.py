@@ -1,6 +1,7 @@
 import pytest
 from datetime import datetime
 import json
+import os
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 import torch
@@ -68,6 +69,40 @@ def test_activate_version(version_manager, test_model):
     # Check it's active
     assert version_manager.get_active_version() == version_id
     assert (version_manager.active_dir / version_id).exists()
+    assert (version_manager.active_dir / version_id / 'model.pt').exists()
+    
+    # Activating another version archives the current one
+    with patch('src.models.versioning.version_manager.datetime') as mock_dt:
+        mock_dt.now.return_value = datetime(2030, 1, 1)
+        new_version_id = version_manager.register_model(
+            test_model,
+            {'test_metric': 2.0},
+            "Second version"
+        )
+    version_manager.activate_version(new_version_id)
+    
+    assert version_manager.get_active_version() == new_version_id
+    assert (version_manager.archive_dir / version_id / 'metadata.json').exists()
+
+def test_activation_never_leaves_no_active_version(version_manager, test_model):
+    first = version_manager.register_model(test_model, {'test_metric': 1.0}, "First")
+    version_manager.activate_version(first)
+    with patch('src.models.versioning.version_manager.datetime') as mock_dt:
+        mock_dt.now.return_value = datetime(2030, 1, 1)
+        second = version_manager.register_model(test_model, {'test_metric': 2.0}, "Second")
+        
+    # Observe the active version at the moment the old one is archived
+    seen = []
+    archive = version_manager._archive_active
+    def observing_archive(item):
+        seen.append(version_manager.get_active_version())
+        archive(item)
+    
+    with patch.object(version_manager, '_archive_active', side_effect=observing_archive):
+        version_manager.activate_version(second)
+        
+    assert seen == [second]
+    assert version_manager.get_active_version() == second
 
 def test_version_filtering(version_manager, test_model):
     # Register multiple versions
@@ -96,6 +131,22 @@ def test_version_filtering(version_manager, test_model):
     assert len(good_versions) == 1
     assert good_versions[0]['metrics']['accuracy'] >= 0.7
 
+def test_same_second_registrations_get_distinct_ids(version_manager, test_model):
+    """Test repeat registrations within a second don't collide"""
+    with patch('src.models.versioning.version_manager.datetime') as mock_dt:
+        mock_dt.now.return_value = datetime(2030, 1, 1)
+        first_id = version_manager.register_model(test_model, {}, "First")
+        second_id = version_manager.register_model(test_model, {}, "Second")
+        
+        # Weights changed through .data after hashing are saved, not linked
+        next(test_model.parameters()).data.add_(1.0)
+        third_id = version_manager.register_model(test_model, {}, "Third")
+        
+    assert len({first_id, second_id, third_id}) == 3
+    first_path = version_manager.models_dir / first_id / 'model.pt'
+    assert os.path.samefile(first_path, version_manager.models_dir / second_id / 'model.pt')
+    assert not os.path.samefile(first_path, version_manager.models_dir / third_id / 'model.pt')
+
 def test_version_info(version_manager, test_model):
     # Register a model
     version_id = version_manager.register_model(
@@ -111,4 +162,65 @@ def test_version_info(version_manager, test_model):
     assert info['version_id'] == version_id
     assert 'timestamp' in info
     assert 'metrics' in info
-    assert 'description' in info 
\ No newline at end of file
+    assert 'description' in info 
+def test_model_hash(version_manager, test_model, version_config):
+    """Test model hash is deterministic and tracks weights"""
+    model_hash = version_manager._compute_model_hash(test_model)
+    assert len(model_hash) == 64
+    
+    # Same weights hash the same
+    clone = PriceAgent(version_config)
+    clone.load_state_dict(test_model.state_dict())
+    assert version_manager._compute_model_hash(clone) == model_hash
+    
+    # Any weight change changes the hash, including in-place updates
+    # to a model that was already hashed
+    with torch.no_grad():
+        next(clone.parameters()).view(-1)[0] += 1.0
+    assert version_manager._compute_model_hash(clone) != model_hash
+    clone.load_state_dict(test_model.state_dict())
+    assert version_manager._compute_model_hash(clone) == model_hash
+    
+    # Writes through .data don't bump autograd versions but still count
+    next(clone.parameters()).data.add_(1.0)
+    assert version_manager._compute_model_hash(clone) != model_hash
+
+def test_version_history_persistence(version_manager, test_model, mock_db_manager):
+    """Test version history is appended to disk and reloaded"""
+    version_id = version_manager.register_model(
+        test_model,
+        {'test_metric': 1.0},
+        "Persisted version"
+    )
+    
+    history_path = version_manager.base_dir / 'version_history.jsonl'
+    with open(history_path) as f:
+        records = [json.loads(line) for line in f]
+    assert [r['version_id'] for r in records] == [version_id]
+    
+    # A fresh manager sees the same history
+    reloaded = ModelVersionManager(
+        str(version_manager.base_dir),
+        mock_db_manager,
+        version_manager.config
+    )
+    assert reloaded.get_version_info(version_id)['description'] == "Persisted version"
+
+def test_identical_model_reuses_saved_file(version_manager, test_model):
+    """Test re-registering identical weights links the existing model file"""
+    first_id = version_manager.register_model(test_model, {}, "First")
+    with patch('src.models.versioning.version_manager.datetime') as mock_dt:
+        mock_dt.now.return_value = datetime(2030, 1, 1)
+        second_id = version_manager.register_model(test_model, {}, "Second")
+        
+    first_path = version_manager.models_dir / first_id / 'model.pt'
+    second_path = version_manager.models_dir / second_id / 'model.pt'
+    assert os.path.samefile(first_path, second_path)
+    
+    # A different config is saved separately
+    test_model.config['model']['max_adjustment'] = 0.75
+    with patch('src.models.versioning.version_manager.datetime') as mock_dt:
+        mock_dt.now.return_value = datetime(2030, 1, 2)
+        third_id = version_manager.register_model(test_model, {}, "Third")
+    third_path = version_manager.models_dir / third_id / 'model.pt'
+    assert not os.path.samefile(first_path, third_path)